@@ -1,3 +1,5 @@
+import sys
+
 import matplotlib.pyplot as plt
 import networkx as nx
 import numpy as np
@@ -6,6 +8,7 @@ from networkx.algorithms.planarity import check_planarity
 from networkx.utils import arbitrary_element, not_implemented_for
 
 import biconnectivity as bcn
+import loader
 import triangularity as trng
 
 
@@ -21,44 +24,21 @@ def make_chordal_graph(G):
     alpha = {node: 0 for node in H}
     if nx.is_chordal(H):
         return H, alpha
-    chords = set()
-    weight = {node: 0 for node in H.nodes()}
-    unnumbered_nodes = list(H.nodes())
-    for i in range(len(H.nodes()), 0, -1):
-        # get the node in unnumbered_nodes with the maximum weight
-        z = max(unnumbered_nodes, key=lambda node: weight[node])
-        unnumbered_nodes.remove(z)
-        alpha[z] = i
-        update_nodes = []
-        for y in unnumbered_nodes:
-            if G.has_edge(y, z):
-                update_nodes.append(y)
-            else:
-                # y_weight will be bigger than node weights between y and z
-                y_weight = weight[y]
-                lower_nodes = [
-                    node for node in unnumbered_nodes if weight[node] < y_weight
-                ]
-                if nx.has_path(H.subgraph(lower_nodes + [z, y]), y, z):
-                    update_nodes.append(y)
-                    chords.add((z, y))
-        # during calculation of paths the weights should not be updated
-        for node in update_nodes:
-            weight[node] += 1
+    alpha, chords = trng.mcs_m(G)
     H.add_edges_from(chords)
     edges_added=chords
     return H, alpha,edges_added
 
 
-def make_graph(G):
-    vertex_count = int(input("Enter the number of vertices in the graph: "))
-    edge_count = int(input("Enter the number of edges in the graph: "))
-    print("Enter each edge in new line(0-based index)")
-    for i in range(edge_count):
-        line = input()
-        node1 = int(line.split()[0])
-        node2 = int(line.split()[1])
-        G.add_edge(node1, node2)
+def make_graph(G, source=None):
+    """
+    :param G: networkx graph to be filled
+    :param source: path or file object holding "n m" and then m edges
+                   (0-based index); stdin by default
+    """
+    if source is None:
+        source = sys.stdin.buffer
+    loader.load_graph(source, header=True, nxgraph=G)
 
 
 def Check_Chordality(G, print_op):
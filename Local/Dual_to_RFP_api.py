@@ -1,4 +1,3 @@
-
 """API
 
 Generates floorplamns for given graph data as input.
@@ -6,11 +5,116 @@ Current support only for rectangular floorplans.
 A running example is available.
 
 """
+import json
+
+import numpy as np
+
+import instrument
 import source.inputgraph as inputgraph
+from cache import structure_key
 
 normalize_const = 50
 
-def graph_to_rfp(input_data):
+def _input_graph(edgedata, node_coordinates):
+    """Builds the InputGraph of one request. The duals write their
+    results into it, so it is never shared between requests.
+
+    Args:
+        edgedata: A tuple of (source, target) pairs.
+        node_coordinates: A tuple of (x, y) pairs.
+    """
+    instrument.count("dual.input_graphs_built")
+    return inputgraph.InputGraph(len(node_coordinates), len(edgedata)
+        , [list(edge) for edge in edgedata]
+        , [list(coord) for coord in node_coordinates])
+
+def _scale(values, ids):
+    """Picks the rooms of ids and scales them by normalize_const,
+    truncating to integers as int() does."""
+    return (np.asarray(values, dtype=float)[ids] * normalize_const).astype(int).tolist()
+
+def _rooms(nodes, ids, room_x, room_y, room_width, room_height):
+    """Builds the room dictionaries of one floorplan."""
+    xs, ys = _scale(room_x, ids), _scale(room_y, ids)
+    widths, heights = _scale(room_width, ids), _scale(room_height, ids)
+    return [{"id": node["id"]
+             ,"label": node["id"]
+             ,"color": node["color"]
+             ,"topLeft": [x, y]
+             ,"width": width
+             ,"height": height}
+            for node, x, y, width, height in zip(nodes, xs, ys, widths, heights)]
+
+def _duals(graph, command):
+    """Runs a GPLAN command and yields the (room_x, room_y, room_width,
+    room_height) lists of each floorplan. multiple_dual computes every
+    floorplan before returning, so the first one is only yielded once
+    all of them are known."""
+    if(command == 'single'):
+        with instrument.span("Dual_to_RFP_api.single_dual"):
+            graph.single_dual()
+        yield graph.room_x, graph.room_y, graph.room_width, graph.room_height
+    elif(command == 'multiple'):
+        with instrument.span("Dual_to_RFP_api.multiple_dual"):
+            graph.multiple_dual()
+        for idx in range(graph.fpcnt):
+            yield (graph.room_x[idx], graph.room_y[idx]
+                , graph.room_width[idx], graph.room_height[idx])
+
+def iter_floorplans(input_data, cache=None):
+    """Generates the rfps for given graph data one at a time
+
+    Only the floorplan being yielded is held as room dictionaries, so
+    memory stays flat however many floorplans the command produces.
+    The dual computation itself is not streamed: for the multiple
+    command, GPLAN finishes every floorplan before the first one is
+    yielded.
+
+    With a cache, room geometry is stored under the structure of the
+    graph and the coordinates of its vertices, so a request on an
+    isomorphic graph with the same coordinates (other ids, colours or
+    labels) skips the dual computation.
+
+    Args:
+        input_data: A dictionary containing keys:
+            nodes: Node data of the graph.
+            edges: Edge data of the graph.
+            command: GPLAN command to try (single and multiple support right now)
+        cache: Optional cache.ResultCache.
+
+    Yields:
+        output_fp: A floorplan, as a list of dictionary where each dictionary denotes a room.
+    """
+    nodes = input_data['nodes']
+    edgedata = tuple((edge['source'], edge['target']) for edge in input_data['edges'])
+    ids = np.array([node["id"] for node in nodes], dtype=int)
+    node_coordinates = tuple((node['x'], node['y']) for node in nodes)
+    if cache is not None:
+        # the duals are built from the coordinates as well as the edges
+        key, labelling = structure_key(edgedata, ids.tolist()
+            , tag="rfp:%s" % input_data['command']
+            , attributes=dict(zip(ids.tolist(), node_coordinates)))
+        labels = np.array([labelling[node_id] for node_id in ids.tolist()], dtype=int)
+        cached = cache.get(key)
+        if cached is not None:
+            instrument.count("dual.cache_hits")
+            for rooms in cached:
+                yield _rooms(nodes, labels, *rooms)
+            return
+        stored = []
+    graph = _input_graph(edgedata, node_coordinates)
+    for rooms in _duals(graph, input_data['command']):
+        instrument.count("dual.floorplans")
+        yield _rooms(nodes, ids, *rooms)
+        if cache is not None:
+            # room geometry in canonical label order
+            canonical = np.empty((4, len(ids)))
+            canonical[:, labels] = np.asarray(rooms, dtype=float)[:, ids]
+            stored.append(canonical)
+    if cache is not None:
+        cache.put(key, stored)
+
+def graph_to_rfp(input_data, cache=None):
     """Generates a rfp for given graph data
 
     Args:
@@ -18,47 +122,26 @@ def graph_to_rfp(input_data):
             nodes: Node data of the graph.
             edges: Edge data of the graph.
             command: GPLAN command to try (single and multiple support right now)
+        cache: Optional cache.ResultCache.
 
     Returns:
         output_data: A list containing multiple or single floorplan.
             Each floorplan is a list of dictionary where each dictionary denotes a room.
     """
-    nodecnt = len(input_data['nodes'])
-    edgecnt = len(input_data['edges'])
-    edgedata = []
-    for edge in input_data['edges']:
-        edgedata.append([edge['source'],edge['target']])
-    node_coordinates = []
-    for node in input_data['nodes']:
-        node_coordinates.append([node['x'],node['y']])
-    graph = inputgraph.InputGraph(nodecnt, edgecnt, edgedata, node_coordinates)
-    output_data  = []
-    if(input_data['command'] == 'single'):
-        graph.single_dual()
-        output_fp = []
-        for node in input_data['nodes']:
-            output_fp.append({"id": node["id"]
-                                ,"label": node["id"]
-                                ,"color": node["color"]
-                                ,"topLeft": [int(graph.room_x[node["id"]] *normalize_const), int(graph.room_y[node["id"]] *normalize_const)]
-                                ,"width": int(graph.room_width[node["id"]] *normalize_const)
-                                ,"height": int(graph.room_height[node["id"]] *normalize_const)})
-        output_data.append(output_fp)
-    elif(input_data['command'] == 'multiple'):
-        graph.multiple_dual()
-        for idx in range(graph.fpcnt):
-            output_fp = []
-            for node in input_data['nodes']:
-                output_fp.append({"id": node["id"]
-                                    ,"label": node["id"]
-                                    ,"color": node["color"]
-                                    ,"topLeft": [int(graph.room_x[idx][node["id"]] *normalize_const), int(graph.room_y[idx][node["id"]] *normalize_const)]
-                                    ,"width": int(graph.room_width[idx][node["id"]] *normalize_const)
-                                    ,"height": int(graph.room_height[idx][node["id"]] *normalize_const)})
-            output_data.append(output_fp)
-    return output_data
-    
+    return list(iter_floorplans(input_data, cache))
+
+def graph_to_ndjson(input_data, cache=None):
+    """Streams the rfps for given graph data as NDJSON
 
+    Args:
+        input_data: See iter_floorplans.
+        cache: Optional cache.ResultCache.
+
+    Yields:
+        line: One floorplan encoded as a JSON line, newline included.
+    """
+    for output_fp in iter_floorplans(input_data, cache):
+        yield json.dumps(output_fp) + "\n"
 
 
 if __name__ == "__main__":
@@ -73,7 +156,7 @@ if __name__ == "__main__":
             {"source": 2, "target": 0}],
         "command": "single"
     }
-    dual_to_rfp(input_data)
+    print(graph_to_rfp(input_data))
 
     input_data = {
         "nodes": [
@@ -86,4 +169,4 @@ if __name__ == "__main__":
             {"source": 2, "target": 0}],
         "command": "multiple"
     }
-    dual_to_rfp(input_data)
\ No newline at end of file
+    print(graph_to_rfp(input_data))
\ No newline at end of file
@@ -3,12 +3,16 @@
 """ Idea is to try generate ALL possible biconnected graphs from given one connected, or non-connected graph.
     Currently trying to get all possible biconnected graphs on given n vertices.
 """
-import numpy as np
-import networkx as nx
 import tkinter as tk
 import matplotlib.pyplot as plt
+import os
 import time
 
+from canonical import IsomorphismFilter
+from enumeration import PlanarBiconChecker, biconnected_planar_graphs
+from library import GraphLibrary, write_library
+from rendering import draw_grid, render_grid
+
 def make_graphs(n=2, i=None, j=None):
     """Make a graph recursively, by either including, or skipping each edge.
 
@@ -63,49 +67,60 @@ def permute(g, n):
 def filter(gs, target_nv):
     """Filter all improper graphs: those with not enough nodes,
 
-    those not fully connected, and those isomorphic to previously considered."""
-    mem = set({})
+    those not fully connected, and those isomorphic to previously considered.
+
+    Isomorphic graphs are detected through their canonical form, so each
+    accepted graph is stored once instead of under all n! relabellings.
+    Consecutive graphs share long edge prefixes, so the biconnected
+    planar test is kept incremental across them."""
+    mem = IsomorphismFilter()
+    checker = PlanarBiconChecker(target_nv)
     gs2 = []
     for g in gs:
         nv = len(set([i for e in g for i in e]))
         if nv != target_nv:
             continue
-        if not is_planar_bicon(g):
+        checker.assign(g)
+        if not checker.check():
             continue
-        if tuple(g) not in mem:
+        if mem.add(g):
             gs2.append(g)
-            mem |= set(permute(g, target_nv))
     return gs2
 
 def is_planar_bicon(g):
-    G = nx.Graph()
-    G.add_edges_from(g)
-    if(nx.is_biconnected(G) and nx.check_planarity(G)):
-        return True
-    else:
-        return False
+    index = {}
+    for e in g:
+        for i in e:
+            index.setdefault(i, len(index))
+    checker = PlanarBiconChecker(len(index))
+    checker.assign([(index[u], index[v]) for u, v in g])
+    return checker.check()
 
 def my_plot(graphs, figsize = 14 , dotsize = 20):
-    num = len(graphs)
-    fig = plt.figure()
-
-    k = int(np.sqrt(num)) #for sub-plotting
-    i = 1                 #for sub-plotting
-    
-    for g in graphs:
-        plt.subplot(k+1,k+1,i+1)
-        gnx = nx.Graph()
-        gnx.add_edges_from(g)
-        nx.draw_kamada_kawai(gnx, node_size = dotsize)
-        print('.', end='')
-        i+=1
-    
-
-def driver():
+    """Plot all graphs in one grid, with cached layouts and a single
+    collection of edges instead of one subplot per graph."""
+    fig = plt.figure(figsize=(figsize, figsize))
+    draw_grid(fig.add_axes((0, 0, 1, 1)), graphs, dotsize=dotsize)
+    return fig
+
+def driver(library=None, outfile=None):
+    """Plots the biconnected planar graphs on NV vertices. If a library
+    file is given, the graphs are read from it when it exists and
+    written to it otherwise. If an outfile pattern with a {page} field
+    is given, the plots are written there instead of shown."""
     start_time = time.time()
     NV = 5
-    gs = make_graphs(NV)
-    gs = filter(gs, NV)
+    if library is not None and os.path.exists(library):
+        with GraphLibrary(library) as lib:
+            gs = [edges for _, edges in lib.graphs(NV)]
+    else:
+        gs = list(biconnected_planar_graphs(NV))
+        if library is not None:
+            write_library(library, [(NV, g) for g in gs])
+    if outfile is not None:
+        render_grid(gs, outfile)
+        print(time.time()-start_time)
+        return
     my_plot(gs)
     print(time.time()-start_time)
     plt.show()
@@ -9,9 +9,11 @@ This module contains the following functions:
 
 """
 
-import numpy as np
 import networkx as nx
 
+import instrument
+
+@instrument.timed
 def is_Planar(nxgraph):
     """returns a boolean representing whether the graph
      is Planar or not.
@@ -22,15 +24,545 @@ def is_Planar(nxgraph):
     Returns:
         boolean: indicating TRUE if Planar, FALSE otherwise.
     """
-    return nx.check_planarity(nxgraph)
+    return nx.check_planarity(nxgraph)[0]
+
+class _Faces:
+    """Faces of a planar embedding, indexed by the vertices on them, so
+    that an edge between two vertices of a common face can be inserted
+    without a planarity test.
+
+    Each half-edge is mapped to the face on its left. Inserting a chord
+    splits a face in two; the two new faces are walked in lockstep and
+    only the smaller one is relabelled, so the splits cost O(m log m)
+    over any sequence of insertions.
+
+    A face is rigid when no cut vertex and no separation pair of the
+    graph lies on it: it then bounds a face in every embedding of the
+    graph, not only in this one. When all faces around a vertex are
+    rigid, they are its faces in every embedding, so an edge to a vertex
+    on none of them cannot be added planarly.
+    """
+
+    def __init__(self, embedding):
+        self.embedding = embedding
+        self.face_of = {}
+        self.vertex_faces = {v: {} for v in embedding}
+        self._start = {}
+        self._rigid = {}
+        for v, w in embedding.edges():
+            if (v, w) not in self.face_of:
+                face_id = len(self._start)
+                self._start[face_id] = (v, w)
+                for half_edge in self._walk(v, w):
+                    self._assign(half_edge, face_id)
+
+    def _walk(self, v, w):
+        """Yields the half-edges of the face left of (v, w)."""
+        start = (v, w)
+        while True:
+            yield v, w
+            v, w = self.embedding.next_face_half_edge(v, w)
+            if (v, w) == start:
+                return
+
+    def _assign(self, half_edge, face_id):
+        """Labels a half-edge, counting its tail as a corner of the face."""
+        old = self.face_of.get(half_edge)
+        count = self.vertex_faces[half_edge[0]]
+        if old is not None:
+            count[old] -= 1
+            if not count[old]:
+                del count[old]
+        self.face_of[half_edge] = face_id
+        count[face_id] = count.get(face_id, 0) + 1
+
+    def _corner(self, v, face_id):
+        """Finds the vertex before v on a walk of the face."""
+        for w in self.embedding.neighbors_cw_order(v):
+            if self.face_of[(v, w)] == face_id:
+                return self.embedding[v][w]["cw"]
+
+    def common_face(self, u, v):
+        """Finds a face with both u and v on it, None if there is none."""
+        small, large = sorted((self.vertex_faces[u], self.vertex_faces[v]), key=len)
+        return next((f for f in small if f in large), None)
+
+    def insert(self, u, v):
+        """Inserts the edge (u, v) if u and v share a face.
+
+        Returns:
+            boolean: TRUE if the edge was inserted, FALSE otherwise.
+        """
+        face_id = self.common_face(u, v)
+        if face_id is None:
+            return False
+        before_u, before_v = self._corner(u, face_id), self._corner(v, face_id)
+        self.embedding.add_half_edge_ccw(u, v, before_u)
+        self.embedding.add_half_edge_ccw(v, u, before_v)
+        # walk both new faces until the shorter one closes
+        walks = [self._walk(u, v), self._walk(v, u)]
+        seen = [[], []]
+        smaller = None
+        while smaller is None:
+            for side in (0, 1):
+                half_edge = next(walks[side], None)
+                if half_edge is None:
+                    smaller = side
+                    break
+                seen[side].append(half_edge)
+        new_id = len(self._start)
+        self._start[new_id] = seen[smaller][0]
+        self._start[face_id] = seen[1 - smaller][0]
+        for half_edge in seen[smaller]:
+            self._assign(half_edge, new_id)
+        for half_edge in ((u, v), (v, u)):
+            if half_edge not in self.face_of:
+                self._assign(half_edge, face_id)
+        self._rigid.clear()
+        return True
+
+    def _is_cut_vertex(self, v):
+        # a vertex met twice on a face walk separates the graph
+        return len(self.vertex_faces[v]) < len(self.embedding[v])
+
+    def is_rigid(self, face_id):
+        """Checks that no cut vertex and no separation pair lies on a
+        face. Two vertices of a biconnected plane graph form a
+        separation pair exactly when they share two faces without being
+        the ends of an edge between those two faces."""
+        rigid = self._rigid.get(face_id)
+        if rigid is None:
+            rigid = self._rigid[face_id] = self._check_rigid(face_id)
+        return rigid
 
-def make_Planar(nxgraph):
+    def _check_rigid(self, face_id):
+        on_face = [v for v, _ in self._walk(*self._start[face_id])]
+        if any(self._is_cut_vertex(v) for v in on_face):
+            return False
+        shared = {}
+        for v in on_face:
+            for other in self.vertex_faces[v]:
+                if other != face_id:
+                    shared.setdefault(other, []).append(v)
+        for other, common in shared.items():
+            if len(common) > 2:
+                return False
+            if len(common) == 2:
+                a, b = common
+                if b not in self.embedding[a] or {self.face_of[(a, b)]
+                        , self.face_of[(b, a)]} != {face_id, other}:
+                    return False
+        return True
+
+class _Core:
+    """Series-parallel reduction of a biconnected planar block.
+
+    Vertices of degree two are suppressed and parallel edges merged
+    while possible. A block reducing to a single edge is series-
+    parallel, and stays planar with any one edge added. Otherwise the
+    rest is the core of the block: every core edge stands for the two-
+    terminal series-parallel piece it replaced, and every other vertex
+    of the block lies inside one piece.
+
+    A vertex inside a piece can be brought onto either side of it, so
+    the block plus an edge (x, y) is planar exactly when the core, with
+    the edge of each piece holding x or y subdivided by it, is planar
+    plus (x, y). This is decided on one embedding of the core: x and y
+    on a common face, or in a common piece, make it planar; x or y
+    surrounded by rigid faces (see _Faces) without the other makes it
+    non-planar; only the remaining cases run a planarity test, on the
+    core alone.
+
+    Attributes:
+        is_series_parallel: TRUE if the block reduced to an edge.
     """
+
+    def __init__(self, edges):
+        adj = {}
+        for a, b in edges:
+            adj.setdefault(a, set()).add(b)
+            adj.setdefault(b, set()).add(a)
+        # union-find over pieces, and the piece of each reduced edge
+        pieces = list(range(len(edges)))
+        piece_of = {frozenset(e): i for i, e in enumerate(edges)}
+        owner = {}
+
+        def find(i):
+            while pieces[i] != i:
+                pieces[i] = pieces[pieces[i]]
+                i = pieces[i]
+            return i
+
+        stack = [v for v in adj if len(adj[v]) == 2]
+        while stack and len(adj) > 2:
+            c = stack.pop()
+            if c not in adj or len(adj[c]) != 2:
+                continue
+            a, b = adj.pop(c)
+            adj[a].discard(c)
+            adj[b].discard(c)
+            piece = find(piece_of.pop(frozenset((a, c))))
+            pieces[find(piece_of.pop(frozenset((c, b))))] = piece
+            owner[c] = piece
+            key = frozenset((a, b))
+            if b in adj[a]:
+                pieces[find(piece_of[key])] = piece
+                piece_of[key] = piece
+                stack.extend(w for w in (a, b) if len(adj[w]) == 2)
+            else:
+                adj[a].add(b)
+                adj[b].add(a)
+                piece_of[key] = piece
+        self.is_series_parallel = len(adj) <= 2
+        if self.is_series_parallel:
+            return
+        self._adj = adj
+        self._edges = {key: tuple(key) for key in piece_of}
+        edge_of = {find(i): e for e, i in zip(self._edges.values(), piece_of.values())}
+        self._edge_of = {c: edge_of[find(piece)] for c, piece in owner.items()}
+        graph = nx.Graph(self._edges.values())
+        instrument.count("graphs.allocated")
+        instrument.count("planarity.tests")
+        self._faces = _Faces(nx.check_planarity(graph)[1])
+
+    def _place(self, x):
+        """Returns the faces x may lie on in the embedding, and whether
+        they are its faces in every embedding."""
+        faces = self._faces
+        if x in self._adj:
+            return faces.vertex_faces[x].keys(), None
+        a, b = self._edge_of[x]
+        return {faces.face_of[(a, b)], faces.face_of[(b, a)]}, (a, b)
+
+    def allows(self, x, y, test=False):
+        """Decides whether the block plus the edge (x, y) is planar.
+
+        Args:
+            x, y: Two vertices of the block.
+            test: Whether to run the planarity test when the embedding
+                  does not decide.
+
+        Returns:
+            boolean: TRUE if planar, FALSE if not, None if undecided
+                     and test is FALSE.
+        """
+        edge_x, edge_y = self._edge_of.get(x), self._edge_of.get(y)
+        # a common piece: x or y is inside it and the other on it
+        if edge_x is not None and (edge_x == edge_y or y in edge_x)\
+                or edge_y is not None and x in edge_y or y in self._adj.get(x, ()):
+            return True
+        faces_x, _ = self._place(x)
+        faces_y, _ = self._place(y)
+        if any(f in faces_y for f in faces_x):
+            return True
+        if all(self._faces.is_rigid(f) for f in faces_x)\
+                or all(self._faces.is_rigid(f) for f in faces_y):
+            return False
+        if not test:
+            return None
+        graph = nx.Graph(self._edges.values())
+        for z, edge in ((x, edge_x), (y, edge_y)):
+            if edge is not None:
+                graph.remove_edge(*edge)
+                graph.add_edges_from(((edge[0], z), (z, edge[1])))
+        graph.add_edge(x, y)
+        instrument.count("graphs.allocated")
+        instrument.count("planarity.tests")
+        return nx.check_planarity(graph)[0]
+
+    def add(self, x, y, inside=()):
+        """Adds a piece between x and y to the core in place, when x and
+        y are core vertices on a common face of its embedding.
+
+        Args:
+            x, y: Two core vertices.
+            inside: Vertices of the piece other than x and y, e.g. the
+                    inner vertices of a path from x to y.
+
+        Returns:
+            boolean: TRUE if the core was updated, FALSE if it must be
+                     rebuilt.
+        """
+        if x not in self._adj or y not in self._adj:
+            return False
+        key = frozenset((x, y))
+        if key not in self._edges:
+            if not self._faces.insert(x, y):
+                return False
+            self._adj[x].add(y)
+            self._adj[y].add(x)
+            self._edges[key] = (x, y)
+        # a parallel piece merges into the one of the edge
+        for c in inside:
+            self._edge_of[c] = self._edges[key]
+        return True
+
+class _Blocks:
+    """Blocks of a growing planar graph, with the core of each.
+
+    The block-cut forest is rooted: every vertex other than a root has
+    a parent block and every block a head, its vertex nearest the root,
+    as in biconnectivity.BlockCutIndex. The graph plus an edge (u, v)
+    is planar exactly when every block on the u-v path of the forest is
+    planar plus the edge between the vertices where the path enters and
+    leaves it. Adding the edge merges those blocks into the largest of
+    them, and the core of a block is only built when a decision needs
+    it.
+    """
+
+    def __init__(self, forest):
+        self._parent_block = {}
+        self._head = []
+        self._nodes = []
+        self._edges = []
+        self._core = []
+        adj = {}
+        for u, v in forest:
+            adj.setdefault(u, []).append(v)
+            adj.setdefault(v, []).append(u)
+        for root in adj:
+            if root in self._parent_block:
+                continue
+            self._parent_block[root] = None
+            stack = [root]
+            while stack:
+                u = stack.pop()
+                for v in adj[u]:
+                    if v not in self._parent_block:
+                        self._parent_block[v] = self._add_block(u, {u, v}, [(u, v)])
+                        stack.append(v)
+
+    def _add_block(self, head, nodes, edges):
+        self._head.append(head)
+        self._nodes.append(nodes)
+        self._edges.append(edges)
+        self._core.append(None)
+        return len(self._head) - 1
+
+    def _core_of(self, block):
+        core = self._core[block]
+        if core is None:
+            core = self._core[block] = _Core(self._edges[block])
+        return core
+
+    def path(self, u, v):
+        """Walks the forest from u and v, a block at a time on
+        alternate sides, until the walks meet.
+
+        Returns:
+            path: A list of (block, x, y) for the blocks on the path,
+                  entered at x and left at y.
+            meet: The vertex nearest the root on the path.
+        """
+        walks = ([u], [v])
+        blocks = ([], [])
+        reached = ({u: 0}, {v: 0})
+        side = 0
+        while True:
+            other = 1 - side
+            top = walks[side][-1]
+            if top in reached[other]:
+                meet = top
+                break
+            # a walk stopped at the root waits for the other one
+            block = self._parent_block[top]
+            if block is not None:
+                top = self._head[block]
+                blocks[side].append(block)
+                walks[side].append(top)
+                reached[side][top] = len(blocks[side])
+            side = other
+        steps = (reached[0][meet], reached[1][meet])
+        path = [(blocks[s][i], walks[s][i], walks[s][i + 1])
+                for s in (0, 1) for i in range(steps[s])]
+        if steps[0] and steps[1] and blocks[0][steps[0] - 1] == blocks[1][steps[1] - 1]:
+            # both walks entered the top block from below
+            path = [(blocks[0][steps[0] - 1], walks[0][steps[0] - 1], walks[1][steps[1] - 1])]\
+                + [p for p in path if p[0] != blocks[0][steps[0] - 1]]
+        return path, meet
+
+    def allows(self, path):
+        """Decides whether adding the edge of a path keeps the graph
+        planar, settling every block on the embeddings before testing."""
+        undecided = []
+        for block, x, y in path:
+            core = self._core_of(block)
+            if not core.is_series_parallel:
+                planar = core.allows(x, y)
+                if planar is False:
+                    return False
+                if planar is None:
+                    undecided.append((core, x, y))
+        return all(core.allows(x, y, test=True) for core, x, y in undecided)
+
+    def add_edge(self, u, v, path, meet):
+        """Adds the edge (u, v), merging the blocks on its path.
+
+        When the other blocks are single edges, they form a path with
+        (u, v) between the vertices where the largest block is entered
+        and left, which is one more piece of its core.
+        """
+        merged = sorted({block for block, _, _ in path}, key=lambda b: len(self._edges[b]))
+        block = merged.pop()
+        core = self._core[block]
+        if core is not None and not core.is_series_parallel\
+                and all(len(self._edges[other]) == 1 for other in merged):
+            x, y = next((x, y) for b, x, y in path if b == block)
+            inside = {w for other in merged for w in self._nodes[other]} - {x, y}
+            if not core.add(x, y, inside):
+                self._core[block] = None
+        else:
+            self._core[block] = None
+        nodes, edges = self._nodes[block], self._edges[block]
+        if self._head[block] != meet:
+            self._parent_block[self._head[block]] = block
+        for other in merged:
+            for x in self._nodes[other]:
+                if x != meet:
+                    self._parent_block[x] = block
+            nodes |= self._nodes[other]
+            edges.extend(self._edges[other])
+            self._nodes[other] = self._edges[other] = self._core[other] = None
+        edges.append((u, v))
+        self._head[block] = meet
+
+def _planar_prefix(edges, candidates, start, size):
+    """Finds how many of candidates[start:] can be added to a planar
+    graph, in order, before it stops being planar.
+
+    Batches of doubling size, starting from size, are tested until one
+    is not planar; the first edge breaking planarity is then found by
+    bisection, so it costs about log(batch) planarity tests.
+
+    Returns:
+        count: Length of the longest planar prefix.
+    """
+    def planar(count):
+        graph = nx.Graph(edges)
+        graph.add_edges_from(candidates[start:start + count])
+        instrument.count("graphs.allocated")
+        instrument.count("planarity.tests")
+        return nx.check_planarity(graph)[0]
+
+    left = len(candidates) - start
+    low, high = 0, None
+    while low < left:
+        count = min(size, left)
+        if not planar(count):
+            high = count
+            break
+        low, size = count, 2 * size
+    if high is None:
+        return low
+    while high - low > 1:
+        middle = (low + high) // 2
+        if planar(middle):
+            low = middle
+        else:
+            high = middle
+    return low
+
+@instrument.timed
+def make_Planar(nxgraph, weight=None):
+    """Finds a maximal planar subgraph, taking edges greedily in order
+    of priority.
+
+    A maximum spanning forest (Kruskal, in priority order) is kept
+    first, since forests are planar, and fixes the components. The
+    remaining edges are then taken in priority order: an edge is kept
+    if and only if it keeps the kept edges planar, so every dropped
+    edge would make the result non-planar.
+
+    An edge whose component already has 3n-6 edges is dropped;
+    otherwise it is decided block by block along its path in the
+    block-cut forest of the kept edges (see _Blocks). Series-parallel
+    blocks always pass, and the others are decided on their series-
+    parallel cores (see _Core), which are a small fraction of the
+    graph. Keeping an edge updates the core and its embedding in place
+    when it joins two core vertices, and rebuilds it otherwise.
+
+    Planarity tests on the whole graph are only run once more than 16
+    edges were kept in a row: the run is then continued in batches of
+    doubling size, and the edge ending it found by bisection (see
+    _planar_prefix).
+
     Args:
         nxgraph: An instance og NetworkX Graph object.
+        weight: Optional edge attribute holding the priority, larger
+                first (missing values count as 1). Edges are taken in
+                the graph's edge order by default.
 
     Returns: 
         planar_graph: A planar graph which is derived from the input graph
+        dropped_edges: A list of the edges left out, in priority order.
     """
-    
+    edges = [(u, v) for u, v in nxgraph.edges() if u != v]
+    loops = [(u, v) for u, v in nxgraph.edges() if u == v]
+    if weight is not None:
+        edges.sort(key=lambda e: -nxgraph.edges[e].get(weight, 1))
+    parent = {v: v for v in nxgraph}
+
+    def find(v):
+        while parent[v] != v:
+            parent[v] = parent[parent[v]]
+            v = parent[v]
+        return v
+
+    kept = []
+    rest = []
+    for u, v in edges:
+        ru, rv = find(u), find(v)
+        if ru != rv:
+            parent[ru] = rv
+            kept.append((u, v))
+        else:
+            rest.append((u, v))
+    size = {}
+    for v in nxgraph:
+        size[find(v)] = size.get(find(v), 0) + 1
+    edgecnt = dict.fromkeys(size, 0)
+    for u, v in kept:
+        edgecnt[find(u)] += 1
+
+    blocks = _Blocks(kept)
+    dropped = []
+
+    def keep(u, v, path, meet):
+        blocks.add_edge(u, v, path, meet)
+        kept.append((u, v))
+        edgecnt[find(u)] += 1
+
+    # edges kept in a row
+    streak = 0
+    i = 0
+    while i < len(rest):
+        u, v = rest[i]
+        i += 1
+        root = find(u)
+        if size[root] >= 3 and edgecnt[root] >= 3 * size[root] - 6:
+            dropped.append((u, v))
+            streak = 0
+            continue
+        path, meet = blocks.path(u, v)
+        if not blocks.allows(path):
+            dropped.append((u, v))
+            streak = 0
+            continue
+        keep(u, v, path, meet)
+        streak += 1
+        if streak > 16:
+            count = _planar_prefix(kept, rest, i, streak)
+            for u, v in rest[i:i + count]:
+                keep(u, v, *blocks.path(u, v))
+            i += count
+            if i < len(rest):
+                # the edge ending the run breaks planarity
+                dropped.append(rest[i])
+                i += 1
+                streak = 0
 
+    planar_graph = nx.Graph()
+    planar_graph.add_nodes_from(nxgraph.nodes(data=True))
+    planar_graph.add_edges_from((u, v, nxgraph.edges[u, v]) for u, v in kept + loops)
+    instrument.count("make_planar.edges_dropped", len(dropped))
+    return planar_graph, dropped
@@ -0,0 +1,481 @@
+"""Benchmark Module
+
+This module times the stages of the project against graph size on
+synthetic graph families, and compares the results with a stored
+baseline to catch regressions.
+
+Every family is generated from a seed, so a run is reproducible. For
+each stage and family the sizes are run in increasing order, and a
+size is skipped once the last two predict it to take longer than the
+time budget. Each size reports the best wall time of a few runs, the
+peak memory of one more run under tracemalloc, and each stage and
+family gets a scaling exponent, the slope of log(time) against log(n).
+
+Some sizes also have a fixed time limit (LIMITS), checked on every
+run, for cases that used to take minutes. Every run also checks that
+planar_biconnect adds exactly max(ceil(L/2), d-1) edges to trees, L
+their number of leaves and d their largest degree, the least possible.
+
+Usage:
+
+    python benchmark.py [--sizes 100 1000 ...] [--families grid ...]
+        [--stages biconnect ...] [--save baseline.json]
+        [--compare baseline.json] [--tolerance 1.5] [--min-seconds 0.01]
+
+The exit status is 1 if a regression against the baseline is found,
+a time limit is exceeded, or the tree check fails.
+
+This module contains the following functions:
+
+    * grid, triangulation, tree, cactus, wheel, near_chordal,
+        dense_random - seeded generators of graph families.
+    * run_benchmarks - runs the stages over the families and sizes.
+    * scaling_exponents - fits the scaling exponents of a run.
+    * check_limits - lists the results over their time limit.
+    * check_tree_bound - lists the trees planar_biconnect overshoots.
+    * save_baseline - writes results as a JSON baseline.
+    * load_baseline - reads a JSON baseline.
+    * compare - lists the regressions of results against a baseline.
+    * main - runs the benchmarks from the command line.
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+import networkx as nx
+import numpy as np
+
+import biconnectivity as bcn
+import Planarity
+import triangularity as trng
+
+SIZES = (10**2, 10**3, 10**4, 10**5, 10**6)
+
+def grid(nodecnt, seed=0):
+    """Square grid of about nodecnt vertices.
+
+    Returns:
+        edges: An (m, 2) integer array.
+        positions: An (n, 2) array of vertex coordinates.
+    """
+    side = max(2, int(round(np.sqrt(nodecnt))))
+    ids = np.arange(side * side).reshape(side, side)
+    edges = np.concatenate((np.column_stack((ids[:, :-1].ravel(), ids[:, 1:].ravel()))
+                            , np.column_stack((ids[:-1, :].ravel(), ids[1:, :].ravel()))))
+    rows, cols = np.divmod(np.arange(side * side), side)
+    return edges, np.column_stack((cols, rows)).astype(float)
+
+def triangulation(nodecnt, seed=0):
+    """Delaunay-style triangulation of about nodecnt jittered grid
+    points: each cell is split along its shorter diagonal.
+
+    Returns:
+        edges: An (m, 2) integer array.
+        positions: An (n, 2) array of vertex coordinates.
+    """
+    rng = np.random.default_rng(seed)
+    edges, positions = grid(nodecnt)
+    side = int(round(np.sqrt(len(positions))))
+    positions = positions + rng.uniform(-0.3, 0.3, positions.shape)
+    ids = np.arange(side * side).reshape(side, side)
+    a, b = ids[:-1, :-1].ravel(), ids[:-1, 1:].ravel()
+    c, d = ids[1:, :-1].ravel(), ids[1:, 1:].ravel()
+    main = np.linalg.norm(positions[a] - positions[d], axis=1)
+    anti = np.linalg.norm(positions[b] - positions[c], axis=1)
+    diagonals = np.where((main <= anti)[:, None]
+                         , np.column_stack((a, d)), np.column_stack((b, c)))
+    return np.concatenate((edges, diagonals)), positions
+
+def tree(nodecnt, seed=0):
+    """Random recursive tree: vertex i hangs from a uniform earlier one.
+
+    Returns:
+        edges: An (m, 2) integer array.
+        positions: An (n, 2) array of vertex coordinates.
+    """
+    rng = np.random.default_rng(seed)
+    children = np.arange(1, nodecnt)
+    parents = (rng.random(nodecnt - 1) * children).astype(int)
+    return np.column_stack((parents, children)), rng.random((nodecnt, 2))
+
+def cactus(nodecnt, seed=0):
+    """Cactus of cycles of 3 to 8 vertices, each glued at one vertex
+    to the cycles before it.
+
+    Returns:
+        edges: An (m, 2) integer array.
+        positions: An (n, 2) array of vertex coordinates.
+    """
+    rng = np.random.default_rng(seed)
+    lengths = rng.integers(3, 9, size=max(1, nodecnt // 2))
+    # each cycle brings length - 1 new vertices
+    ends = 1 + np.cumsum(lengths - 1)
+    lengths = lengths[:max(1, np.searchsorted(ends, nodecnt, side="right"))]
+    ends = ends[:len(lengths)]
+    starts = ends - (lengths - 1)
+    anchors = (rng.random(len(lengths)) * starts).astype(int)
+    cycle = np.repeat(np.arange(len(lengths)), lengths)
+    # position of each edge within its cycle
+    step = np.arange(len(cycle)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    tails = np.where(step == 0, anchors[cycle], starts[cycle] + step - 1)
+    heads = np.where(step == lengths[cycle] - 1, anchors[cycle], starts[cycle] + step)
+    return np.column_stack((tails, heads)), rng.random((int(ends[-1]), 2))
+
+def wheel(nodecnt, seed=0):
+    """Wheel: a hub joined to every vertex of a cycle.
+
+    Returns:
+        edges: An (m, 2) integer array.
+        positions: An (n, 2) array of vertex coordinates.
+    """
+    rim = np.arange(1, max(4, nodecnt))
+    edges = np.concatenate((np.column_stack((np.zeros_like(rim), rim))
+                            , np.column_stack((rim, np.roll(rim, -1)))))
+    angles = 2 * np.pi * rim / len(rim)
+    positions = np.vstack(([0.0, 0.0], np.column_stack((np.cos(angles), np.sin(angles)))))
+    return edges, positions
+
+def near_chordal(nodecnt, seed=0, defects=0.01):
+    """Random 2-tree (planar and chordal) with a fraction of its edges
+    removed, leaving a few chordless cycles.
+
+    Returns:
+        edges: An (m, 2) integer array.
+        positions: An (n, 2) array of vertex coordinates.
+    """
+    rng = np.random.default_rng(seed)
+    nodecnt = max(3, nodecnt)
+    tails = [0]
+    heads = [1]
+    # vertex i is joined to both ends of a uniform earlier edge
+    picks = (rng.random(nodecnt) * np.maximum(1, 2 * np.arange(nodecnt) - 3)).astype(int)
+    for i in range(2, nodecnt):
+        u, v = tails[picks[i]], heads[picks[i]]
+        tails += (u, v)
+        heads += (i, i)
+    edges = np.column_stack((tails, heads))
+    keep = rng.random(len(edges)) >= defects
+    return edges[keep], rng.random((nodecnt, 2))
+
+def dense_random(nodecnt, seed=0, degree=20):
+    """Uniform random graph with degree * nodecnt / 2 edges, far from
+    planar for the default degree.
+
+    Returns:
+        edges: An (m, 2) integer array.
+        positions: An (n, 2) array of vertex coordinates.
+    """
+    rng = np.random.default_rng(seed)
+    nodecnt = max(2, nodecnt)
+    edgecnt = min(degree * nodecnt // 2, nodecnt * (nodecnt - 1) // 2)
+    edges = np.empty((0, 2), dtype=int)
+    while len(edges) < edgecnt:
+        pairs = np.sort(rng.integers(0, nodecnt, size=(2 * edgecnt, 2)), axis=1)
+        pairs = pairs[pairs[:, 0] != pairs[:, 1]]
+        edges = np.unique(np.concatenate((edges, pairs)), axis=0)
+    # np.unique sorted them; shuffle the edge order back
+    edges = edges[rng.permutation(len(edges))[:edgecnt]]
+    return edges, rng.random((nodecnt, 2))
+
+FAMILIES = {"grid": grid, "triangulation": triangulation, "tree": tree
+    , "cactus": cactus, "wheel": wheel, "near_chordal": near_chordal
+    , "dense_random": dense_random}
+
+def _nxgraph(edges, positions):
+    nxgraph = nx.Graph()
+    nxgraph.add_nodes_from(range(len(positions)))
+    nxgraph.add_edges_from(edges.tolist())
+    return nxgraph
+
+def _rfp_input(edges, positions):
+    nodes = [{"id": i, "x": x, "y": y, "color": "#ffffff", "label": str(i)}
+             for i, (x, y) in enumerate(positions.tolist())]
+    return {"nodes": nodes
+        , "edges": [{"source": u, "target": v} for u, v in edges.tolist()]
+        , "command": "single"}
+
+def _graph_to_rfp(input_data):
+    # imported here: the dual needs GPLAN, which may not be installed
+    import Dual_to_RFP_api
+    return Dual_to_RFP_api.graph_to_rfp(input_data)
+
+# stage -> (input builder, timed call)
+STAGES = {"make_chordal": (_nxgraph, trng.make_chordal)
+    , "chk_chordality": (_nxgraph, trng.chk_chordality)
+    , "biconnect": (_nxgraph, bcn.biconnect)
+    , "edge_Biconnect": (_nxgraph, bcn.edge_Biconnect)
+    , "check_planarity": (_nxgraph, nx.check_planarity)
+    , "make_Planar": (_nxgraph, Planarity.make_Planar)
+    , "graph_to_rfp": (_rfp_input, _graph_to_rfp)}
+
+# (stage, family, nodecnt) -> seconds a run may take on any machine
+LIMITS = {("make_Planar", "dense_random", 1000): 20.0}
+
+def _predict(timed, nodecnt):
+    """Extrapolates the seconds a size will take from the last two
+    timed (nodecnt, seconds) pairs, assuming at least linear growth."""
+    if not timed:
+        return 0.0
+    last_n, last_s = timed[-1]
+    exponent = 1.0
+    if len(timed) > 1:
+        prev_n, prev_s = timed[-2]
+        if prev_s > 0 and last_n > prev_n:
+            exponent = max(1.0, np.log(last_s / prev_s) / np.log(last_n / prev_n))
+    return last_s * (nodecnt / last_n) ** exponent
+
+def _measure(call, arg, repeat, budget, memory):
+    """Times call(arg), best of up to repeat runs within the budget,
+    then measures its peak memory in one more run unless that run
+    would exceed the budget."""
+    best = None
+    spent = 0.0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        call(arg)
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+        spent += seconds
+        if spent > budget:
+            break
+    peak = None
+    if memory and best <= budget:
+        tracemalloc.start()
+        try:
+            call(arg)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return best, peak
+
+def run_benchmarks(sizes=SIZES, families=None, stages=None, seed=0
+        , repeat=3, budget=30.0, memory=True, log=None):
+    """Runs the stages over the families and sizes.
+
+    Args:
+        sizes: Approximate vertex counts, run in increasing order.
+        families: Names of families from FAMILIES, all by default.
+        stages: Names of stages from STAGES, all by default.
+        seed: Seed of the generators.
+        repeat: Number of timed runs per size; the best is kept.
+        budget: Seconds a run may take; sizes predicted to take
+                longer are skipped.
+        memory: Whether to measure peak memory with tracemalloc.
+        log: Optional callable receiving each result as it is made.
+
+    Returns:
+        results: A list of dictionaries with keys stage, family,
+            nodecnt, edgecnt, seconds, peak_bytes and error. A stage
+            that raised, is unavailable or was skipped has seconds None
+            and the reason in error, and is not run on larger sizes.
+    """
+    families = list(families or FAMILIES)
+    stages = list(stages or STAGES)
+    results = []
+    for family in families:
+        active = list(stages)
+        timed = {stage: [] for stage in stages}
+        for size in sorted(sizes):
+            if not active:
+                break
+            edges, positions = FAMILIES[family](size, seed)
+            for stage in list(active):
+                result = {"stage": stage, "family": family, "nodecnt": len(positions)
+                    , "edgecnt": len(edges), "seconds": None, "peak_bytes": None
+                    , "error": None}
+                build, call = STAGES[stage]
+                predicted = _predict(timed[stage], len(positions))
+                try:
+                    if predicted > budget:
+                        result["error"] = "skipped: about %.0fs predicted" % predicted
+                    else:
+                        seconds, peak = _measure(call, build(edges, positions)
+                            , repeat, budget, memory)
+                        result["seconds"], result["peak_bytes"] = seconds, peak
+                        timed[stage].append((len(positions), seconds))
+                except ImportError as err:
+                    result["error"] = "unavailable: %s" % err
+                except Exception as err:
+                    result["error"] = "%s: %s" % (type(err).__name__, err)
+                if result["seconds"] is None or result["seconds"] > budget:
+                    active.remove(stage)
+                results.append(result)
+                if log is not None:
+                    log(result)
+    return results
+
+def scaling_exponents(results):
+    """Fits time ~ n^k for every stage and family with two or more
+    timed sizes.
+
+    Returns:
+        exponents: A dictionary mapping "stage/family" to k.
+    """
+    points = {}
+    for result in results:
+        if result["seconds"] and result["nodecnt"] > 1:
+            points.setdefault("%s/%s" % (result["stage"], result["family"]), []).append(
+                (np.log(result["nodecnt"]), np.log(result["seconds"])))
+    exponents = {}
+    for key, xy in points.items():
+        if len({x for x, _ in xy}) > 1:
+            x, y = np.array(xy).T
+            exponents[key] = float(np.polyfit(x, y, 1)[0])
+    return exponents
+
+def check_limits(results, limits=LIMITS):
+    """Lists the results slower than their time limit, or failing.
+
+    Args:
+        results: A list returned by run_benchmarks.
+        limits: A dictionary mapping (stage, family, nodecnt) to
+                seconds; results without a limit are not checked.
+
+    Returns:
+        violations: The results over their limit.
+    """
+    violations = []
+    for result in results:
+        limit = limits.get((result["stage"], result["family"], result["nodecnt"]))
+        if limit is not None and (result["seconds"] is None or result["seconds"] > limit):
+            violations.append(result)
+    return violations
+
+def check_tree_bound(sizes=(10, 100, 1000), seeds=range(5)):
+    """Lists the trees planar_biconnect adds more edges to than
+    bcn.augmentation_bound, among random trees, the same trees with their
+    vertices inserted in shuffled order, and a few balanced ones.
+
+    Returns:
+        violations: (name, edges added, bound) tuples.
+    """
+    trees = [("balanced_tree(%d,%d)" % shape, nx.balanced_tree(*shape))
+             for shape in ((2, 3), (2, 6), (3, 4))]
+    trees.append(("star_graph(3)", nx.star_graph(3)))
+    for size in sizes:
+        for seed in seeds:
+            nxgraph = _nxgraph(*tree(size, seed))
+            trees.append(("tree(%d, %d)" % (size, seed), nxgraph))
+            # the same tree with its vertices inserted in shuffled order
+            order = np.random.default_rng(seed).permutation(size).tolist()
+            shuffled = nx.Graph()
+            shuffled.add_nodes_from(order)
+            shuffled.add_edges_from(nxgraph.edges())
+            trees.append(("shuffled tree(%d, %d)" % (size, seed), shuffled))
+    violations = []
+    for name, nxgraph in trees:
+        added = len(bcn.planar_biconnect(nxgraph))
+        bound = bcn.augmentation_bound(nxgraph)
+        if added != bound:
+            violations.append((name, added, bound))
+    return violations
+
+def save_baseline(results, path):
+    """Writes results and their scaling exponents as a JSON baseline."""
+    baseline = {"meta": {"created": time.strftime("%Y-%m-%dT%H:%M:%S")
+                         , "python": platform.python_version()
+                         , "platform": platform.platform()
+                         , "numpy": np.__version__, "networkx": nx.__version__}
+        , "results": results, "exponents": scaling_exponents(results)}
+    with open(path, "w") as outfile:
+        json.dump(baseline, outfile, indent=1)
+
+def load_baseline(path):
+    """Reads a JSON baseline written by save_baseline."""
+    with open(path) as infile:
+        return json.load(infile)
+
+def compare(results, baseline, tolerance=1.5, min_seconds=0.01
+        , memory_tolerance=1.5):
+    """Lists the regressions of results against a baseline.
+
+    A size regresses when it is more than tolerance times slower than
+    in the baseline, and slower by at least min_seconds, or when its
+    peak memory grew more than memory_tolerance times. A stage that
+    ran in the baseline but fails now regresses too.
+
+    Args:
+        results: A list returned by run_benchmarks.
+        baseline: A dictionary returned by load_baseline.
+
+    Returns:
+        regressions: A list of dictionaries with keys stage, family,
+            nodecnt, metric, baseline and current.
+    """
+    old = {(r["stage"], r["family"], r["nodecnt"]): r for r in baseline["results"]}
+    regressions = []
+    for result in results:
+        before = old.get((result["stage"], result["family"], result["nodecnt"]))
+        if before is None or before["seconds"] is None:
+            continue
+        report = {"stage": result["stage"], "family": result["family"]
+            , "nodecnt": result["nodecnt"]}
+        if result["seconds"] is None:
+            regressions.append(dict(report, metric="error"
+                , baseline=None, current=result["error"]))
+            continue
+        if (result["seconds"] > tolerance * before["seconds"]
+                and result["seconds"] - before["seconds"] >= min_seconds):
+            regressions.append(dict(report, metric="seconds"
+                , baseline=before["seconds"], current=result["seconds"]))
+        if (result["peak_bytes"] is not None and before["peak_bytes"]
+                and result["peak_bytes"] > memory_tolerance * before["peak_bytes"]):
+            regressions.append(dict(report, metric="peak_bytes"
+                , baseline=before["peak_bytes"], current=result["peak_bytes"]))
+    return regressions
+
+def _print_result(result):
+    if result["seconds"] is None:
+        status = result["error"]
+    else:
+        status = "%10.4fs" % result["seconds"]
+        if result["peak_bytes"] is not None:
+            status += " %9.1f MB" % (result["peak_bytes"] / 2**20)
+    print("%-16s %-14s n=%-8d m=%-8d %s" % (result["stage"], result["family"]
+        , result["nodecnt"], result["edgecnt"], status), flush=True)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks the pipeline stages.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES))
+    parser.add_argument("--families", nargs="+", choices=sorted(FAMILIES))
+    parser.add_argument("--stages", nargs="+", choices=sorted(STAGES))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--budget", type=float, default=30.0)
+    parser.add_argument("--no-memory", action="store_true")
+    parser.add_argument("--save", help="write the results as a baseline")
+    parser.add_argument("--compare", help="baseline to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=1.5)
+    parser.add_argument("--min-seconds", type=float, default=0.01
+        , help="ignore slowdowns smaller than this")
+    args = parser.parse_args(argv)
+    results = run_benchmarks(args.sizes, args.families, args.stages, args.seed
+        , args.repeat, args.budget, not args.no_memory, log=_print_result)
+    for key, exponent in sorted(scaling_exponents(results).items()):
+        print("%-32s n^%.2f" % (key, exponent))
+    status = 0
+    for r in check_limits(results):
+        print("OVER LIMIT %s %s n=%d: %s (limit %.0fs)" % (r["stage"], r["family"]
+            , r["nodecnt"], r["error"] or "%.2fs" % r["seconds"]
+            , LIMITS[(r["stage"], r["family"], r["nodecnt"])]))
+        status = 1
+    for name, added, bound in check_tree_bound():
+        print("OVER BOUND planar_biconnect %s: %d edges (bound %d)" % (name, added, bound))
+        status = 1
+    if args.save:
+        save_baseline(results, args.save)
+    if args.compare:
+        regressions = compare(results, load_baseline(args.compare), args.tolerance
+            , args.min_seconds)
+        for r in regressions:
+            print("REGRESSION %s %s n=%d %s: %s -> %s" % (r["stage"], r["family"]
+                , r["nodecnt"], r["metric"], r["baseline"], r["current"]))
+        if regressions:
+            status = 1
+    return status
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,17 +3,377 @@
 This module allows user to check if the graph is biconnected and can
 make it biconnected.
 
-This module contains the following functions:
+This module contains the following classes and functions:
 
+    * BlockCutIndex - block-cut tree index of a graph answering
+        same-block queries in constant time.
+    * IncrementalBlockCut - block-cut structure kept up to date as
+        edges are added.
     * is_biconnected - returns a boolean representing whether the graph
         is biconnected or not.
+    * get_Bridge_Components - finds bridges and 2-edge-connected
+        components with a single DFS.
+    * edge_Biconnect - returns edges to be added to make the graph
+        2-edge-connected.
+    * augmentation_bound - returns the least number of edges that can
+        make a connected graph biconnected.
+    * planar_biconnect - returns edges that make a planar graph
+        biconnected while keeping it planar.
     * biconnect - checks if a graph needs to be biconnected 
         and returns edges to be added to make it biconnected
 """
-from os import remove
+import heapq
 import numpy as np
 import networkx as nx
 
+import instrument
+from csr import CSRGraph, adjacency_rows
+
+
+class BlockCutIndex:
+    """Block-cut tree index of a graph.
+
+    The index is built with a single Hopcroft-Tarjan DFS. Blocks and
+    cut vertices are listed in the same order as NetworkX reports them.
+    Every vertex other than the DFS root of its component has a parent
+    block, the one holding the tree edge into it, and every block has a
+    head, the vertex closest to the root. Two vertices share a block
+    exactly when they have the same parent block or one of them is the
+    head of the other's parent block, which makes same_block O(1). The
+    graph may be a NetworkX graph or a CSRGraph.
+
+    Attributes:
+        blocks: A list of sets, the biconnected components.
+        cut_vertices: A list of articulation points.
+        block_ids: A dictionary mapping each vertex to the ids of
+            the blocks containing it.
+    """
+
+    def __init__(self, nxgraph):
+        instrument.count("block_cut_index.builds")
+        nodes, rows = adjacency_rows(nxgraph)
+        self.blocks = []
+        self.cut_vertices = []
+        self.block_ids = {node: [] for node in nodes}
+        self._head = []
+        self._parent_block = {}
+        self._cut_set = set()
+        discovery = [-1] * len(nodes)
+        low = [0] * len(nodes)
+        # edge stack as parallel lists, and where each tree edge sits on it
+        tails = []
+        heads = []
+        tree_edge = [0] * len(nodes)
+        count = 0
+        for start in range(len(nodes)):
+            if discovery[start] >= 0:
+                continue
+            discovery[start] = low[start] = count
+            count += 1
+            root_children = 0
+            stack = [(start, start, iter(rows[start]))]
+            while stack:
+                grandparent, parent, children = stack[-1]
+                for child in children:
+                    if child == grandparent:
+                        continue
+                    found = discovery[child]
+                    if found >= 0:
+                        if found < discovery[parent]:
+                            if found < low[parent]:
+                                low[parent] = found
+                            tails.append(parent)
+                            heads.append(child)
+                    else:
+                        low[child] = discovery[child] = count
+                        count += 1
+                        tree_edge[child] = len(tails)
+                        tails.append(parent)
+                        heads.append(child)
+                        stack.append((parent, child, iter(rows[child])))
+                        break
+                else:
+                    stack.pop()
+                    if len(stack) > 1:
+                        if low[parent] >= discovery[grandparent]:
+                            self._add_block(nodes, grandparent, tails, heads
+                                , tree_edge[parent])
+                            self._add_cut_vertex(nodes[grandparent])
+                        if low[parent] < low[grandparent]:
+                            low[grandparent] = low[parent]
+                    elif stack:
+                        root_children += 1
+                        self._add_block(nodes, grandparent, tails, heads
+                            , tree_edge[parent])
+            if root_children > 1:
+                self._add_cut_vertex(nodes[start])
+
+    def _add_block(self, nodes, head, tails, heads, ind):
+        block_id = len(self.blocks)
+        block = {nodes[u] for u in tails[ind:]}
+        block.update(nodes[v] for v in heads[ind:])
+        del tails[ind:]
+        del heads[ind:]
+        head = nodes[head]
+        self.blocks.append(block)
+        self._head.append(head)
+        for node in block:
+            self.block_ids[node].append(block_id)
+            if node != head:
+                self._parent_block[node] = block_id
+
+    def _add_cut_vertex(self, node):
+        if node not in self._cut_set:
+            self._cut_set.add(node)
+            self.cut_vertices.append(node)
+
+    def is_cut_vertex(self, node):
+        """Returns TRUE if node is an articulation point."""
+        return node in self._cut_set
+
+    def is_biconnected(self):
+        """Returns TRUE if the graph is biconnected."""
+        return len(self.blocks) == 1 and len(self.blocks[0]) == len(self.block_ids)
+
+    def edge_block(self, u, v):
+        """Returns the id of the block holding the edge (u, v)."""
+        block = self._parent_block.get(v)
+        if block is not None and self._head[block] == u:
+            return block
+        return self._parent_block[u]
+
+    def same_block(self, u, v):
+        """Returns TRUE if u and v lie in a common biconnected component."""
+        if u == v:
+            return bool(self.block_ids.get(u))
+        block_u = self._parent_block.get(u)
+        block_v = self._parent_block.get(v)
+        if block_u is not None:
+            if block_u == block_v or self._head[block_u] == v:
+                return True
+        return block_v is not None and self._head[block_v] == u
+
+def _find(sets, x):
+    """Returns the root of x in the union-find forest sets, halving
+    the path walked."""
+    root = x
+    while sets[root] != root:
+        root = sets[root]
+    while sets[x] != root:
+        sets[x], x = root, sets[x]
+    return root
+
+class IncrementalBlockCut:
+    """Block-cut structure of a graph kept up to date as edges are added.
+
+    A spanning forest is kept with parent pointers, each non-root
+    vertex standing for the tree edge to its parent. Blocks are classes
+    of a union-find over those tree edges, each with a head, its vertex
+    closest to the root; same_block then applies the parent block and
+    head rule of BlockCutIndex. An edge between two trees reroots the
+    smaller one and links it as a new block. An edge inside a tree
+    walks up from both ends a block at a time, alternating sides, and
+    merges every block met below the meeting point. Each merge removes
+    a block for good, so the walks and the rerooting cost O(log n)
+    amortised per edge, and queries are near-constant time.
+
+    Args:
+        nxgraph: Optional graph to start from.
+        index: Optional BlockCutIndex of nxgraph, used instead of
+               building one.
+
+    Attributes:
+        nodecnt: Number of vertices.
+    """
+
+    def __init__(self, nxgraph=None, index=None):
+        self.nodecnt = 0
+        self._parent = {}
+        # union-find over vertices (connected components)
+        self._comp = {}
+        self._size = {}
+        # vertex -> id of the tree edge to its parent
+        self._edge = {}
+        # union-find over tree edge ids, and the head of each block
+        self._block = []
+        self._head = []
+        # vertex -> number of blocks containing it
+        self._degree = {}
+        self._cuts = {}
+        self._components = 0
+        if index is None and nxgraph is not None:
+            index = BlockCutIndex(nxgraph)
+        if index is not None:
+            self._build(index)
+
+    def _build(self, index):
+        """Starts from a static index: each block becomes a star hung
+        from its head, all its tree edges sharing the block's id."""
+        self._block = list(range(len(index.blocks)))
+        self._head = list(index._head)
+        for node, block_ids in index.block_ids.items():
+            block = index._parent_block.get(node)
+            if block is None:
+                self._parent[node] = None
+                self._components += 1
+            else:
+                self._parent[node] = index._head[block]
+                self._edge[node] = block
+            # tree parents double as the component union-find
+            self._comp[node] = node if block is None else self._parent[node]
+            self._degree[node] = len(block_ids)
+        self.nodecnt = len(index.block_ids)
+        for node in index.block_ids:
+            root = _find(self._comp, node)
+            self._size[root] = self._size.get(root, 0) + 1
+        self._cuts = dict.fromkeys(index.cut_vertices)
+
+    def add_node(self, node):
+        """Adds an isolated vertex, if not present."""
+        if node in self._parent:
+            return
+        self._parent[node] = None
+        self._comp[node] = node
+        self._size[node] = 1
+        self._degree[node] = 0
+        self.nodecnt += 1
+        self._components += 1
+
+    def _parent_block(self, node):
+        """Returns the block holding the tree edge above node, or None
+        for a root."""
+        if self._parent[node] is None:
+            return None
+        return _find(self._block, self._edge[node])
+
+    def _count(self, node, delta):
+        self._degree[node] += delta
+        if self._degree[node] >= 2:
+            self._cuts[node] = None
+        else:
+            self._cuts.pop(node, None)
+
+    def _reroot(self, node):
+        """Makes node the root of its tree, moving the tree edges up the
+        reversed path to their new lower vertices."""
+        path = [node]
+        while self._parent[path[-1]] is not None:
+            path.append(self._parent[path[-1]])
+        edges = [self._edge[x] for x in path[:-1]]
+        blocks = [_find(self._block, e) for e in edges]
+        seen = set()
+        for i, block in enumerate(blocks):
+            if block not in seen:
+                # the path enters each block at its vertex nearest node
+                seen.add(block)
+                self._head[block] = path[i]
+        self._parent[node] = None
+        for i in range(len(path) - 1):
+            self._parent[path[i + 1]] = path[i]
+            self._edge[path[i + 1]] = edges[i]
+        if len(path) > 1:
+            del self._edge[node]
+
+    def add_edge(self, u, v):
+        """Adds the edge (u, v), adding missing vertices."""
+        self.add_node(u)
+        self.add_node(v)
+        if u == v:
+            return
+        cu = _find(self._comp, u)
+        cv = _find(self._comp, v)
+        if cu != cv:
+            if self._size[cu] > self._size[cv]:
+                u, v, cu, cv = v, u, cv, cu
+            self._reroot(u)
+            self._parent[u] = v
+            # the new tree edge is a block of its own
+            self._edge[u] = len(self._block)
+            self._block.append(len(self._block))
+            self._head.append(v)
+            self._comp[cu] = cv
+            self._size[cv] += self._size[cu]
+            self._components -= 1
+            self._count(u, 1)
+            self._count(v, 1)
+            return
+        merged, inner, meet = self._climb(u, v)
+        if not merged:
+            return
+        for x in inner:
+            self._count(x, -1)
+        for block in merged[1:]:
+            root = _find(self._block, block)
+            if root != merged[0]:
+                self._block[root] = merged[0]
+        self._head[merged[0]] = meet
+
+    def _climb(self, u, v):
+        """Finds what an edge between two vertices of one tree merges.
+
+        Returns:
+            merged: The blocks on the u-v path of the block-cut tree,
+                    the first one keeping its id.
+            inner: The vertices inside the path, each losing a block.
+            meet: The vertex of the path nearest the root.
+        """
+        # climb a block at a time from both ends until the walks meet
+        find, sets, parent = _find, self._block, self._parent
+        walks = ([u], [v])
+        blocks = ([], [])
+        reached = ({u: 0}, {v: 0})
+        side = 0
+        while True:
+            other = 1 - side
+            top = walks[side][-1]
+            if top in reached[other]:
+                meet = top
+                break
+            # a walk stopped at the root waits for the other one
+            if parent[top] is not None:
+                block = find(sets, self._edge[top])
+                top = self._head[block]
+                blocks[side].append(block)
+                walks[side].append(top)
+                reached[side][top] = len(blocks[side])
+            side = other
+        # drop the part of each walk above the meeting point
+        steps = (reached[0][meet], reached[1][meet])
+        merged = blocks[0][:steps[0]] + blocks[1][:steps[1]]
+        inner = walks[0][1:steps[0]] + walks[1][1:steps[1]]
+        if steps[0] and steps[1] and blocks[0][steps[0] - 1] != blocks[1][steps[1] - 1]:
+            inner.append(meet)
+        return merged, inner, meet
+
+    def same_block(self, u, v):
+        """Returns TRUE if u and v lie in a common biconnected component."""
+        if u == v:
+            return self._degree.get(u, 0) > 0
+        if u not in self._parent or v not in self._parent:
+            return False
+        block_u = self._parent_block(u)
+        block_v = self._parent_block(v)
+        if block_u is not None:
+            if block_u == block_v or self._head[block_u] == v:
+                return True
+        return block_v is not None and self._head[block_v] == u
+
+    def is_cut_vertex(self, node):
+        """Returns TRUE if node is an articulation point."""
+        return node in self._cuts
+
+    @property
+    def cut_vertices(self):
+        """A list of the articulation points."""
+        return list(self._cuts)
+
+    def is_connected(self):
+        """Returns TRUE if the graph is connected."""
+        return self._components == 1
+
+    def is_biconnected(self):
+        """Returns TRUE if the graph is biconnected."""
+        return self.nodecnt > 1 and self._components == 1 and not self._cuts
 
 def is_Edge_Biconnected(nxgraph):
     """returns a boolean representing whether the graph
@@ -27,22 +387,93 @@ def is_Edge_Biconnected(nxgraph):
     """
     return nx.is_k_edge_connected(nxgraph, k=2)
 
-def is_Vertex_Biconnected(nxgraph):
+def is_Vertex_Biconnected(nxgraph, index=None):
     """returns a boolean representing whether the graph 
     is vertex biconnected or not.
     
     Args:
-        nxgraph: An instance of NetworkX Graph object.
+        nxgraph: An instance of NetworkX Graph object, or a CSRGraph.
+        index: an optional BlockCutIndex or IncrementalBlockCut of
+            nxgraph to reuse.
     
     Returns:
         boolean: indicating TRUE if biconnected, FALSE otherwise.
     """
+    if index is None and isinstance(nxgraph, CSRGraph):
+        index = BlockCutIndex(nxgraph)
+    if index is not None:
+        return index.is_biconnected()
     return nx.is_biconnected(nxgraph)
 
+@instrument.timed
+def get_Bridge_Components(nxgraph):
+    """Finds the 2-edge-connected components with a single DFS.
+
+    Args:
+        nxgraph: an instance of NetworkX graph object, or a CSRGraph.
+
+    Returns:
+        component_of: Dictionary mapping each vertex to the id of its
+            2-edge-connected component.
+        bridges: List of bridges (parent, child) of the DFS.
+    """
+    nodes, rows = adjacency_rows(nxgraph)
+    component_of = {}
+    bridges = []
+    discovery = [-1] * len(nodes)
+    low = [0] * len(nodes)
+    vertex_stack = []
+    component_count = 0
+    count = 0
+    for start in range(len(nodes)):
+        if discovery[start] >= 0:
+            continue
+        discovery[start] = low[start] = count
+        count += 1
+        vertex_stack.append(start)
+        stack = [(start, start, iter(rows[start]))]
+        while stack:
+            grandparent, parent, children = stack[-1]
+            for child in children:
+                if child == grandparent:
+                    continue
+                found = discovery[child]
+                if found >= 0:
+                    if found < low[parent]:
+                        low[parent] = found
+                else:
+                    discovery[child] = low[child] = count
+                    count += 1
+                    vertex_stack.append(child)
+                    stack.append((parent, child, iter(rows[child])))
+                    break
+            else:
+                stack.pop()
+                if low[parent] < low[grandparent]:
+                    low[grandparent] = low[parent]
+                if parent == grandparent or low[parent] > discovery[grandparent]:
+                    if parent != grandparent:
+                        bridges.append((nodes[grandparent], nodes[parent]))
+                    # parent roots a 2-edge-connected component
+                    while True:
+                        v = vertex_stack.pop()
+                        component_of[nodes[v]] = component_count
+                        if v == parent:
+                            break
+                    component_count += 1
+    return component_of, bridges
+
+@instrument.timed
 def edge_Biconnect(nxgraph):
     """ checks if a graph needs to be biconnected 
     and returns edges to be added to make it biconnected
     
+    The 2-edge-connected components are contracted into the bridge
+    forest. Its trees are first chained together leaf to leaf, then the
+    leaves l[0..L-1] of the resulting tree, in DFS order, are joined as
+    l[i]-l[i+L//2]. This adds ceil(p/2)+q edges for p leaves and q
+    isolated components, the Eswaran-Tarjan optimum, in O(n+m).
+
     Args:
         # matrix: Adjacency matrix of the said graph.
         nxgraph(for testing): an instance of NetworkX graph object.
@@ -51,74 +482,537 @@ def edge_Biconnect(nxgraph):
         ebicon_edges: Edges to be added to make the graph edge biconnected
     """
     # nxgraph = nx.from_numpy_matrix(matrix)
-    bicon_edges = []
-    if not is_Edge_Biconnected(nxgraph):
-        ebicon_edges = sorted((nx.k_edge_augmentation(nxgraph, k=2)))
-    return ebicon_edges
+    ebicon_edges = []
+    if nxgraph.number_of_nodes() < 3:
+        return ebicon_edges
+    augmented = nx.Graph(nxgraph.edges())
+    instrument.count("graphs.allocated")
+    augmented.add_nodes_from(nxgraph)
+    augmented.remove_edges_from(list(nx.selfloop_edges(augmented)))
+    while True:
+        component_of, bridges = get_Bridge_Components(augmented)
+        members = {}
+        for v, component in component_of.items():
+            members.setdefault(component, []).append(v)
+        if len(members) == 1:
+            break
+        tree = {component: [] for component in members}
+        attach = {}
+        for u, v in bridges:
+            tree[component_of[u]].append(component_of[v])
+            tree[component_of[v]].append(component_of[u])
+            attach[component_of[u]] = u
+            attach[component_of[v]] = v
+
+        def pick(component):
+            # a vertex of the component away from its bridge, if any
+            for v in members[component]:
+                if v != attach.get(component):
+                    return v
+            return members[component][0]
+
+        ends = []
+        leaves = []
+        seen = set()
+        for root in tree:
+            if root in seen:
+                continue
+            tree_leaves = []
+            seen.add(root)
+            stack = [root]
+            while stack:
+                component = stack.pop()
+                if len(tree[component]) <= 1:
+                    tree_leaves.append(component)
+                for nbr in reversed(tree[component]):
+                    if nbr not in seen:
+                        seen.add(nbr)
+                        stack.append(nbr)
+            if len(tree_leaves) == 1:
+                # an isolated 2-edge-connected component acts as two leaves
+                first = members[tree_leaves[0]][0]
+                last = members[tree_leaves[0]][-1]
+                ends.append((first, last))
+            else:
+                ends.append((pick(tree_leaves[0]), pick(tree_leaves[-1])))
+            leaves.append(tree_leaves)
+        if len(ends) > 1:
+            new_edges = [(ends[i][1], ends[i + 1][0]) for i in range(len(ends) - 1)]
+        else:
+            tree_leaves = leaves[0]
+            half = len(tree_leaves) // 2
+            new_edges = [(pick(tree_leaves[i]), pick(tree_leaves[i + half]))
+                         for i in range(len(tree_leaves) - half)]
+        augmented.add_edges_from(new_edges)
+        ebicon_edges.extend(new_edges)
+    instrument.count("edge_biconnect.edges_added", len(ebicon_edges))
+    return sorted(ebicon_edges)
 
-def get_Cutvertices(nxgraph):
+def get_Cutvertices(nxgraph, index=None):
     """
     Args:
         nxgraph: an instance of NetworkX graph object.
+        index: an optional BlockCutIndex or IncrementalBlockCut of
+            nxgraph to reuse.
     
     Returns:
         articulation_list: List of all articulation points in the graph
     """
-    articulation_list = list(nx.articulation_points(nxgraph))
+    if index is None:
+        index = BlockCutIndex(nxgraph)
+    articulation_list = list(index.cut_vertices)
     return articulation_list
 
-def get_Biconnected_Components(nxgraph):
+def get_Biconnected_Components(nxgraph, index=None):
     """
     Args:
         nxgraph: an instance of NetworkX graph object.
+        index: an optional BlockCutIndex of nxgraph to reuse.
     
     Returns:
         components: Set of biconnected components.
     """
-    components = nx.biconnected_components(nxgraph)
+    if index is None:
+        index = BlockCutIndex(nxgraph)
+    components = (set(block) for block in index.blocks)
     return components
 
-def same_Component(nxgraph,u,v):
+def same_Component(nxgraph,u,v,index=None):
     """
     Args: 
         nxgraph: an instance of Networkx graph object
         u,v: vertices to be checked
+        index: an optional BlockCutIndex or IncrementalBlockCut of
+            nxgraph to reuse.
     
     Returns:
         boolean: TRUE if vertices are in the same biconnected component else FALSE.
     """
-    components = list(get_Biconnected_Components(nxgraph))
-    for itr in range(len(components)):
-        if (u in components[itr]) and (v in components[itr]):
-            return True
-    return False
+    if index is None:
+        instrument.count("same_component.rebuilds")
+        index = BlockCutIndex(nxgraph)
+    return index.same_block(u, v)
+
+def _walk_faces(embedding):
+    """Walks every face of a planar embedding once.
+
+    Args:
+        embedding: an instance of NetworkX PlanarEmbedding object, or
+            a CSRGraph rotation system from CSRGraph.from_embedding.
+
+    Returns:
+        faces: List of faces, each a list of vertices in walking order.
+    """
+    if isinstance(embedding, CSRGraph):
+        return _walk_csr_faces(embedding)
+    faces = []
+    visited = set()
+    for v, w in embedding.edges():
+        if (v, w) not in visited:
+            faces.append(embedding.traverse_face(v, w, mark_half_edges=visited))
+    return faces
+
+def _walk_csr_faces(rotation):
+    """Walks every face of a CSR rotation system once, following the
+    same half-edge rule as PlanarEmbedding.traverse_face: after v->w
+    comes w->x, x the neighbour before v in w's clockwise order."""
+    indptr = memoryview(rotation.indptr)
+    indices = memoryview(rotation.indices)
+    twin = memoryview(rotation.twins())
+    nodes = rotation.nodes()
+    visited = bytearray(len(indices))
+    faces = []
+    for v in range(rotation.nodecnt):
+        for start in range(indptr[v], indptr[v + 1]):
+            if visited[start]:
+                continue
+            face = []
+            pos, u = start, v
+            while not visited[pos]:
+                visited[pos] = 1
+                face.append(nodes[u])
+                u = indices[pos]
+                first = indptr[u]
+                pos = first + (twin[pos] - first - 1) % (indptr[u + 1] - first)
+            faces.append(face)
+    return faces
+
+class _LeafPairing:
+    """One round of planar_biconnect: the block-cut tree of the
+    embedding, kept up to date as chords are added, with the
+    max(ceil(L/2), d-1) lower bound of what is left to add, L the number
+    of leaf blocks and d the most blocks at one cut vertex."""
+
+    def __init__(self, embedding, index):
+        self.embedding = embedding
+        self.edges = []
+        self._tracker = IncrementalBlockCut(index=index)
+        # block id -> number of its cut vertices
+        self._cuts = [sum(1 for v in block if index.is_cut_vertex(v))
+                      for block in index.blocks]
+        self._leafcnt = self._cuts.count(1)
+        # number of blocks -> number of cut vertices in that many
+        self._degrees = {}
+        for v in index.cut_vertices:
+            degree = len(index.block_ids[v])
+            self._degrees[degree] = self._degrees.get(degree, 0) + 1
+
+    @staticmethod
+    def _bound(leafcnt, degree):
+        return max((leafcnt + 1) // 2, degree - 1, 0)
+
+    def _after(self, u, v):
+        """Returns the bound and the number of leaf blocks after adding
+        (u, v), with the merged blocks and the cut count of the block
+        they merge into."""
+        merged, inner, _ = self._tracker._climb(u, v)
+        merged = set(merged)
+        if not merged:
+            degree = max(self._degrees, default=0)
+            return self._bound(self._leafcnt, degree), self._leafcnt, merged, inner, 0
+        degree_of = self._tracker._degree
+        cutcnt = sum(self._cuts[b] for b in merged) - len(inner)
+        cutcnt -= sum(1 for x in inner if degree_of[x] == 2)
+        leafcnt = self._leafcnt - sum(1 for b in merged if self._cuts[b] == 1)
+        leafcnt += cutcnt == 1
+        degree = max(self._degrees, default=0)
+        if sum(1 for x in inner if degree_of[x] == degree) == self._degrees.get(degree):
+            degree -= 1
+        return self._bound(leafcnt, degree), leafcnt, merged, inner, cutcnt
+
+    def gain(self, u, v):
+        """Rates the chord (u, v) by the leaf blocks it removes, then by
+        the blocks it merges."""
+        _, leafcnt, merged, _, _ = self._after(u, v)
+        return self._leafcnt - leafcnt, len(merged)
+
+    def add(self, u, u_ref, v, v_ref, required=True):
+        """Adds the chord (u, v) ccw of u_ref at u and of v_ref at v, if
+        required or if it lowers the bound.
+
+        Returns:
+            added: TRUE if the chord was added.
+            leaf: TRUE if it merged blocks into a leaf block.
+        """
+        bound, _, merged, inner, cutcnt = self._after(u, v)
+        degree = max(self._degrees, default=0)
+        if not required and bound >= self._bound(self._leafcnt, degree):
+            return False, False
+        self.embedding.add_half_edge_ccw(u, v, u_ref)
+        self.embedding.add_half_edge_ccw(v, u, v_ref)
+        self.edges.append((u, v))
+        if not merged:
+            return True, False
+        for x in inner:
+            degree = self._tracker._degree[x]
+            self._degrees[degree] -= 1
+            if not self._degrees[degree]:
+                del self._degrees[degree]
+            if degree > 2:
+                self._degrees[degree - 1] = self._degrees.get(degree - 1, 0) + 1
+        self._leafcnt -= sum(1 for b in merged if self._cuts[b] == 1)
+        self._leafcnt += cutcnt == 1
+        for b in merged:
+            self._cuts[b] = 0
+        self._tracker.add_edge(u, v)
+        self._cuts[_find(self._tracker._block, next(iter(merged)))] = cutcnt
+        return True, cutcnt == 1
+
+    def join(self, before, after, required=False):
+        """Joins the last corner of a leaf stretch to the first corner of
+        a later one on the same face, if required or if it lowers the
+        bound.
+
+        Returns:
+            added: TRUE if the chord was added.
+            merged: The stretch of the leaf block they merged into, or
+                    None if that block is not a leaf.
+        """
+        u, u_ref = before[1]
+        v, v_ref = after[0]
+        added, leaf = self.add(u, u_ref, v, v_ref, required)
+        if not leaf:
+            return added, None
+        # past the chord, the face goes on at v from u
+        last = (v, u) if after[1][0] == v else after[1]
+        return True, (before[0], last)
+
+def _face_leaves(face, leaf_of):
+    """Lists the leaf blocks met walking a face, in order, each as the
+    first and last corner of its stretch: (vertex, the vertex before
+    it) pairs, the places to attach chords at its two ends."""
+    stretches = []
+    for i, v in enumerate(face):
+        leaf = leaf_of.get(v)
+        if leaf is None:
+            continue
+        if stretches and stretches[-1][0] == leaf and stretches[-1][2] == i - 1:
+            stretches[-1][2] = i
+        else:
+            stretches.append([leaf, i, i])
+    if len(stretches) > 1 and stretches[0][0] == stretches[-1][0] \
+            and stretches[0][1] == 0 and stretches[-1][2] == len(face) - 1:
+        # the walk started inside a stretch
+        stretches[0][1] = stretches.pop()[1]
+    return [(leaf, (face[i], face[i - 1]), (face[j], face[j - 1]))
+            for leaf, i, j in stretches]
+
+def _pair_face(pairing, face, leaf_of, index, required):
+    """Joins the leaf blocks met walking one face, see planar_biconnect."""
+    leaves = _face_leaves(face, leaf_of)
+    if len(leaves) == 1:
+        # alone on this face: join the leaf to the vertex that removes a
+        # leaf, or else merges the most blocks, the nearest on ties
+        block = index.blocks[leaves[0][0]]
+        u, u_ref = leaves[0][1]
+        i = face.index(leaves[0][2][0])
+        after = [k % len(face) for k in range(i + 1, i + len(face))
+                 if face[k % len(face)] not in block]
+        if after:
+            j = max(after, key=lambda k: pairing.gain(u, face[k]))
+            pairing.add(u, u_ref, face[j], face[j - 1])
+        return
+    stack = []
+    for _, first, last in leaves:
+        stretch = (first, last)
+        while stack and stretch:
+            added, merged = pairing.join(stack[-1], stretch, required)
+            if not added:
+                break
+            stack.pop()
+            stretch = merged
+        if stretch:
+            stack.append(stretch)
+    while len(stack) > 1:
+        # the face is a cycle: the last leaf comes before the first
+        added, merged = pairing.join(stack[-1], stack[0], required)
+        if not added:
+            break
+        stack.pop()
+        if merged:
+            stack[0] = merged
+        else:
+            stack.pop(0)
+
+def _gather(face, heads, corner):
+    """Gives the heads on a face without a corner their corner there,
+    after the vertex before them."""
+    for i, v in enumerate(face):
+        if v in heads and v not in corner:
+            corner[v] = face[i - 1]
+
+def _gather_all(faces, heads, corner):
+    """Gives every head on the faces a corner, greedily on the face with
+    the most heads still without one."""
+    # face -> number of its heads still without a corner, and the reverse
+    waiting = []
+    faces_of = {}
+    for f, face in enumerate(faces):
+        on_face = [v for v in face if v in heads and v not in corner]
+        waiting.append(len(on_face))
+        for v in on_face:
+            faces_of.setdefault(v, []).append(f)
+    heap = [(-count, f) for f, count in enumerate(waiting) if count]
+    heapq.heapify(heap)
+    while heap:
+        count, f = heapq.heappop(heap)
+        if -count != waiting[f]:
+            if waiting[f]:
+                heapq.heappush(heap, (-waiting[f], f))
+            continue
+        for v in faces[f]:
+            if v in heads and v not in corner:
+                for other in faces_of[v]:
+                    waiting[other] -= 1
+        _gather(faces[f], heads, corner)
+
+def _planar_embedding(nxgraph):
+    """Embeds a connected planar graph a block at a time, parents first.
+
+    Each block is embedded on its own and glued in at its head, in the
+    corner kept for it there, with the face of the block around the
+    head holding the most heads of other blocks merged into the face
+    of that corner. Blocks hanging from a vertex of that face then land
+    in the same face, so leaf blocks gather on a few faces where they
+    can be paired; check_planarity would scatter them.
+
+    Raises:
+        NetworkXException: If the graph is not planar.
+    """
+    index = BlockCutIndex(nxgraph)
+    if len(index.blocks) == 1:
+        is_planar, embedding = nx.check_planarity(nxgraph)
+        if not is_planar:
+            raise nx.NetworkXException("Graph is not planar.")
+        return embedding
+    # every block but the root one hangs from its head
+    heads = set(index._head[:-1])
+    embedding = nx.PlanarEmbedding()
+    # head -> the neighbour after which its child blocks are inserted
+    corner = {}
+    # vertices whose rotation is in place; the others may already be
+    # in embedding as the far end of a half-edge
+    glued = set()
+    for block_id in reversed(range(len(index.blocks))):
+        block = index.blocks[block_id]
+        head = index._head[block_id]
+        if len(block) == 2:
+            u, v = block
+            faces = [[u, v]]
+            rotation = {u: [v], v: [u]}
+        else:
+            is_planar, part = nx.check_planarity(nxgraph.subgraph(block))
+            if not is_planar:
+                raise nx.NetworkXException("Graph is not planar.")
+            faces = _walk_faces(part)
+            rotation = {v: list(part.neighbors_cw_order(v)) for v in block}
+        outer = max((face for face in faces if head in face)
+                    , key=lambda face: len(heads.intersection(face)))
+        _gather(outer, heads, corner)
+        _gather_all(faces, heads, corner)
+        for v, order in rotation.items():
+            if v == head and v in glued:
+                # counterclockwise from the edge leaving the head along outer
+                first = outer[(outer.index(v) + 1) % len(outer)]
+                order.reverse()
+                start = order.index(first)
+                previous = corner[v]
+                for w in order[start:] + order[:start]:
+                    embedding.add_half_edge_ccw(v, w, previous)
+                    previous = w
+            else:
+                embedding.add_half_edge_first(v, order[0])
+                for previous, w in zip(order, order[1:]):
+                    embedding.add_half_edge_cw(v, w, previous)
+        glued.update(rotation)
+    return embedding
+
+def augmentation_bound(nxgraph, index=None):
+    """Returns max(ceil(L/2), d-1), L the number of leaf blocks and d
+    the most blocks at one cut vertex of a connected graph: no fewer
+    edges make it biconnected, and on trees as many are enough.
+
+    Args:
+        nxgraph: An instance of NetworkX Graph object.
+        index: Optional BlockCutIndex of nxgraph.
+
+    Returns:
+        bound: The least number of edges to be added.
+    """
+    if index is None:
+        index = BlockCutIndex(nxgraph)
+    if not index.cut_vertices:
+        return 0
+    leafcnt = sum(1 for block in index.blocks
+                  if sum(1 for v in block if index.is_cut_vertex(v)) == 1)
+    degree = max(len(index.block_ids[v]) for v in index.cut_vertices)
+    return max((leafcnt + 1) // 2, degree - 1)
+
+@instrument.timed
+def planar_biconnect(nxgraph):
+    """Finds edges that make a planar graph biconnected, keeping it planar.
+
+    Components are first chained together and a planar embedding is
+    computed once, a block at a time so that leaf blocks gather on a
+    few faces. Then, in rounds, the leaf blocks of the block-cut
+    tree are paired along the faces of the embedding: each leaf block
+    lies on a face shared with the rest of the graph, and its stretches
+    of non-cut vertices on that face are the places to join it from.
+    The leaves of a face are kept on a stack in walking order, and a
+    new leaf is joined to the one on top only if the chord lowers the
+    max(ceil(L/2), d-1) lower bound on the number of edges still
+    needed, L the number of leaf blocks and d the most blocks at one
+    cut vertex; a chord merging the two into a new leaf block pushes it
+    back in their place. Two leaves hanging from the same cut vertex
+    are therefore only joined while that vertex has blocks to spare, and
+    on trees of blocks the count meets the bound. Chords of one face
+    nest, so they never cross, and they are inserted into the embedding
+    directly. A leaf alone on its face is joined instead to the vertex
+    of the face that removes a leaf, or else merges the most blocks.
+    Each round costs O(n+m) and a logarithmic amortised block-cut
+    update per chord.
+
+    Args:
+        nxgraph: an instance of NetworkX graph object.
+
+    Returns:
+        bicon_edges: Edges to be added to make the graph biconnected
+
+    Raises:
+        NetworkXException: If the graph is not planar.
+    """
+    bicon_edges = set()
+    if nxgraph.number_of_nodes() < 3:
+        return bicon_edges
+    augmented = nx.Graph(nxgraph.edges())
+    instrument.count("graphs.allocated")
+    augmented.add_nodes_from(nxgraph)
+    augmented.remove_edges_from(list(nx.selfloop_edges(augmented)))
+    index = BlockCutIndex(augmented)
+    tails = []
+    for component in nx.connected_components(augmented):
+        tails.append(next(v for v in component if not index.is_cut_vertex(v)))
+    for u, v in zip(tails, tails[1:]):
+        augmented.add_edge(u, v)
+        bicon_edges.add((u, v))
+    embedding = _planar_embedding(augmented)
+    while True:
+        index = BlockCutIndex(embedding)
+        if not index.cut_vertices:
+            break
+        pairing = _LeafPairing(embedding, index)
+        leaf_of = {}
+        for block_id, block in enumerate(index.blocks):
+            cuts = [v for v in block if index.is_cut_vertex(v)]
+            if len(cuts) == 1:
+                for v in block:
+                    if v != cuts[0]:
+                        leaf_of[v] = block_id
+        faces = _walk_faces(embedding)
+        # if no chord lowers the bound, fall back to joining every pair
+        for required in (False, True):
+            for face in faces:
+                _pair_face(pairing, face, leaf_of, index, required)
+            if pairing.edges:
+                break
+        bicon_edges.update(pairing.edges)
+    instrument.count("planar_biconnect.edges_added", len(bicon_edges))
+    return bicon_edges
 
-def biconnect(nxgraph):
+@instrument.timed
+def biconnect(nxgraph, mode="greedy"):
     """
     Args:
         # matrix: Adjacency matrix of the said graph.
         nxgraph(for testing): an instance of NetworkX graph object.
+        mode: "greedy" joins consecutive neighbours around every cut
+              vertex, "planar" uses planar_biconnect.
     
     Returns:
         bicon_edges: Edges to be added to make the graph biconnected
     """
     # nxgraph = nx.from_numpy_matrix(matrix)
-    articulation_points = get_Cutvertices(nxgraph)
+    if mode == "planar":
+        return planar_biconnect(nxgraph)
+    index = BlockCutIndex(nxgraph)
+    articulation_points = get_Cutvertices(nxgraph, index)
+    # joining two neighbours of a cut vertex closes a triangle through it,
+    # merging just the two blocks that hold their edges to it; a union-find
+    # over block ids thus follows the block-cut tree as edges are added,
+    # so neighbours already joined through earlier edges are skipped
+    merged = list(range(len(index.blocks)))
     bicon_edges = set()
-    added_edges = set()
-    removed_edges = set()
     for i in range(len(articulation_points)): 
-        neighbors = list(nx.neighbors(nxgraph,articulation_points[i]))
+        # a self-loop lies in no block
+        neighbors = [neighbor for neighbor in nx.neighbors(nxgraph,articulation_points[i])
+                     if neighbor != articulation_points[i]]
         for j in range(0,len(neighbors)-1):
-            if not same_Component(nxgraph,neighbors[j],neighbors[j+1]):
-                added_edges.add((neighbors[j],neighbors[j+1]))
-                if(articulation_points[i], neighbors[j]) in added_edges\
-                    or (neighbors[j],articulation_points[i]) in added_edges:
-                    removed_edges.add((articulation_points[i],neighbors[j]))
-                    removed_edges.add((neighbors[j],articulation_points[i]))
-                if (articulation_points[i],neighbors[j+1]) in added_edges\
-                    or (neighbors[j+1],articulation_points[i]) in added_edges:
-                    removed_edges.add((articulation_points[i],neighbors[j+1]))
-                    removed_edges.add((neighbors[j+1],articulation_points[i]))
-    bicon_edges = added_edges - removed_edges
+            block = _find(merged
+                , index.edge_block(articulation_points[i], neighbors[j]))
+            other = _find(merged
+                , index.edge_block(articulation_points[i], neighbors[j+1]))
+            if block != other:
+                merged[other] = block
+                bicon_edges.add((neighbors[j],neighbors[j+1]))
+    instrument.count("biconnect.edges_added", len(bicon_edges))
     return bicon_edges
@@ -8,51 +8,89 @@ This module contains the following functions:
 
     * is_biconnected - returns a boolean representing whether the graph
      is biconnected or not.
+    * build_adjacency - builds a CSR adjacency from the adjacency matrix.
+    * init_neighbours - builds the neighbour index kept in sync with
+     the adjacency matrix by add_edge and remove_edge.
     * 
 """
+import bisect
 import numpy as np
-import networkx as nx
 
-def utilfnc_bccsets(graph, u, bccsets, parent, low, disc, st):
+def build_adjacency(graph):
+    """Builds a CSR (compressed sparse row) adjacency of the graph.
+
+    Args:
+        graph: An instance of InputGraph object.
+
+    Returns:
+        indptr: A list such that the neighbours of u are
+                indices[indptr[u]:indptr[u + 1]].
+        indices: A list of neighbours in increasing order for every node.
+    """
+    matrix = np.asarray(graph.matrix)[:graph.nodecnt, :graph.nodecnt]
+    rows, cols = np.nonzero(matrix == 1)
+    indptr = np.zeros(graph.nodecnt + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=graph.nodecnt), out=indptr[1:])
+    return indptr.tolist(), cols.tolist()
+
+def utilfnc_bccsets(graph, u, bccsets, parent, low, disc, st, adjacency=None):
     """Utility function for bcc sets.
 
+    Runs Tarjan's DFS from u with an explicit stack, so the depth
+    of the search is not bounded by the recursion limit.
+
     Args:
         graph: An instance of InputGraph object.
-        * To be finished...
+        u: An integer representing the root of the DFS.
+        bccsets: A list of sets to be filled with the components.
+        parent, low, disc: Lists holding the DFS state of every node.
+        st: A list used as the edge stack.
+        adjacency: Optional (indptr, indices) pair from build_adjacency.
 
     Returns:
         None
     """
-    children = 0
+    if adjacency is None:
+        adjacency = build_adjacency(graph)
+    indptr, indices = adjacency
     disc[u] = graph.time
     low[u] = graph.time
     graph.time += 1
-    for v in range(graph.nodecnt):
-        if graph.matrix[u][v] == 1:
+    # each frame holds a node, its next adjacency position and its children
+    stack = [[u, indptr[u], 0]]
+    while stack:
+        frame = stack[-1]
+        w = frame[0]
+        if frame[1] < indptr[w + 1]:
+            v = indices[frame[1]]
+            frame[1] += 1
             if disc[v] == -1:
-                parent[v] = u
-                children += 1
-                st.append((u, v))
-                utilfnc_bccsets(graph
-                    , v
-                    , bccsets
-                    , parent
-                    , low
-                    , disc
-                    , st)
-                low[u] = min(low[u], low[v])
-                if parent[u] == -1 and children > 1\
-                 or parent[u] != -1 and low[v] >= disc[u]:
-                    graph.bcccnt += 1  
-                    graph.articulationpts[u] = True
-                    w = -1
-                    while w != (u, v):
-                        w = st.pop()
-                        bccsets[(graph.bcccnt) - 1].add(w[0])
-                        bccsets[(graph.bcccnt) - 1].add(w[1])
-            elif v != parent[u] and low[u] > disc[v]:
-                low[u] = min(low[u], disc[v])
-                st.append((u, v))
+                parent[v] = w
+                frame[2] += 1
+                st.append((w, v))
+                disc[v] = graph.time
+                low[v] = graph.time
+                graph.time += 1
+                stack.append([v, indptr[v], 0])
+            elif v != parent[w] and low[w] > disc[v]:
+                low[w] = disc[v]
+                st.append((w, v))
+            continue
+        stack.pop()
+        if not stack:
+            break
+        v = w
+        w, _, children = stack[-1]
+        low[w] = min(low[w], low[v])
+        if parent[w] == -1 and children > 1\
+         or parent[w] != -1 and low[v] >= disc[w]:
+            graph.bcccnt += 1
+            graph.articulationpts[w] = True
+            e = -1
+            while e != (w, v):
+                e = st.pop()
+                bccsets[(graph.bcccnt) - 1].add(e[0])
+                bccsets[(graph.bcccnt) - 1].add(e[1])
 
 def init_bccsets(graph):
     """Initializes biconnected sets in the graph.
@@ -67,6 +105,7 @@ def init_bccsets(graph):
     low = [-1] * (graph.nodecnt)
     parent = [-1] * (graph.nodecnt)
     st = []
+    adjacency = build_adjacency(graph)
     
     graph.bcccnt = 0
     for i in range(graph.nodecnt):
@@ -77,7 +116,8 @@ def init_bccsets(graph):
                 , parent
                 , low
                 , disc
-                , st)
+                , st
+                , adjacency)
         if st:
             graph.bcccnt = graph.bcccnt + 1
             while st:
@@ -103,6 +143,59 @@ def find_articulationpnts(graph):
             graph.articulationpts_sets[i].add(i)
     graph.articulationpts_sets = [x for x in graph.articulationpts_sets if x]
 
+def init_neighbours(graph):
+    """Builds the neighbour index of the graph.
+
+    graph.neighbour_index[u] is the sorted list of neighbours of u.
+    Edges must then be changed through add_edge and remove_edge so
+    that the index and graph.matrix stay in sync.
+
+    Args:
+        graph: An instance of InputGraph object.
+
+    Returns:
+        None
+    """
+    indptr, indices = build_adjacency(graph)
+    graph.neighbour_index = [indices[indptr[u]:indptr[u + 1]]
+                             for u in range(graph.nodecnt)]
+
+def add_edge(graph, node1, node2):
+    """Adds an edge to the adjacency matrix and the neighbour index.
+
+    Args:
+        graph: An instance of InputGraph object.
+        node1, node2: Integers representing the endpoints.
+
+    Returns:
+        None
+    """
+    graph.matrix[node1][node2] = 1
+    graph.matrix[node2][node1] = 1
+    for u, v in ((node1, node2), (node2, node1)):
+        nbrs = graph.neighbour_index[u]
+        pos = bisect.bisect_left(nbrs, v)
+        if pos == len(nbrs) or nbrs[pos] != v:
+            nbrs.insert(pos, v)
+
+def remove_edge(graph, node1, node2):
+    """Removes an edge from the adjacency matrix and the neighbour index.
+
+    Args:
+        graph: An instance of InputGraph object.
+        node1, node2: Integers representing the endpoints.
+
+    Returns:
+        None
+    """
+    graph.matrix[node1][node2] = 0
+    graph.matrix[node2][node1] = 0
+    for u, v in ((node1, node2), (node2, node1)):
+        nbrs = graph.neighbour_index[u]
+        pos = bisect.bisect_left(nbrs, v)
+        if pos < len(nbrs) and nbrs[pos] == v:
+            del nbrs[pos]
+
 def find_neighbours(graph, node):
     """Finds neighbour of a given node.
 
@@ -112,13 +205,11 @@ def find_neighbours(graph, node):
               neighbours are to be evaluated.
 
     Returns:
-        None
+        nbrs: A list of neighbours in increasing order.
     """
-    nxgraph = nx.from_numpy_matrix(graph.matrix)
-    nbrs = []
-    for n in nxgraph.neighbors(node):
-        nbrs.append(n)
-    return nbrs
+    if getattr(graph, "neighbour_index", None) is None:
+        init_neighbours(graph)
+    return list(graph.neighbour_index[node])
 
 def make_biconnected(graph):
     """Finds edges to be added to make graph biconnected.
@@ -129,23 +220,21 @@ def make_biconnected(graph):
     Returns:
         None
     """
+    init_neighbours(graph)
     for i in range(len(graph.articulationpts_val)):
         nbrs =find_neighbours(graph,graph.articulationpts_val[i])
         for j in range(0, (len(nbrs) - 1)):
             if not in_sameblock(graph,nbrs[j], nbrs[j+1]):
-                graph.matrix[nbrs[j]][nbrs[j+1]] = 1
-                graph.matrix[nbrs[j+1]][nbrs[j]] = 1
+                add_edge(graph, nbrs[j], nbrs[j+1])
                 graph.added_edges.add((nbrs[j], nbrs[j+1]))
                 if (graph.articulationpts_val[i], nbrs[j]) in graph.added_edges or\
                         (nbrs[j], graph.articulationpts_val[i]) in graph.added_edges:
-                    graph.matrix[graph.articulationpts_val[i]][nbrs[j]] = 0
-                    graph.matrix[nbrs[j]][graph.articulationpts_val[i]] = 0
+                    remove_edge(graph, graph.articulationpts_val[i], nbrs[j])
                     graph.removed_edges.add((graph.articulationpts_val[i], nbrs[j]))
                     graph.removed_edges.add((nbrs[j], graph.articulationpts_val[i]))
                 if (graph.articulationpts_val[i], nbrs[j+1]) in graph.added_edges or\
                         (nbrs[j+1], graph.articulationpts_val[i]) in graph.added_edges:
-                    graph.matrix[graph.articulationpts_val[i]][nbrs[j+1]] = 0
-                    graph.matrix[nbrs[j+1]][graph.articulationpts_val[i]] = 0
+                    remove_edge(graph, graph.articulationpts_val[i], nbrs[j+1])
                     graph.removed_edges.add((graph.articulationpts_val[i], nbrs[j+1]))
                     graph.removed_edges.add((nbrs[j+1], graph.articulationpts_val[i]))
     graph.bcn_edges = graph.added_edges - graph.removed_edges
@@ -0,0 +1,141 @@
+"""Cache Module
+
+This module caches results computed on graphs under a key that only
+depends on the graph's structure: isomorphic graphs, whatever their
+vertex ids, colours or labels, share one entry. Results are stored in
+canonical labels and mapped back to the caller's vertex ids.
+
+This module contains the following classes and functions:
+
+    * structure_key - content hash of a graph and its labelling.
+    * ResultCache - LRU cache with a memory budget and an optional
+        SQLite backend.
+"""
+import hashlib
+import pickle
+import sqlite3
+import time
+from collections import OrderedDict
+
+from canonical import canonical_labelling
+
+def structure_key(edges, nodes=None, tag="", attributes=None):
+    """Hashes the structure of a graph.
+
+    Args:
+        edges: A list of edges (u, v).
+        nodes: Optional iterable of vertices, to keep isolated ones.
+        tag: A string naming the computation, so that different
+             results on one graph get different keys.
+        attributes: Optional dictionary mapping each vertex to data the
+                    result depends on, such as its coordinates; it is
+                    hashed in canonical label order.
+
+    Returns:
+        key: A hex digest equal for isomorphic graphs and equal tags.
+        labelling: A dictionary mapping each vertex to its canonical
+                   label, to store and restore results with.
+    """
+    form, labelling, _ = canonical_labelling(edges, nodes)
+    if attributes is None:
+        digest = hashlib.sha256(repr((tag, form)).encode())
+    else:
+        ordered = tuple(attributes[v] for v in sorted(labelling, key=labelling.get))
+        digest = hashlib.sha256(repr((tag, form, ordered)).encode())
+    return digest.hexdigest(), labelling
+
+class ResultCache:
+    """LRU cache of picklable values with an optional SQLite backend.
+
+    Entries are kept in memory up to maxsize entries and max_bytes
+    pickled bytes, least recently used first out. With a path, every
+    entry is also written to an SQLite file, which survives restarts
+    and is consulted on memory misses. The file is trimmed back to its
+    disk_maxsize most recently used entries once every tenth of that
+    many insertions, so it briefly holds up to 10% more.
+    """
+
+    def __init__(self, maxsize=1024, max_bytes=64 * 2**20, path=None
+            , disk_maxsize=100000):
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.disk_maxsize = disk_maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._db = None
+        self._trim_every = max(1, disk_maxsize // 10)
+        self._inserts = 0
+        if path is not None:
+            self._db = sqlite3.connect(path)
+            self._db.execute("CREATE TABLE IF NOT EXISTS cache"
+                " (key TEXT PRIMARY KEY, value BLOB, used REAL)")
+            self._db.execute("CREATE INDEX IF NOT EXISTS cache_used ON cache (used)")
+            self._db.commit()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _remember(self, key, blob):
+        """Puts a pickled entry in memory and evicts down to the budget."""
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._bytes -= len(old)
+        self._entries[key] = blob
+        self._bytes += len(blob)
+        while self._entries and (len(self._entries) > self.maxsize
+                                 or self._bytes > self.max_bytes):
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= len(evicted)
+
+    def get(self, key, default=None):
+        """Looks a key up, in memory first and then on disk.
+
+        Returns:
+            value: The cached value, default if absent.
+        """
+        blob = self._entries.get(key)
+        if blob is not None:
+            self._entries.move_to_end(key)
+        elif self._db is not None:
+            row = self._db.execute("SELECT value FROM cache WHERE key = ?"
+                , (key,)).fetchone()
+            if row is not None:
+                blob = row[0]
+                self._db.execute("UPDATE cache SET used = ? WHERE key = ?"
+                    , (time.time(), key))
+                self._db.commit()
+                self._remember(key, blob)
+        if blob is None:
+            self.misses += 1
+            return default
+        self.hits += 1
+        return pickle.loads(blob)
+
+    def put(self, key, value):
+        """Stores a value under a key."""
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        self._remember(key, blob)
+        if self._db is not None:
+            self._db.execute("INSERT OR REPLACE INTO cache VALUES (?, ?, ?)"
+                , (key, blob, time.time()))
+            self._inserts += 1
+            if self._inserts % self._trim_every == 0:
+                self._trim()
+            self._db.commit()
+
+    def _trim(self):
+        """Deletes the least recently used entries on disk beyond
+        disk_maxsize, walking the index on used from the oldest."""
+        excess = self._db.execute("SELECT COUNT(*) FROM cache").fetchone()[0] \
+            - self.disk_maxsize
+        if excess > 0:
+            self._db.execute("DELETE FROM cache WHERE key IN (SELECT key FROM cache"
+                " ORDER BY used LIMIT ?)", (excess,))
+
+    def close(self):
+        """Closes the SQLite backend, if any."""
+        if self._db is not None:
+            self._db.close()
+            self._db = None
@@ -0,0 +1,231 @@
+"""Canonical Module
+
+This module computes canonical forms of graphs, so that isomorphic
+graphs get the same key and can be deduplicated without trying every
+relabelling.
+
+This module contains the following classes and functions:
+
+    * invariant - cheap isomorphism invariant used as a hash bucket.
+    * canonical_labelling - canonical edge tuple of a graph, with the
+        relabelling and automorphisms found.
+    * canonical_form - canonical edge tuple of a graph.
+    * IsomorphismFilter - set of graphs up to isomorphism.
+"""
+
+def _adjacency(edges, nodes=None):
+    """Builds index adjacency lists from an edge list.
+
+    Args:
+        edges: A list of edges (u, v).
+        nodes: Optional iterable of vertices, to keep isolated ones.
+
+    Returns:
+        index: A dictionary mapping each vertex to its index.
+        adj: A list of neighbour lists over vertex indices.
+    """
+    index = {}
+    if nodes is not None:
+        for node in nodes:
+            index.setdefault(node, len(index))
+    for u, v in edges:
+        index.setdefault(u, len(index))
+        index.setdefault(v, len(index))
+    adj = [[] for _ in index]
+    for u, v in edges:
+        if u != v:
+            adj[index[u]].append(index[v])
+            adj[index[v]].append(index[u])
+    return index, adj
+
+def _refine(adj, colors):
+    """Refines vertex colours until the partition is equitable.
+
+    New colours are ranks of (colour, sorted neighbour colours)
+    signatures, so the result does not depend on vertex labels.
+
+    Args:
+        adj: A list of neighbour lists.
+        colors: A list of integer colours, one per vertex.
+
+    Returns:
+        colors: The refined list of colours.
+    """
+    cellcnt = len(set(colors))
+    while True:
+        signatures = [(colors[v], tuple(sorted(colors[u] for u in adj[v])))
+                      for v in range(len(adj))]
+        ranks = {sig: rank for rank, sig in enumerate(sorted(set(signatures)))}
+        colors = [ranks[sig] for sig in signatures]
+        if len(ranks) == cellcnt:
+            return colors
+        cellcnt = len(ranks)
+
+def invariant(edges, nodes=None):
+    """Computes a cheap isomorphism invariant of a graph.
+
+    Args:
+        edges: A list of edges (u, v).
+        nodes: Optional iterable of vertices, to keep isolated ones.
+
+    Returns:
+        key: A hashable tuple equal for isomorphic graphs.
+    """
+    _, adj = _adjacency(edges, nodes)
+    degree = [len(nbrs) for nbrs in adj]
+    return (len(adj), sum(degree) // 2, tuple(sorted(
+        (degree[v], tuple(sorted(degree[u] for u in adj[v])))
+        for v in range(len(adj)))))
+
+def _in_orbit(v, explored, automorphisms, prefix):
+    """Checks whether v is in the orbit of an explored vertex under the
+    found automorphisms that fix every individualised vertex."""
+    parent = {}
+
+    def find(x):
+        while parent.get(x, x) != x:
+            x = parent[x]
+        return x
+
+    for gamma in automorphisms:
+        if all(gamma[p] == p for p in prefix):
+            for x, y in enumerate(gamma):
+                rx, ry = find(x), find(y)
+                if rx != ry:
+                    parent[rx] = ry
+    root = find(v)
+    return any(find(w) == root for w in explored)
+
+def canonical_labelling(edges, nodes=None):
+    """Computes the canonical form of a graph and its labelling.
+
+    Colour refinement is run first; while some colour class has more
+    than one vertex, each vertex of the first such class is
+    individualised in turn and the search continues. Every discrete
+    colouring gives a relabelling, and the smallest relabelled edge
+    tuple is the canonical form. A leaf with the same edge tuple as the
+    first or best leaf reveals an automorphism: the search backtracks
+    to their common ancestor, and children in the orbit of an explored
+    child are skipped, which keeps symmetric graphs from blowing up
+    the search.
+
+    Args:
+        edges: A list of edges (u, v).
+        nodes: Optional iterable of vertices, to keep isolated ones.
+
+    Returns:
+        form: A tuple (vertex count, sorted edge tuple) that is equal
+              for two graphs if and only if they are isomorphic.
+        labelling: A dictionary mapping each vertex to its label in form.
+        automorphisms: A list of automorphisms met during the search,
+                       each a dictionary mapping vertices to vertices.
+    """
+    index, adj = _adjacency(edges, nodes)
+    nodecnt = len(adj)
+    # first and best leaves as (form, colours, individualised vertices)
+    leaves = {}
+    automorphisms = []
+
+    def search(colors, prefix):
+        """Explores the subtree below prefix and returns the depth to
+        backtrack to, or None to carry on."""
+        cells = {}
+        for v, color in enumerate(colors):
+            cells.setdefault(color, []).append(v)
+        target = min((color for color, cell in cells.items() if len(cell) > 1)
+                     , default=None)
+        if target is None:
+            form = tuple(sorted((min(colors[u], colors[v]), max(colors[u], colors[v]))
+                                for u in range(nodecnt) for v in adj[u] if u < v))
+            if not leaves:
+                leaves["first"] = leaves["best"] = (form, colors, prefix)
+                return None
+            for key in ("first", "best"):
+                if form == leaves[key][0]:
+                    inverse = [0] * nodecnt
+                    for v, color in enumerate(leaves[key][1]):
+                        inverse[color] = v
+                    automorphisms.append([inverse[color] for color in colors])
+                    # the rest of this branch is an image of the stored leaf's
+                    common = 0
+                    for u, v in zip(prefix, leaves[key][2]):
+                        if u != v:
+                            break
+                        common += 1
+                    return common
+            if form < leaves["best"][0]:
+                leaves["best"] = (form, colors, prefix)
+            return None
+        explored = []
+        for v in cells[target]:
+            if explored and _in_orbit(v, explored, automorphisms, prefix):
+                continue
+            explored.append(v)
+            individualised = [2 * color for color in colors]
+            individualised[v] -= 1
+            jump = search(_refine(adj, individualised), prefix + [v])
+            if jump is not None and jump < len(prefix):
+                return jump
+        return None
+
+    search(_refine(adj, [0] * nodecnt), [])
+    form, colors, _ = leaves["best"]
+    nodelist = list(index)
+    labelling = {node: colors[i] for i, node in enumerate(nodelist)}
+    automorphisms = [{node: nodelist[gamma[i]] for i, node in enumerate(nodelist)}
+                     for gamma in automorphisms]
+    return (nodecnt, form), labelling, automorphisms
+
+def canonical_form(edges, nodes=None):
+    """Computes the canonical form of a graph.
+
+    Args:
+        edges: A list of edges (u, v).
+        nodes: Optional iterable of vertices, to keep isolated ones.
+
+    Returns:
+        form: A tuple (vertex count, sorted edge tuple) that is equal
+              for two graphs if and only if they are isomorphic.
+    """
+    return canonical_labelling(edges, nodes)[0]
+
+class IsomorphismFilter:
+    """Set of graphs up to isomorphism.
+
+    Graphs are bucketed on their invariant; a canonical form is only
+    computed once a second graph lands in the same bucket, so graphs
+    with a unique invariant never pay for it.
+    """
+
+    def __init__(self):
+        self._buckets = {}
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def add(self, edges, nodes=None):
+        """Adds a graph unless an isomorphic one was added before.
+
+        Args:
+            edges: A list of edges (u, v).
+            nodes: Optional iterable of vertices, to keep isolated ones.
+
+        Returns:
+            boolean: TRUE if the graph was new, FALSE otherwise.
+        """
+        key = invariant(edges, nodes)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            self._buckets[key] = (edges, nodes)
+            self._count += 1
+            return True
+        if isinstance(bucket, tuple):
+            bucket = {canonical_form(*bucket)}
+            self._buckets[key] = bucket
+        form = canonical_form(edges, nodes)
+        if form in bucket:
+            return False
+        bucket.add(form)
+        self._count += 1
+        return True
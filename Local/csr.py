@@ -0,0 +1,260 @@
+"""CSR Module
+
+This module stores undirected graphs in compressed sparse row form:
+the neighbours of vertex u are indices[indptr[u]:indptr[u + 1]], both
+int32 NumPy arrays. An edge costs 8 bytes (it is stored once in each
+direction), against hundreds in a NetworkX graph, and arrays coming
+from NumPy or SciPy are used without copying when they already have
+the right layout. Routines of the other modules accept a CSRGraph
+wherever they accept a NetworkX graph and walk it through memoryviews
+of its arrays.
+
+Vertices are numbered 0..n-1; graphs converted from NetworkX keep
+their node labels, in that order, in labels.
+
+This module contains the following classes and functions:
+
+    * CSRGraph - immutable array-backed undirected graph.
+    * as_csr - converts a graph to a CSRGraph.
+    * adjacency_rows - integer neighbour lists of a NetworkX graph or
+        a CSRGraph.
+"""
+import networkx as nx
+import numpy as np
+
+def _frozen(values):
+    """Returns values as a read-only, C-contiguous int32 array, copying
+    only when the dtype or layout requires it."""
+    # a view, so that freezing it leaves the caller's array alone
+    array = np.ascontiguousarray(values, dtype=np.int32).view()
+    array.flags.writeable = False
+    return array
+
+class _Rows:
+    """Sequence of the neighbour lists of a CSRGraph, as memoryview
+    slices that iterate as Python ints."""
+
+    __slots__ = ("_indptr", "_indices")
+
+    def __init__(self, graph):
+        self._indptr = memoryview(graph.indptr)
+        self._indices = memoryview(graph.indices)
+
+    def __len__(self):
+        return len(self._indptr) - 1
+
+    def __getitem__(self, u):
+        return self._indices[self._indptr[u]:self._indptr[u + 1]]
+
+class CSRGraph:
+    """Immutable undirected graph in compressed sparse row form.
+
+    The adjacency is assumed symmetric and free of self-loops; the
+    constructors below ensure it, except from_csr which takes the
+    arrays as given.
+
+    Attributes:
+        indptr: An int32 array of length n + 1.
+        indices: An int32 array of length 2m.
+        labels: A list of the node labels, or None for 0..n-1.
+    """
+
+    __slots__ = ("indptr", "indices", "labels")
+
+    def __init__(self, indptr, indices, labels=None):
+        self.indptr = _frozen(indptr)
+        self.indices = _frozen(indices)
+        if labels is not None:
+            labels = list(labels)
+            if len(labels) != len(self.indptr) - 1:
+                raise ValueError("Expected %d labels, got %d."
+                    % (len(self.indptr) - 1, len(labels)))
+        self.labels = labels
+
+    @classmethod
+    def from_csr(cls, indptr, indices, labels=None):
+        """Wraps CSR arrays, without copying int32 arrays."""
+        return cls(indptr, indices, labels)
+
+    @classmethod
+    def from_edges(cls, sources, targets, nodecnt=None, labels=None):
+        """Builds a graph from edge endpoint arrays.
+
+        Both directions are stored; self-loops and repeated edges are
+        dropped.
+
+        Args:
+            sources, targets: Integer arrays of edge endpoints.
+            nodecnt: Number of vertices, one more than the largest
+                     endpoint by default.
+            labels: Optional list of node labels.
+        """
+        sources = np.asarray(sources, dtype=np.int64).ravel()
+        targets = np.asarray(targets, dtype=np.int64).ravel()
+        if nodecnt is None:
+            nodecnt = int(max(sources.max(initial=-1), targets.max(initial=-1))) + 1
+        keep = sources != targets
+        sources, targets = sources[keep], targets[keep]
+        keys = np.concatenate((sources * nodecnt + targets, targets * nodecnt + sources))
+        keys.sort()
+        keys = keys[np.concatenate(([True], keys[1:] != keys[:-1]))] if len(keys) else keys
+        indptr = np.zeros(nodecnt + 1, dtype=np.int32)
+        np.cumsum(np.bincount(keys // nodecnt, minlength=nodecnt), out=indptr[1:])
+        return cls(indptr, keys % nodecnt, labels)
+
+    @classmethod
+    def from_adjacency(cls, matrix, labels=None):
+        """Builds a graph from a SciPy sparse or NumPy dense adjacency
+        matrix; any nonzero entry is an edge.
+
+        A SciPy CSR matrix with int32 index arrays is used without
+        copying, and must then be symmetric with an empty diagonal.
+        """
+        if hasattr(matrix, "indptr") and hasattr(matrix, "indices"):
+            if getattr(matrix, "format", "csr") != "csr":
+                matrix = matrix.tocsr()
+            return cls(matrix.indptr, matrix.indices, labels)
+        if hasattr(matrix, "tocsr"):
+            return cls.from_adjacency(matrix.tocsr(), labels)
+        matrix = np.asarray(matrix)
+        rows, cols = np.nonzero(matrix)
+        return cls.from_edges(rows, cols, len(matrix), labels)
+
+    @classmethod
+    def from_networkx(cls, nxgraph):
+        """Builds a graph from a NetworkX graph, keeping its node labels."""
+        labels = list(nxgraph)
+        index = {node: i for i, node in enumerate(labels)}
+        edgecnt = nxgraph.number_of_edges()
+        sources = np.fromiter((index[u] for u, _ in nxgraph.edges()), np.int64, edgecnt)
+        targets = np.fromiter((index[v] for _, v in nxgraph.edges()), np.int64, edgecnt)
+        if labels == list(range(len(labels))):
+            labels = None
+        return cls.from_edges(sources, targets, len(index), labels)
+
+    @classmethod
+    def from_input_graph(cls, graph):
+        """Builds a graph from the adjacency matrix of an InputGraph."""
+        matrix = np.asarray(graph.matrix)[:graph.nodecnt, :graph.nodecnt]
+        return cls.from_adjacency(matrix == 1)
+
+    @classmethod
+    def from_embedding(cls, embedding):
+        """Builds a rotation system from a NetworkX PlanarEmbedding:
+        the neighbours of every vertex are stored in clockwise order."""
+        labels = list(embedding)
+        index = {node: i for i, node in enumerate(labels)}
+        degrees = np.fromiter((len(embedding[v]) for v in labels), np.int64, len(labels))
+        indptr = np.zeros(len(labels) + 1, dtype=np.int32)
+        np.cumsum(degrees, out=indptr[1:])
+        indices = np.fromiter((index[w] for v in labels
+                               for w in embedding.neighbors_cw_order(v))
+                              , np.int32, int(indptr[-1]))
+        if labels == list(range(len(labels))):
+            labels = None
+        return cls(indptr, indices, labels)
+
+    def __len__(self):
+        return len(self.indptr) - 1
+
+    def __getstate__(self):
+        return self.indptr, self.indices, self.labels
+
+    def __setstate__(self, state):
+        self.__init__(*state)
+
+    @property
+    def nodecnt(self):
+        """Number of vertices."""
+        return len(self.indptr) - 1
+
+    @property
+    def edgecnt(self):
+        """Number of edges."""
+        return len(self.indices) // 2
+
+    @property
+    def nbytes(self):
+        """Bytes held by the index arrays."""
+        return self.indptr.nbytes + self.indices.nbytes
+
+    def nodes(self):
+        """Returns the node labels, in vertex order."""
+        return self.labels if self.labels is not None else range(self.nodecnt)
+
+    def degrees(self):
+        """Returns the vertex degrees as an array."""
+        return np.diff(self.indptr)
+
+    def neighbors(self, u):
+        """Returns the neighbours of vertex u as an array view."""
+        return self.indices[self.indptr[u]:self.indptr[u + 1]]
+
+    def rows(self):
+        """Returns the neighbour lists, indexable by vertex, for loops
+        that want Python ints."""
+        return _Rows(self)
+
+    def twins(self):
+        """Maps every position p, an arc u->w, to the position of w->u.
+
+        Returns:
+            twin: An int32 array of length 2m.
+        """
+        nodecnt = np.int64(self.nodecnt)
+        sources = np.repeat(np.arange(nodecnt), self.degrees())
+        targets = self.indices.astype(np.int64)
+        keys = sources * nodecnt + targets
+        order = np.argsort(keys, kind="stable")
+        found = np.searchsorted(keys, targets * nodecnt + sources, sorter=order)
+        return order[found].astype(np.int32)
+
+    def to_networkx(self):
+        """Converts the graph to a NetworkX graph with its labels."""
+        nxgraph = nx.Graph()
+        nodes = self.nodes()
+        nxgraph.add_nodes_from(nodes)
+        sources = np.repeat(np.arange(self.nodecnt), self.degrees())
+        upper = sources < self.indices
+        nxgraph.add_edges_from((nodes[u], nodes[v]) for u, v
+                               in zip(sources[upper].tolist(), self.indices[upper].tolist()))
+        return nxgraph
+
+def as_csr(graph):
+    """Converts a graph to a CSRGraph, returning CSRGraphs unchanged.
+
+    Args:
+        graph: A CSRGraph, a NetworkX graph, an InputGraph, or a SciPy
+               or NumPy adjacency matrix.
+
+    Returns:
+        csrgraph: The graph as a CSRGraph.
+    """
+    if isinstance(graph, CSRGraph):
+        return graph
+    if isinstance(graph, nx.Graph):
+        return CSRGraph.from_networkx(graph)
+    if hasattr(graph, "matrix") and hasattr(graph, "nodecnt"):
+        return CSRGraph.from_input_graph(graph)
+    return CSRGraph.from_adjacency(graph)
+
+def adjacency_rows(graph):
+    """Numbers the vertices of a graph and lists their neighbours.
+
+    A CSRGraph is used in place; a NetworkX graph is converted into
+    lists, in node and adjacency order, without its self-loops.
+
+    Args:
+        graph: A CSRGraph or a NetworkX graph.
+
+    Returns:
+        nodes: A sequence of the node labels, in vertex order.
+        rows: A sequence such that rows[u] iterates over the
+              neighbours of vertex u as ints.
+    """
+    if isinstance(graph, CSRGraph):
+        return graph.nodes(), graph.rows()
+    nodes = list(graph)
+    index = {node: i for i, node in enumerate(nodes)}
+    rows = [[index[nbr] for nbr in graph[node] if nbr != node] for node in nodes]
+    return nodes, rows
@@ -0,0 +1,475 @@
+"""Enumeration Module
+
+This module enumerates planar graphs, and in particular biconnected
+planar graphs, on a given number of vertices, one graph per
+isomorphism class, as a stream.
+
+Graphs are grown one edge at a time by canonical augmentation: a
+child G + e is kept only if e is, up to isomorphism, the edge that the
+canonical labelling of G + e would delete, so every class is reached
+from exactly one parent class. Non-planar graphs are cut as soon as
+they appear since no supergraph can be planar again.
+
+This module contains the following classes and functions:
+
+    * PlanarBiconChecker - biconnected planar test over a stack of
+        edges, with cheap necessary conditions kept incrementally.
+    * planar_graphs - yields every planar graph on n vertices.
+    * biconnected_planar_graphs - yields every biconnected planar
+        graph on n vertices.
+    * split_search - splits the search tree into independent shards.
+    * enumerate_sharded - enumerates biconnected planar graphs shard by
+        shard on a process pool, writing one result file per shard.
+    * merge_shards - streams the graphs of shard files without
+        duplicates.
+"""
+import itertools
+import json
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import networkx as nx
+
+from canonical import canonical_form, canonical_labelling
+
+def _edge_limit(nodecnt):
+    """Largest edge count of a planar graph on nodecnt vertices."""
+    if nodecnt < 3:
+        return nodecnt * (nodecnt - 1) // 2
+    return 3 * nodecnt - 6
+
+def _non_edge_orbits(nodecnt, edges, automorphisms):
+    """Picks one non-edge per orbit of the given automorphisms.
+
+    Args:
+        nodecnt: Number of vertices, labelled 0..nodecnt-1.
+        edges: A tuple of edges (u, v) with u < v.
+        automorphisms: A list of vertex permutations (lists).
+
+    Returns:
+        non_edges: A list of non-edges, one per orbit.
+    """
+    present = set(edges)
+    non_edges = [(u, v) for u in range(nodecnt) for v in range(u + 1, nodecnt)
+                 if (u, v) not in present]
+    parent = {e: e for e in non_edges}
+
+    def find(e):
+        while parent[e] != e:
+            parent[e] = parent[parent[e]]
+            e = parent[e]
+        return e
+
+    for gamma in automorphisms:
+        for u, v in non_edges:
+            image = (gamma[u], gamma[v]) if gamma[u] < gamma[v] else (gamma[v], gamma[u])
+            root, other = find((u, v)), find(image)
+            if root != other:
+                parent[other] = root
+    return [e for e in non_edges if find(e) == e]
+
+def _degree_deficit(nodecnt, edges):
+    """Number of edge ends missing for every vertex to reach degree 2."""
+    degree = [0] * nodecnt
+    for u, v in edges:
+        degree[u] += 1
+        degree[v] += 1
+    return sum(max(0, 2 - d) for d in degree)
+
+def _is_planar(nodecnt, edges):
+    """Runs the full planarity test on an edge list."""
+    nxgraph = nx.Graph(edges)
+    return nx.check_planarity(nxgraph)[0]
+
+def _children(nodecnt, edges, automorphisms, max_edges, biconnectable):
+    """Yields the accepted children of a canonically labelled graph.
+
+    Args:
+        nodecnt: Number of vertices.
+        edges: Sorted tuple of edges in canonical labels.
+        automorphisms: Automorphisms of the graph as vertex lists.
+        max_edges: Largest edge count to generate.
+        biconnectable: If TRUE, cut children that cannot reach minimum
+            degree 2 within max_edges edges.
+
+    Yields:
+        (edges, automorphisms, (e, inverse)): A child in canonical
+            labels, its automorphisms, the edge added to the parent in
+            the labels of the parent, and a list mapping each label of
+            the child to its label in the parent.
+    """
+    if len(edges) >= max_edges:
+        return
+    form = (nodecnt, edges)
+    seen = set()
+    for e in _non_edge_orbits(nodecnt, edges, automorphisms):
+        child = edges + (e,)
+        if biconnectable and _degree_deficit(nodecnt, child)\
+                > 2 * (max_edges - len(child)):
+            continue
+        if not _is_planar(nodecnt, child):
+            continue
+        child_form, labelling, child_auts = canonical_labelling(child, range(nodecnt))
+        if child_form in seen:
+            continue
+        # the canonical deletion edge is the last edge of the canonical form
+        inverse = {label: node for node, label in labelling.items()}
+        last = child_form[1][-1]
+        deletion = tuple(sorted((inverse[last[0]], inverse[last[1]])))
+        if deletion != e:
+            parent = tuple(edge for edge in child if edge != deletion)
+            if canonical_form(parent, range(nodecnt)) != form:
+                continue
+        seen.add(child_form)
+        relabelled = []
+        for gamma in child_auts:
+            image = [0] * nodecnt
+            for node, target in gamma.items():
+                image[labelling[node]] = labelling[target]
+            relabelled.append(image)
+        yield child_form[1], relabelled, (e, [inverse[label] for label in range(nodecnt)])
+
+def _automorphism_lists(nodecnt, edges):
+    """Finds automorphisms of a graph as vertex lists."""
+    _, _, automorphisms = canonical_labelling(edges, range(nodecnt))
+    return [[gamma[v] for v in range(nodecnt)] for gamma in automorphisms]
+
+def _walk(nodecnt, roots, max_edges, biconnectable, checker=None):
+    """Walks the search tree below the given roots depth first.
+
+    Args:
+        nodecnt: Number of vertices.
+        roots: An iterable of (edges, automorphisms) pairs.
+        max_edges: Largest edge count to generate.
+        biconnectable: See planar_graphs.
+        checker: Optional PlanarBiconChecker made to hold every graph
+            yielded, in the labels of its root: going down the walk
+            pushes the added edge and going back up pops it.
+
+    Yields:
+        edges: A list of edges (u, v), u < v, in canonical labels.
+    """
+    stack = [iter(roots)]
+    # per graph on the path: its labels -> the labels of the root
+    to_root = []
+    while stack:
+        for edges, automorphisms, *added in stack[-1]:
+            if checker is not None:
+                if added:
+                    (u, v), inverse = added[0]
+                    parent = to_root[-1]
+                    checker.push(parent[u], parent[v])
+                    to_root.append([parent[label] for label in inverse])
+                else:
+                    checker.assign(list(edges))
+                    to_root.append(list(range(nodecnt)))
+            yield list(edges)
+            stack.append(_children(nodecnt, edges, automorphisms
+                , max_edges, biconnectable))
+            break
+        else:
+            stack.pop()
+            if checker is not None and to_root:
+                to_root.pop()
+                if to_root:
+                    checker.pop()
+
+def planar_graphs(nodecnt, max_edges=None, biconnectable=False):
+    """Yields every planar graph on nodecnt vertices once up to isomorphism.
+
+    The search tree is walked depth first with an explicit stack, so
+    memory grows with the depth (at most 3n-6) times the branching,
+    not with the number of graphs.
+
+    Args:
+        nodecnt: Number of vertices.
+        max_edges: Optional largest edge count, 3n-6 by default.
+        biconnectable: If TRUE, cut graphs that cannot reach minimum
+            degree 2 within max_edges edges.
+
+    Yields:
+        edges: A list of edges (u, v), u < v, in canonical labels.
+    """
+    limit = _edge_limit(nodecnt)
+    max_edges = limit if max_edges is None else min(max_edges, limit)
+    root = ((), _automorphism_lists(nodecnt, ()))
+    return _walk(nodecnt, [root], max_edges, biconnectable)
+
+class PlanarBiconChecker:
+    """Biconnected planar test over a stack of edges.
+
+    Degrees, the number of vertices of degree below 2 and a union-find
+    over the vertices are updated as edges are pushed and popped, so
+    the necessary conditions m <= 3n-6, m >= n, minimum degree 2 and
+    connectivity cost O(1) per check. The union-find uses union by size
+    without path compression, so a pop undoes its push exactly. Only
+    graphs passing every condition are handed to NetworkX.
+    """
+
+    def __init__(self, nodecnt):
+        self.nodecnt = nodecnt
+        self.edges = []
+        self._degree = [0] * nodecnt
+        self._low = nodecnt
+        self._parent = list(range(nodecnt))
+        self._size = [1] * nodecnt
+        self._components = nodecnt
+        self._merges = []
+
+    def _find(self, v):
+        while self._parent[v] != v:
+            v = self._parent[v]
+        return v
+
+    def push(self, u, v):
+        """Adds the edge (u, v) on top of the stack."""
+        self.edges.append((u, v))
+        for w in (u, v):
+            self._degree[w] += 1
+            if self._degree[w] == 2:
+                self._low -= 1
+        ru, rv = self._find(u), self._find(v)
+        if ru != rv:
+            if self._size[ru] < self._size[rv]:
+                ru, rv = rv, ru
+            self._parent[rv] = ru
+            self._size[ru] += self._size[rv]
+            self._components -= 1
+        else:
+            rv = None
+        self._merges.append(rv)
+
+    def pop(self):
+        """Removes the edge on top of the stack and returns it."""
+        u, v = self.edges.pop()
+        for w in (u, v):
+            if self._degree[w] == 2:
+                self._low += 1
+            self._degree[w] -= 1
+        rv = self._merges.pop()
+        if rv is not None:
+            ru = self._parent[rv]
+            self._parent[rv] = rv
+            self._size[ru] -= self._size[rv]
+            self._components += 1
+        return u, v
+
+    def assign(self, edges):
+        """Makes the stack hold edges, keeping the common prefix with
+        the current stack and only popping and pushing the rest."""
+        common = 0
+        for old, new in zip(self.edges, edges):
+            if old != new:
+                break
+            common += 1
+        while len(self.edges) > common:
+            self.pop()
+        for u, v in edges[common:]:
+            self.push(u, v)
+
+    def plausible(self):
+        """Checks the O(1) necessary conditions for the current edges."""
+        edgecnt = len(self.edges)
+        return (self.nodecnt >= 3 and self.nodecnt <= edgecnt <= 3 * self.nodecnt - 6
+                and self._low == 0 and self._components == 1)
+
+    def check(self, planarity=True):
+        """Tests whether the current edges form a biconnected planar graph.
+
+        Args:
+            planarity: If FALSE, the graph is known to be planar and only
+                biconnectivity is tested.
+
+        Returns:
+            boolean: TRUE if the graph is biconnected and planar.
+        """
+        if not self.plausible():
+            return False
+        nxgraph = nx.Graph(self.edges)
+        if not nx.is_biconnected(nxgraph):
+            return False
+        return not planarity or nx.check_planarity(nxgraph)[0]
+
+def _is_biconnected(nodecnt, edges):
+    """Checks biconnectivity of a planar graph on vertices 0..nodecnt-1."""
+    checker = PlanarBiconChecker(nodecnt)
+    checker.assign(edges)
+    return checker.check(planarity=False)
+
+def _walk_biconnected(nodecnt, roots, max_edges):
+    """Walks the search tree below the given roots like _walk, yielding
+    only the biconnected graphs, with one checker for the whole walk."""
+    checker = PlanarBiconChecker(nodecnt)
+    for edges in _walk(nodecnt, roots, max_edges, True, checker):
+        if checker.check(planarity=False):
+            yield edges
+
+def biconnected_planar_graphs(nodecnt, max_edges=None):
+    """Yields every biconnected planar graph on nodecnt vertices once
+    up to isomorphism.
+
+    Args:
+        nodecnt: Number of vertices.
+        max_edges: Optional largest edge count, 3n-6 by default.
+
+    Yields:
+        edges: A list of edges (u, v), u < v, in canonical labels.
+    """
+    limit = _edge_limit(nodecnt)
+    max_edges = limit if max_edges is None else min(max_edges, limit)
+    root = ((), _automorphism_lists(nodecnt, ()))
+    return _walk_biconnected(nodecnt, [root], max_edges)
+
+def _levels(nodecnt, max_edges):
+    """Yields (prefix, roots) for split depths 0, 1, ... max_edges."""
+    prefix = []
+    roots = [((), _automorphism_lists(nodecnt, ()))]
+    for _ in range(max_edges):
+        yield prefix, roots
+        prefix = prefix + [list(edges) for edges, _ in roots]
+        roots = [child[:2] for edges, automorphisms in roots
+                 for child in _children(nodecnt, edges, automorphisms
+                    , max_edges, True)]
+    yield prefix, roots
+
+def split_search(nodecnt, depth, max_edges=None):
+    """Splits the search tree at a given edge count.
+
+    The subtrees below distinct graphs with depth edges are disjoint,
+    so each one can be walked independently. The order of the roots
+    only depends on nodecnt, depth and max_edges.
+
+    Args:
+        nodecnt: Number of vertices.
+        depth: Edge count of the shard roots.
+        max_edges: Optional largest edge count, 3n-6 by default.
+
+    Returns:
+        prefix: A list of the graphs with fewer than depth edges.
+        roots: A list of (edges, automorphisms) pairs, one per shard.
+    """
+    limit = _edge_limit(nodecnt)
+    max_edges = limit if max_edges is None else min(max_edges, limit)
+    return next(itertools.islice(_levels(nodecnt, max_edges)
+        , min(depth, max_edges), None))
+
+def _write_graphs(path, graphs):
+    """Writes graphs one per line, then renames the file into place so
+    that a shard file only exists once it is complete."""
+    count = 0
+    with open(path + ".part", "w") as outfile:
+        for edges in graphs:
+            outfile.write(" ".join(str(v) for e in edges for v in e) + "\n")
+            count += 1
+    os.replace(path + ".part", path)
+    return count
+
+def _run_shard(nodecnt, root, max_edges, path):
+    """Walks one shard and writes its biconnected graphs to path."""
+    return path, _write_graphs(path, _walk_biconnected(nodecnt, [root], max_edges))
+
+def _load_manifest(outdir):
+    """Loads the manifest of an earlier run in outdir, None if absent."""
+    path = os.path.join(outdir, "manifest.json")
+    if not os.path.exists(path):
+        return None
+    with open(path) as infile:
+        return json.load(infile)
+
+def enumerate_sharded(nodecnt, outdir, workers=None, max_edges=None
+        , depth=None):
+    """Enumerates biconnected planar graphs shard by shard.
+
+    The search tree is split by split_search and every shard is walked
+    in a worker process, which writes the graphs it finds to
+    outdir/shard-<i>.txt. Shards whose file already exists are skipped,
+    so calling this again on the same outdir resumes an interrupted run.
+
+    Args:
+        nodecnt: Number of vertices.
+        outdir: Directory for the manifest and shard files.
+        workers: Number of worker processes (None: one per CPU,
+            1: run in the calling process).
+        max_edges: Optional largest edge count, 3n-6 by default.
+        depth: Edge count at which the tree is split. By default the
+            smallest one giving eight shards per worker, and at most
+            nodecnt-1 so that no biconnected graph is left above it.
+
+    Returns:
+        paths: A list of the shard files, prefix.txt first.
+
+    Raises:
+        ValueError: If outdir holds a run with other parameters.
+    """
+    limit = _edge_limit(nodecnt)
+    max_edges = limit if max_edges is None else min(max_edges, limit)
+    workers = workers or os.cpu_count() or 1
+    os.makedirs(outdir, exist_ok=True)
+    manifest = _load_manifest(outdir)
+    if manifest is not None:
+        if (manifest["nodecnt"], manifest["max_edges"]) != (nodecnt, max_edges):
+            raise ValueError("Shard directory holds a run with other parameters.")
+        depth = manifest["depth"]
+    if depth is None:
+        last = min(nodecnt - 1, max_edges)
+        for depth, (prefix, roots) in enumerate(_levels(nodecnt, max_edges)):
+            if len(roots) >= 8 * workers or depth >= last:
+                break
+    else:
+        prefix, roots = split_search(nodecnt, depth, max_edges)
+    if manifest is None:
+        manifest = {"nodecnt": nodecnt, "max_edges": max_edges, "depth": depth
+            , "shards": len(roots)}
+        with open(os.path.join(outdir, "manifest.json"), "w") as outfile:
+            json.dump(manifest, outfile)
+
+    paths = [os.path.join(outdir, "prefix.txt")]
+    if not os.path.exists(paths[0]):
+        _write_graphs(paths[0], (edges for edges in prefix
+                                 if _is_biconnected(nodecnt, edges)))
+    shards = []
+    for i, root in enumerate(roots):
+        path = os.path.join(outdir, "shard-%d.txt" % i)
+        paths.append(path)
+        if not os.path.exists(path):
+            shards.append((root, path))
+
+    if workers == 1:
+        for root, path in shards:
+            _run_shard(nodecnt, root, max_edges, path)
+        return paths
+    todo = iter(shards)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = set()
+        while True:
+            for root, path in itertools.islice(todo, 2 * workers - len(pending)):
+                pending.add(executor.submit(_run_shard, nodecnt, root
+                    , max_edges, path))
+            if not pending:
+                break
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                future.result()
+    return paths
+
+def merge_shards(paths):
+    """Streams the graphs of shard files, dropping duplicates.
+
+    Graphs in shard files are canonical forms, so two lines hold
+    isomorphic graphs exactly when their edge tuples are equal.
+
+    Args:
+        paths: A list of shard files.
+
+    Yields:
+        edges: A list of edges (u, v) in canonical labels.
+    """
+    seen = set()
+    for path in paths:
+        with open(path) as infile:
+            for line in infile:
+                flat = [int(token) for token in line.split()]
+                key = tuple(zip(flat[::2], flat[1::2]))
+                if key not in seen:
+                    seen.add(key)
+                    yield list(key)
@@ -0,0 +1,262 @@
+"""Instrument Module
+
+This module collects timings and counts from the hot paths of the
+pipeline. It is off by default, and an instrumented function then
+costs a single flag test per call. Enable it with enable(), or in
+batch workers by setting GRAPH_INSTRUMENT in their environment to 1,
+or to "profile", "memory" or "profile,memory" to also capture a
+cProfile and the peak traced memory of the calls.
+
+For every instrumented function or block, the number of calls and the
+total and largest seconds are kept; named counters are kept next to
+them. Profiles and memory peaks are only taken around the outermost
+instrumented call, as neither can be nested.
+
+This module contains the following functions:
+
+    * enable - starts collecting.
+    * disable - stops collecting.
+    * reset - forgets what was collected.
+    * timed - decorator timing a function.
+    * span - context manager timing a block.
+    * count - adds to a named counter.
+    * snapshot - the collected metrics as a dictionary.
+    * merge - adds a snapshot, e.g. from a worker process.
+    * profile_stats - the cProfile statistics of a function.
+    * to_json_lines - the metrics as JSON lines.
+    * to_prometheus - the metrics in the Prometheus text format.
+    * dump - writes the metrics to a file.
+"""
+import contextlib
+import cProfile
+import functools
+import json
+import os
+import pstats
+import time
+import tracemalloc
+
+_enabled = False
+_profile = False
+_memory = False
+# number of instrumented calls in progress
+_depth = 0
+# name -> [calls, seconds, max seconds, peak bytes]
+_timers = {}
+_counters = {}
+_profiles = {}
+_DISABLED = contextlib.nullcontext()
+
+def enable(profile=False, memory=False):
+    """Starts collecting.
+
+    Args:
+        profile: Whether to run outermost calls under cProfile.
+        memory: Whether to trace the peak memory of outermost calls.
+    """
+    global _enabled, _profile, _memory
+    _enabled, _profile, _memory = True, profile, memory
+
+def disable():
+    """Stops collecting, keeping what was collected."""
+    global _enabled
+    _enabled = False
+
+def is_enabled():
+    """Returns TRUE if metrics are being collected."""
+    return _enabled
+
+def reset():
+    """Forgets every timer, counter and profile."""
+    _timers.clear()
+    _counters.clear()
+    _profiles.clear()
+
+def count(name, amount=1):
+    """Adds amount to the counter name, when enabled."""
+    if _enabled:
+        _counters[name] = _counters.get(name, 0) + amount
+
+class _Span:
+    """Times one call or block, with its profile and memory peak when
+    it is the outermost one."""
+
+    __slots__ = ("name", "_start", "_profiler", "_tracing", "_started")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        global _depth
+        outer = _depth == 0
+        _depth += 1
+        self._profiler = cProfile.Profile() if outer and _profile else None
+        self._tracing = outer and _memory
+        if self._tracing:
+            self._started = not tracemalloc.is_tracing()
+            if self._started:
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+        if self._profiler is not None:
+            self._profiler.enable()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        global _depth
+        seconds = time.perf_counter() - self._start
+        _depth -= 1
+        timer = _timers.get(self.name)
+        if timer is None:
+            timer = _timers[self.name] = [0, 0.0, 0.0, None]
+        timer[0] += 1
+        timer[1] += seconds
+        timer[2] = max(timer[2], seconds)
+        if self._profiler is not None:
+            self._profiler.disable()
+            if self.name in _profiles:
+                _profiles[self.name].add(self._profiler)
+            else:
+                _profiles[self.name] = pstats.Stats(self._profiler)
+        if self._tracing:
+            peak = tracemalloc.get_traced_memory()[1]
+            if self._started:
+                tracemalloc.stop()
+            timer[3] = max(timer[3] or 0, peak)
+        return False
+
+def span(name):
+    """Times a block of code under name, when enabled.
+
+    Usage:
+
+        with instrument.span("dual"):
+            ...
+    """
+    return _Span(name) if _enabled else _DISABLED
+
+def timed(name=None):
+    """Decorator timing every call of a function, when enabled.
+
+    Args:
+        name: Name of the timer, "module.function" by default. The
+              decorator can also be used bare, as @timed.
+    """
+    def decorate(func, name=name):
+        name = name or "%s.%s" % (func.__module__, func.__qualname__)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            with _Span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    if callable(name):
+        return decorate(name, None)
+    return decorate
+
+def profile_stats(name):
+    """Returns the pstats.Stats gathered for a timer, or None."""
+    return _profiles.get(name)
+
+def _top_functions(stats, limit):
+    rows = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)
+    return [{"function": "%s:%d(%s)" % key, "calls": nc, "tottime": tt, "cumtime": ct}
+            for key, (_, nc, tt, ct, _) in rows[:limit]]
+
+def snapshot(profile_limit=20):
+    """Returns the collected metrics.
+
+    Args:
+        profile_limit: Number of functions listed from each profile,
+                       by cumulative time.
+
+    Returns:
+        metrics: A dictionary with keys:
+            timers: name -> {"calls", "seconds", "max_seconds",
+                "peak_bytes", and "profile" when profiled}.
+            counters: name -> value.
+    """
+    timers = {}
+    for name, (calls, seconds, longest, peak) in _timers.items():
+        timers[name] = {"calls": calls, "seconds": seconds
+            , "max_seconds": longest, "peak_bytes": peak}
+        if name in _profiles:
+            timers[name]["profile"] = _top_functions(_profiles[name], profile_limit)
+    return {"timers": timers, "counters": dict(_counters)}
+
+def merge(metrics):
+    """Adds the timers and counters of a snapshot to the collected
+    ones; profiles are not merged.
+
+    Args:
+        metrics: A dictionary returned by snapshot, typically in
+                 another process.
+    """
+    for name, values in metrics["timers"].items():
+        timer = _timers.get(name)
+        if timer is None:
+            timer = _timers[name] = [0, 0.0, 0.0, None]
+        timer[0] += values["calls"]
+        timer[1] += values["seconds"]
+        timer[2] = max(timer[2], values["max_seconds"])
+        if values["peak_bytes"] is not None:
+            timer[3] = max(timer[3] or 0, values["peak_bytes"])
+    for name, value in metrics["counters"].items():
+        _counters[name] = _counters.get(name, 0) + value
+
+def to_json_lines(**labels):
+    """Formats the metrics as JSON lines, one per timer or counter,
+    stamped with the time, the process id and any extra labels."""
+    stamp = dict(labels, time=time.time(), pid=os.getpid())
+    metrics = snapshot()
+    lines = [json.dumps(dict(stamp, kind="timer", name=name, **values))
+             for name, values in metrics["timers"].items()]
+    lines.extend(json.dumps(dict(stamp, kind="counter", name=name, value=value))
+                 for name, value in metrics["counters"].items())
+    return "".join(line + "\n" for line in lines)
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+def to_prometheus(prefix="graph"):
+    """Formats the metrics in the Prometheus text exposition format."""
+    metrics = snapshot(profile_limit=0)
+    families = (("function_calls_total", "counter", "Calls of instrumented functions.", "calls")
+        , ("function_seconds_total", "counter", "Seconds spent in instrumented functions.", "seconds")
+        , ("function_max_seconds", "gauge", "Longest call of instrumented functions.", "max_seconds")
+        , ("function_peak_bytes", "gauge", "Peak traced memory of instrumented functions.", "peak_bytes"))
+    lines = []
+    for suffix, kind, text, key in families:
+        samples = [(name, values[key]) for name, values in sorted(metrics["timers"].items())
+                   if values[key] is not None]
+        if samples:
+            lines.append("# HELP %s_%s %s" % (prefix, suffix, text))
+            lines.append("# TYPE %s_%s %s" % (prefix, suffix, kind))
+            lines.extend("%s_%s{function=\"%s\"} %r" % (prefix, suffix, _label(name), value)
+                         for name, value in samples)
+    if metrics["counters"]:
+        lines.append("# HELP %s_events_total Counted events." % prefix)
+        lines.append("# TYPE %s_events_total counter" % prefix)
+        lines.extend("%s_events_total{event=\"%s\"} %r" % (prefix, _label(name), value)
+                     for name, value in sorted(metrics["counters"].items()))
+    return "".join(line + "\n" for line in lines)
+
+def dump(path):
+    """Writes the metrics to a file: a .prom file is replaced with the
+    Prometheus format (atomically, for textfile collectors), any other
+    file gets JSON lines appended."""
+    if path.endswith(".prom"):
+        partial = "%s.%d.tmp" % (path, os.getpid())
+        with open(partial, "w") as outfile:
+            outfile.write(to_prometheus())
+        os.replace(partial, path)
+    else:
+        with open(path, "a") as outfile:
+            outfile.write(to_json_lines())
+
+_setting = os.environ.get("GRAPH_INSTRUMENT", "")
+if _setting not in ("", "0"):
+    _options = _setting.split(",")
+    enable(profile="profile" in _options, memory="memory" in _options)
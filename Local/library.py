@@ -0,0 +1,272 @@
+"""Library Module
+
+This module stores libraries of graphs on disk in the graph6 and
+sparse6 formats of nauty, one graph per line, next to an index file of
+record offsets, vertex counts and edge counts. A library is opened
+with mmap, so any graph can be fetched by position or by (n, m) bucket
+without reading the rest of the file.
+
+Graphs are given as (vertex count, edge list) pairs over vertices
+0..n-1, the shape of canonical.canonical_form.
+
+This module contains the following classes and functions:
+
+    * encode_graph6 - encodes a graph in graph6.
+    * encode_sparse6 - encodes a graph in sparse6.
+    * decode - decodes a graph6 or sparse6 record.
+    * write_library - writes a library and its index.
+    * GraphLibrary - lazily reads a library.
+"""
+import mmap
+
+import numpy as np
+
+INDEX_DTYPE = np.dtype([("offset", "<u8"), ("nodecnt", "<u4"), ("edgecnt", "<u4")])
+
+def _encode_size(nodecnt):
+    """Encodes a vertex count as the N(n) prefix of graph6 and sparse6."""
+    if nodecnt <= 62:
+        return bytes([nodecnt + 63])
+    if nodecnt <= 258047:
+        return bytes([126] + [((nodecnt >> s) & 63) + 63 for s in (12, 6, 0)])
+    return bytes([126, 126] + [((nodecnt >> s) & 63) + 63
+                               for s in (30, 24, 18, 12, 6, 0)])
+
+def _decode_size(data, pos):
+    """Decodes the N(n) prefix starting at data[pos].
+
+    Returns:
+        nodecnt: The vertex count.
+        pos: Position of the first byte after the prefix.
+    """
+    if data[pos] != 126:
+        return data[pos] - 63, pos + 1
+    if data[pos + 1] != 126:
+        width, pos = 3, pos + 1
+    else:
+        width, pos = 6, pos + 2
+    nodecnt = 0
+    for byte in data[pos:pos + width]:
+        nodecnt = (nodecnt << 6) | (byte - 63)
+    return nodecnt, pos + width
+
+_SIX_BITS = np.array([32, 16, 8, 4, 2, 1], dtype=np.uint8)
+
+def _pack(bits):
+    """Packs an array of bits, most significant first, into 6-bit
+    printable bytes, padding the last byte with zeros."""
+    bits = np.concatenate([np.asarray(bits, dtype=np.uint8)
+        , np.zeros(-len(bits) % 6, dtype=np.uint8)])
+    return (bits.reshape(-1, 6) @ _SIX_BITS + 63).astype(np.uint8).tobytes()
+
+def _unpack(data):
+    """Unpacks 6-bit printable bytes into an array of bits."""
+    values = np.frombuffer(data, dtype=np.uint8) - 63
+    return np.unpackbits(values[:, None], axis=1)[:, 2:].ravel()
+
+def _bits(values, width):
+    """Spreads every value into its width bits, most significant first."""
+    shifts = np.arange(width - 1, -1, -1, dtype=np.int64)
+    return ((np.asarray(values, dtype=np.int64)[:, None] >> shifts) & 1).astype(np.uint8)
+
+def encode_graph6(nodecnt, edges):
+    """Encodes a graph in graph6.
+
+    Args:
+        nodecnt: Number of vertices.
+        edges: A list of edges (u, v) over vertices 0..nodecnt-1.
+
+    Returns:
+        record: The graph6 bytes, without a newline.
+    """
+    bits = np.zeros(nodecnt * (nodecnt - 1) // 2, dtype=np.uint8)
+    if len(edges):
+        pairs = np.sort(np.asarray(edges, dtype=np.int64).reshape(-1, 2), axis=1)
+        u, v = pairs[pairs[:, 0] != pairs[:, 1]].T
+        # bit of (u, v) in the column-wise upper triangle
+        bits[v * (v - 1) // 2 + u] = 1
+    return _encode_size(nodecnt) + _pack(bits)
+
+def encode_sparse6(nodecnt, edges):
+    """Encodes a graph in sparse6.
+
+    Args:
+        nodecnt: Number of vertices.
+        edges: A list of edges (u, v) over vertices 0..nodecnt-1.
+
+    Returns:
+        record: The sparse6 bytes, without a newline.
+    """
+    k = max(1, (nodecnt - 1).bit_length())
+    flags = []
+    values = []
+    current = 0
+    for v, u in sorted((max(e), min(e)) for e in edges):
+        if v == current:
+            flags.append(0)
+            values.append(u)
+        elif v == current + 1:
+            flags.append(1)
+            values.append(u)
+            current = v
+        else:
+            flags += (1, 0)
+            values += (v, u)
+            current = v
+    bits = np.concatenate([np.array(flags, dtype=np.uint8)[:, None]
+        , _bits(values, k)], axis=1).ravel()
+    pad = -len(bits) % 6
+    if k < 6 and nodecnt == 1 << k and current < nodecnt - 1 and pad >= k:
+        # all-ones padding would read as an edge to vertex n-1
+        bits = np.append(bits, np.uint8(0))
+        pad -= 1
+    bits = np.append(bits, np.ones(pad, dtype=np.uint8))
+    return b":" + _encode_size(nodecnt) + _pack(bits)
+
+def _decode_graph6(data, pos, nodecnt):
+    bits = _unpack(data[pos:])[:nodecnt * (nodecnt - 1) // 2]
+    index = np.flatnonzero(bits)
+    # invert index = v * (v - 1) / 2 + u, correcting the float root
+    v = ((1 + np.sqrt(1 + 8 * index.astype(np.float64))) / 2).astype(np.int64)
+    v -= v * (v - 1) // 2 > index
+    v += (v + 1) * v // 2 <= index
+    u = index - v * (v - 1) // 2
+    return list(zip(u.tolist(), v.tolist()))
+
+def _decode_sparse6(data, pos, nodecnt):
+    bits = _unpack(data[pos:])
+    k = max(1, (nodecnt - 1).bit_length())
+    chunks = bits[:len(bits) // (k + 1) * (k + 1)].reshape(-1, k + 1).astype(np.int64)
+    values = chunks[:, 1:] @ (1 << np.arange(k - 1, -1, -1, dtype=np.int64))
+    edges = []
+    v = 0
+    for b, x in zip(chunks[:, 0].tolist(), values.tolist()):
+        if b:
+            v += 1
+        if x >= nodecnt or v >= nodecnt:
+            break
+        if x > v:
+            v = x
+        else:
+            edges.append((x, v))
+    return edges
+
+def decode(record):
+    """Decodes a graph6 or sparse6 record.
+
+    Args:
+        record: The record bytes, with or without the trailing newline.
+
+    Returns:
+        nodecnt: Number of vertices.
+        edges: A list of edges (u, v), u <= v.
+
+    Raises:
+        ValueError: If the record is empty.
+    """
+    record = bytes(record).rstrip(b"\r\n")
+    if not record:
+        raise ValueError("Empty graph6/sparse6 record.")
+    if record[:1] == b":":
+        nodecnt, pos = _decode_size(record, 1)
+        return nodecnt, _decode_sparse6(record, pos, nodecnt)
+    nodecnt, pos = _decode_size(record, 0)
+    return nodecnt, _decode_graph6(record, pos, nodecnt)
+
+def write_library(path, graphs, fmt="graph6"):
+    """Writes a library of graphs and its index.
+
+    Records are written to path, one per line, and the index to
+    path + ".idx.npy".
+
+    Args:
+        path: Path of the library file.
+        graphs: An iterable of (vertex count, edge list) pairs.
+        fmt: "graph6" (dense graphs) or "sparse6" (sparse graphs).
+
+    Returns:
+        count: Number of graphs written.
+
+    Raises:
+        ValueError: If fmt is not a supported format.
+    """
+    encoders = {"graph6": encode_graph6, "sparse6": encode_sparse6}
+    if fmt not in encoders:
+        raise ValueError("Unsupported library format: %s" % fmt)
+    encode = encoders[fmt]
+    rows = []
+    offset = 0
+    with open(path, "wb") as outfile:
+        for nodecnt, edges in graphs:
+            record = encode(nodecnt, edges) + b"\n"
+            outfile.write(record)
+            rows.append((offset, nodecnt, len(edges)))
+            offset += len(record)
+    np.save(path + ".idx.npy", np.array(rows, dtype=INDEX_DTYPE))
+    return len(rows)
+
+class GraphLibrary:
+    """Lazily reads a library written by write_library.
+
+    The library and its index are memory-mapped; a graph is only
+    decoded when it is fetched.
+    """
+
+    def __init__(self, path):
+        self._file = open(path, "rb")
+        try:
+            self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # mmap refuses empty files
+            self._data = b""
+        self._index = np.load(path + ".idx.npy", mmap_mode="r")
+
+    def __len__(self):
+        return len(self._index)
+
+    def __getitem__(self, i):
+        """Decodes the graph at position i.
+
+        Returns:
+            (nodecnt, edges): The vertex count and edge list.
+        """
+        start = int(self._index["offset"][i])
+        end = self._data.find(b"\n", start)
+        return decode(self._data[start:end])
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def bucket(self, nodecnt, edgecnt=None):
+        """Finds the positions of graphs with given vertex and edge counts.
+
+        Args:
+            nodecnt: Number of vertices.
+            edgecnt: Optional number of edges, any by default.
+
+        Returns:
+            positions: A NumPy array of positions in the library.
+        """
+        match = self._index["nodecnt"] == nodecnt
+        if edgecnt is not None:
+            match &= self._index["edgecnt"] == edgecnt
+        return np.flatnonzero(match)
+
+    def graphs(self, nodecnt, edgecnt=None):
+        """Yields the graphs of a (nodecnt, edgecnt) bucket."""
+        for i in self.bucket(nodecnt, edgecnt):
+            yield self[i]
+
+    def close(self):
+        """Releases the memory maps and the file."""
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+        self._index = None
+        self._file.close()
@@ -0,0 +1,79 @@
+"""Loader Module
+
+This module reads graphs from edge-list files or streams in bulk,
+without prompting for every edge.
+
+Two formats are accepted, both whitespace separated with 0-based
+vertex indices:
+
+    * "n m" followed by m lines "u v" (the format make_graph used to
+      ask for interactively).
+    * A headerless list of "u v" lines.
+
+The two cannot be told apart reliably ("4 1 / 0 2" reads as either),
+so the header is never guessed: callers reading the first format
+pass header=True.
+
+This module contains the following functions:
+
+    * read_edges - parses a whole buffer into an edge array.
+    * load_graph - builds a NetworkX graph from a file or stream.
+"""
+import os
+
+import networkx as nx
+import numpy as np
+
+def read_edges(source, header=False):
+    """Parses an edge list in one pass.
+
+    Args:
+        source: A path, or a file object opened in text or binary mode.
+        header: TRUE if the input starts with "n m", FALSE if it is a
+                plain edge list.
+
+    Returns:
+        edges: An (m, 2) integer NumPy array of edges.
+        nodecnt: The vertex count from the header, None if absent.
+
+    Raises:
+        ValueError: If the input is not a well-formed edge list.
+    """
+    if isinstance(source, (str, bytes, os.PathLike)):
+        with open(source, "rb") as infile:
+            data = infile.read()
+    else:
+        data = source.read()
+    tokens = np.fromstring(data, dtype=np.int64, sep=" ")
+    nodecnt = None
+    if header:
+        if len(tokens) < 2 or len(tokens) != 2 + 2 * tokens[1]:
+            raise ValueError("Edge count in header does not match the edges.")
+        nodecnt = int(tokens[0])
+        tokens = tokens[2:]
+    if len(tokens) % 2:
+        raise ValueError("Edge list has an odd number of vertex indices.")
+    return tokens.reshape(-1, 2), nodecnt
+
+def load_graph(source, header=False, nxgraph=None):
+    """Builds a graph from an edge list with a single add_edges_from.
+
+    Vertices are inserted in order of first appearance in the edge
+    list, as make_graph did; vertices counted in the header but absent
+    from every edge are added afterwards.
+
+    Args:
+        source: A path, or a file object opened in text or binary mode.
+        header: See read_edges.
+        nxgraph: Optional NetworkX Graph to fill, a new one otherwise.
+
+    Returns:
+        nxgraph: The NetworkX Graph holding the edges.
+    """
+    edges, nodecnt = read_edges(source, header)
+    if nxgraph is None:
+        nxgraph = nx.Graph()
+    nxgraph.add_edges_from(map(tuple, edges.tolist()))
+    if nodecnt is not None:
+        nxgraph.add_nodes_from(range(nodecnt))
+    return nxgraph
@@ -0,0 +1,168 @@
+"""Pipeline Module
+
+This module runs the biconnect -> triangulate -> planarity check
+pipeline headlessly over large batches of graphs. It does not import
+matplotlib, so it can run on batch workers.
+
+This module contains the following functions:
+
+    * run_pipeline - runs every stage on one graph and times them.
+    * process_batch - runs the pipeline over many graphs on a process
+        pool and yields results as they finish.
+    * summarize_timings - adds up per-stage timings of a batch.
+"""
+import itertools
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import networkx as nx
+
+import biconnectivity as bcn
+import instrument
+import triangularity as trng
+from cache import structure_key
+
+STAGES = ("biconnect", "triangulate", "planarity")
+
+@instrument.timed
+def run_pipeline(graph, bicon_mode="greedy", trng_mode="chordal", cache=None):
+    """Biconnects, triangulates and checks planarity of a graph.
+
+    With a cache, results are stored under the structure of the graph,
+    so an isomorphic graph seen before skips every stage and gets the
+    stored edges mapped to its own vertices (and empty timings).
+
+    Args:
+        graph: An instance of NetworkX Graph object or a list of edges.
+        bicon_mode: Mode passed to biconnectivity.biconnect.
+        trng_mode: Mode passed to triangularity.triangulate.
+        cache: Optional cache.ResultCache.
+
+    Returns:
+        result: A dictionary with keys:
+            bcn_edges: Edges added to biconnect the graph.
+            trng_edges: Edges added to triangulate the graph.
+            is_planar: Planarity of the final graph.
+            timings: Seconds spent in each stage.
+            error: Type and message of the exception that stopped
+                the pipeline, None otherwise.
+    """
+    nxgraph = nx.Graph(graph)
+    instrument.count("graphs.allocated")
+    result = {"bcn_edges": [], "trng_edges": [], "is_planar": None
+        , "timings": {}, "error": None}
+    timings = result["timings"]
+    if cache is not None:
+        key, labelling = structure_key(list(nxgraph.edges()), list(nxgraph)
+            , tag="pipeline:%s:%s" % (bicon_mode, trng_mode))
+        cached = cache.get(key)
+        if cached is not None:
+            instrument.count("pipeline.cache_hits")
+            inverse = {label: node for node, label in labelling.items()}
+            for name in ("bcn_edges", "trng_edges"):
+                result[name] = [(inverse[u], inverse[v]) for u, v in cached[name]]
+            result["is_planar"], result["error"] = cached["is_planar"], cached["error"]
+            return result
+    try:
+        start = time.perf_counter()
+        result["bcn_edges"] = list(bcn.biconnect(nxgraph, mode=bicon_mode))
+        nxgraph.add_edges_from(result["bcn_edges"])
+        timings["biconnect"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        result["trng_edges"] = list(trng.triangulate(nxgraph, mode=trng_mode))
+        nxgraph.add_edges_from(result["trng_edges"])
+        timings["triangulate"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        with instrument.span("pipeline.check_planarity"):
+            result["is_planar"] = nx.check_planarity(nxgraph)[0]
+        timings["planarity"] = time.perf_counter() - start
+    except Exception as err:
+        # one bad graph must not take the whole batch down with it
+        result["error"] = "%s: %s" % (type(err).__name__, err)
+    if cache is not None:
+        cache.put(key, {"bcn_edges": [(labelling[u], labelling[v]) for u, v in result["bcn_edges"]]
+            , "trng_edges": [(labelling[u], labelling[v]) for u, v in result["trng_edges"]]
+            , "is_planar": result["is_planar"], "error": result["error"]})
+    return result
+
+def _run_chunk(chunk, bicon_mode, trng_mode, instrumented=False):
+    """Runs the pipeline on a chunk of (index, graph) pairs.
+
+    Returns:
+        items: The (index, result) pairs.
+        metrics: The instrument snapshot of the chunk, None unless
+            instrumented.
+    """
+    if instrumented:
+        instrument.reset()
+        instrument.enable()
+    items = [(idx, run_pipeline(graph, bicon_mode, trng_mode))
+             for idx, graph in chunk]
+    return items, instrument.snapshot(profile_limit=0) if instrumented else None
+
+def process_batch(graphs, workers=None, chunksize=64
+        , bicon_mode="greedy", trng_mode="chordal"):
+    """Runs the pipeline over many graphs on a process pool.
+
+    Graphs are read lazily from the iterable and sent to the workers in
+    chunks, with at most two chunks per worker in flight, so memory
+    stays bounded however long the input is. Results are yielded as
+    soon as their chunk finishes, hence not necessarily in input order.
+    When instrument is enabled, the timers and counters of the workers
+    are merged into those of the calling process.
+
+    Args:
+        graphs: An iterable of NetworkX Graph objects or edge lists.
+        workers: Number of worker processes (None: one per CPU,
+            1: run in the calling process).
+        chunksize: Number of graphs sent to a worker at once.
+        bicon_mode: Mode passed to biconnectivity.biconnect.
+        trng_mode: Mode passed to triangularity.triangulate.
+
+    Yields:
+        (index, result): Position of the graph in the input and the
+            dictionary returned by run_pipeline.
+    """
+    indexed = enumerate(graphs)
+    if workers == 1:
+        for idx, graph in indexed:
+            yield idx, run_pipeline(graph, bicon_mode, trng_mode)
+        return
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        max_pending = 2 * workers
+        pending = set()
+        while True:
+            while len(pending) < max_pending:
+                chunk = list(itertools.islice(indexed, chunksize))
+                if not chunk:
+                    break
+                pending.add(executor.submit(_run_chunk, chunk
+                    , bicon_mode, trng_mode, instrument.is_enabled()))
+            if not pending:
+                break
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                items, metrics = future.result()
+                if metrics is not None:
+                    instrument.merge(metrics)
+                for item in items:
+                    yield item
+
+def summarize_timings(results):
+    """Adds up per-stage timings of pipeline results.
+
+    Args:
+        results: An iterable of (index, result) pairs from process_batch.
+
+    Returns:
+        totals: A dictionary mapping each stage to its total seconds.
+    """
+    totals = dict.fromkeys(STAGES, 0.0)
+    for _, result in results:
+        for stage, seconds in result["timings"].items():
+            totals[stage] += seconds
+    return totals
@@ -0,0 +1,123 @@
+"""Rendering Module
+
+This module draws catalogues of small graphs as grids, headlessly and
+in bulk: layouts are computed once per isomorphism class and cached,
+and all edges of a page are drawn as a single LineCollection, so the
+cost of a page barely depends on how many graphs it holds.
+
+This module contains the following functions:
+
+    * graph_layout - cached layout of a graph as a position array.
+    * draw_grid - draws graphs in a grid on one matplotlib Axes.
+    * render_grid - writes graphs as PNG/SVG pages of grids.
+"""
+import math
+
+import networkx as nx
+import numpy as np
+from matplotlib.collections import LineCollection
+from matplotlib.figure import Figure
+
+from canonical import canonical_labelling
+
+# layouts of canonical forms, keyed by (layout function, form)
+_LAYOUTS = {}
+
+def graph_layout(edges, nodes=None, layout=nx.kamada_kawai_layout):
+    """Computes the layout of a graph, reusing the one of any isomorphic
+    graph laid out before.
+
+    The layout is computed on the canonical form and mapped back
+    through the canonical labelling, then scaled into the unit square.
+
+    Args:
+        edges: A list of edges (u, v).
+        nodes: Optional iterable of vertices, to keep isolated ones.
+        layout: A NetworkX layout function taking a graph.
+
+    Returns:
+        nodelist: A list of the vertices.
+        positions: A (n, 2) NumPy array, row i placing nodelist[i].
+    """
+    form, labelling, _ = canonical_labelling(edges, nodes)
+    key = (layout, form)
+    coords = _LAYOUTS.get(key)
+    if coords is None:
+        nodecnt, form_edges = form
+        nxgraph = nx.Graph()
+        nxgraph.add_nodes_from(range(nodecnt))
+        nxgraph.add_edges_from(form_edges)
+        pos = layout(nxgraph) if nodecnt > 1 else {0: (0.0, 0.0)}
+        coords = np.array([pos[v] for v in range(nodecnt)], dtype=float).reshape(-1, 2)
+        if nodecnt:
+            coords -= coords.min(axis=0)
+            extent = coords.max()
+            if extent > 0:
+                coords /= extent
+            else:
+                coords += 0.5
+        _LAYOUTS[key] = coords
+    nodelist = list(labelling)
+    return nodelist, coords[[labelling[v] for v in nodelist]]
+
+def draw_grid(ax, graphs, dotsize=20, layout=nx.kamada_kawai_layout, cols=None):
+    """Draws graphs in a grid on one Axes, with one LineCollection for
+    all edges and one scatter for all vertices.
+
+    Args:
+        ax: A matplotlib Axes.
+        graphs: A list of edge lists.
+        dotsize: Marker size of the vertices.
+        layout: A NetworkX layout function taking a graph.
+        cols: Number of columns, about the square root of the count
+              by default.
+    """
+    cols = cols or max(1, math.ceil(math.sqrt(len(graphs))))
+    segments = []
+    points = []
+    for i, edges in enumerate(graphs):
+        nodelist, coords = graph_layout(edges, layout=layout)
+        # cells are 1x1, the drawing takes the middle 80%
+        coords = 0.1 + 0.8 * coords + (i % cols, -(i // cols))
+        where = {v: row for row, v in enumerate(nodelist)}
+        segments.extend((coords[where[u]], coords[where[v]]) for u, v in edges)
+        points.append(coords)
+    if segments:
+        ax.add_collection(LineCollection(segments, colors="k", linewidths=0.8))
+    if points:
+        points = np.concatenate(points)
+        ax.scatter(points[:, 0], points[:, 1], s=dotsize, zorder=2)
+    rows = max(1, math.ceil(len(graphs) / cols))
+    ax.set_xlim(0, cols)
+    ax.set_ylim(1 - rows, 1)
+    ax.set_aspect("equal")
+    ax.axis("off")
+
+def render_grid(graphs, path, per_page=100, dotsize=20
+        , layout=nx.kamada_kawai_layout, cellsize=1.0):
+    """Writes graphs as pages of grids without a GUI backend.
+
+    Args:
+        graphs: An iterable of edge lists.
+        path: File name pattern with a {page} field; the extension
+              (.png, .svg, ...) picks the format.
+        per_page: Number of graphs on each page.
+        dotsize: Marker size of the vertices.
+        layout: A NetworkX layout function taking a graph.
+        cellsize: Size in inches of each grid cell.
+
+    Returns:
+        paths: A list of the files written.
+    """
+    graphs = list(graphs)
+    paths = []
+    for page, start in enumerate(range(0, len(graphs), per_page)):
+        chunk = graphs[start:start + per_page]
+        cols = max(1, math.ceil(math.sqrt(len(chunk))))
+        rows = math.ceil(len(chunk) / cols)
+        fig = Figure(figsize=(cols * cellsize, rows * cellsize))
+        ax = fig.add_axes((0, 0, 1, 1))
+        draw_grid(ax, chunk, dotsize=dotsize, layout=layout, cols=cols)
+        paths.append(path.format(page=page))
+        fig.savefig(paths[-1])
+    return paths
@@ -0,0 +1,264 @@
+"""Server Module
+
+This module serves Dual_to_RFP_api.graph_to_rfp over HTTP with the
+standard asyncio library only. The dual computation runs on a process
+pool so the event loop stays responsive:
+
+    * at most max_inflight computations run at once, and at most
+      max_queue more wait for a slot; beyond that requests get a 503.
+    * concurrent identical requests share a single computation.
+    * a computation whose every client has gone away is cancelled. A
+      computation not yet started never reaches the pool; one already
+      running on a worker finishes there, but its result is dropped,
+      and it keeps its slot until it does. A client that closes its
+      end of the connection, even only its write side, has gone away.
+    * request bodies over max_body bytes get a 413.
+
+Usage:
+
+    python server.py [--host HOST] [--port PORT] [--workers N]
+                     [--max-body BYTES] [--metrics]
+
+and POST the graph data as JSON to /rfp. With --metrics, GET /metrics
+returns the instrument timers and counters of the server and of its
+workers in the Prometheus text format.
+
+This module contains the following classes and functions:
+
+    * Busy - raised when the request queue is full.
+    * FloorplanServer - the HTTP front end.
+    * main - runs the server from the command line.
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from http import HTTPStatus
+
+import Dual_to_RFP_api as api
+import instrument
+
+def _instrumented_rfp(input_data):
+    """Runs graph_to_rfp on a worker and returns its result with the
+    instrument snapshot of the call."""
+    instrument.reset()
+    instrument.enable()
+    return api.graph_to_rfp(input_data), instrument.snapshot(profile_limit=0)
+
+class Busy(Exception):
+    """Raised when the request queue is full."""
+
+class _TooLarge(Exception):
+    """Raised when a request body exceeds max_body."""
+
+class FloorplanServer:
+    """HTTP front end computing floorplans on a process pool."""
+
+    def __init__(self, workers=None, max_inflight=None, max_queue=64
+            , max_body=16 * 1024 * 1024):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_inflight = max_inflight or self.workers
+        self.max_queue = max_queue
+        self.max_body = max_body
+        self._executor = None
+        self._slots = None
+        # request key -> [computation task, number of waiting clients]
+        self._jobs = {}
+
+    def _release(self, loop):
+        """Frees a slot from any thread once a pool worker is done."""
+        try:
+            loop.call_soon_threadsafe(self._slots.release)
+        except RuntimeError:
+            # the loop is already closed
+            pass
+
+    async def _run(self, input_data):
+        """Waits for a slot, then computes on the process pool. The slot
+        is held until the worker is done, even if the request is
+        cancelled meanwhile."""
+        await self._slots.acquire()
+        loop = asyncio.get_running_loop()
+        instrumented = instrument.is_enabled()
+        try:
+            work = self._executor.submit(
+                _instrumented_rfp if instrumented else api.graph_to_rfp, input_data)
+        except BaseException:
+            self._slots.release()
+            raise
+        work.add_done_callback(lambda _: self._release(loop))
+        if not instrumented:
+            return await asyncio.wrap_future(work)
+        output_data, metrics = await asyncio.wrap_future(work)
+        instrument.merge(metrics)
+        return output_data
+
+    async def compute(self, input_data):
+        """Computes the floorplans of a request, sharing the computation
+        with identical requests in progress.
+
+        Returns:
+            output_data: The value of graph_to_rfp.
+
+        Raises:
+            Busy: If max_queue computations already wait for a slot.
+        """
+        key = hashlib.sha256(json.dumps(input_data, sort_keys=True).encode()).hexdigest()
+        job = self._jobs.get(key)
+        instrument.count("server.requests")
+        if job is None:
+            # every job is either running or waiting for a slot
+            if len(self._jobs) >= self.max_inflight + self.max_queue:
+                instrument.count("server.rejected")
+                raise Busy()
+            task = asyncio.ensure_future(self._run(input_data))
+            job = self._jobs[key] = [task, 0]
+
+            def forget(_, key=key, job=job):
+                if self._jobs.get(key) is job:
+                    del self._jobs[key]
+            task.add_done_callback(forget)
+        else:
+            instrument.count("server.coalesced")
+        job[1] += 1
+        try:
+            return await asyncio.shield(job[0])
+        finally:
+            job[1] -= 1
+            if job[1] == 0 and not job[0].done():
+                job[0].cancel()
+
+    async def _read_request(self, reader):
+        """Reads one HTTP request.
+
+        Returns:
+            method, path, body: The request line parts and the body bytes.
+
+        Raises:
+            _TooLarge: If Content-Length exceeds max_body.
+        """
+        head = await reader.readuntil(b"\r\n\r\n")
+        lines = head.decode("latin-1").split("\r\n")
+        method, path, _ = lines[0].split(" ", 2)
+        headers = {}
+        for line in lines[1:]:
+            if ":" in line:
+                name, value = line.split(":", 1)
+                headers[name.strip().lower()] = value.strip()
+        length = int(headers.get("content-length", 0))
+        if length > self.max_body:
+            raise _TooLarge()
+        body = await reader.readexactly(length) if length else b""
+        return method, path, body
+
+    @staticmethod
+    def _respond(writer, status, payload, extra=(), content_type="application/json"):
+        body = payload.encode() if isinstance(payload, str) else json.dumps(payload).encode()
+        head = ["HTTP/1.1 %d %s" % (status, status.phrase)
+            , "Content-Type: %s" % content_type
+            , "Content-Length: %d" % len(body), "Connection: close"]
+        head.extend(extra)
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body)
+
+    @staticmethod
+    async def _hangup(reader):
+        """Returns once the client closes its end of the connection or
+        the connection is lost; anything it sends meanwhile is read and
+        dropped."""
+        try:
+            while await reader.read(4096):
+                pass
+        except ConnectionError:
+            pass
+
+    async def handle(self, reader, writer):
+        """Serves one connection: one request, one response."""
+        try:
+            try:
+                method, path, body = await self._read_request(reader)
+            except (asyncio.IncompleteReadError, asyncio.LimitOverrunError
+                    , ValueError):
+                self._respond(writer, HTTPStatus.BAD_REQUEST, {"error": "Malformed request."})
+                return
+            except _TooLarge:
+                self._respond(writer, HTTPStatus.REQUEST_ENTITY_TOO_LARGE
+                    , {"error": "Request body too large."})
+                return
+            if path == "/metrics" and method == "GET" and instrument.is_enabled():
+                self._respond(writer, HTTPStatus.OK, instrument.to_prometheus()
+                    , content_type="text/plain; version=0.0.4")
+                await writer.drain()
+                return
+            if path != "/rfp":
+                self._respond(writer, HTTPStatus.NOT_FOUND, {"error": "Unknown path."})
+                return
+            if method != "POST":
+                self._respond(writer, HTTPStatus.METHOD_NOT_ALLOWED, {"error": "Use POST."})
+                return
+            try:
+                input_data = json.loads(body)
+            except ValueError:
+                self._respond(writer, HTTPStatus.BAD_REQUEST, {"error": "Body is not JSON."})
+                return
+            compute = asyncio.ensure_future(self.compute(input_data))
+            # the client closing its end means nobody wants the answer
+            hangup = asyncio.ensure_future(self._hangup(reader))
+            await asyncio.wait({compute, hangup}, return_when=asyncio.FIRST_COMPLETED)
+            if not compute.done():
+                compute.cancel()
+                return
+            hangup.cancel()
+            try:
+                self._respond(writer, HTTPStatus.OK, compute.result())
+            except Busy:
+                self._respond(writer, HTTPStatus.SERVICE_UNAVAILABLE
+                    , {"error": "Too many requests queued."}, ["Retry-After: 1"])
+            except asyncio.CancelledError:
+                self._respond(writer, HTTPStatus.SERVICE_UNAVAILABLE
+                    , {"error": "Computation cancelled."})
+            except Exception as err:
+                self._respond(writer, HTTPStatus.UNPROCESSABLE_ENTITY, {"error": str(err)})
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def serve(self, host="127.0.0.1", port=8000):
+        """Serves requests until cancelled."""
+        self._slots = asyncio.Semaphore(self.max_inflight)
+        # forked workers would inherit the sockets of open connections
+        # and keep them open after the server closes them
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context(
+            "forkserver" if "forkserver" in methods else "spawn")
+        with ProcessPoolExecutor(max_workers=self.workers, mp_context=context) as executor:
+            self._executor = executor
+            server = await asyncio.start_server(self.handle, host, port)
+            async with server:
+                await server.serve_forever()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Floorplan API server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--max-inflight", type=int, default=None)
+    parser.add_argument("--max-queue", type=int, default=64)
+    parser.add_argument("--max-body", type=int, default=16 * 1024 * 1024
+        , help="largest request body accepted, in bytes")
+    parser.add_argument("--metrics", action="store_true"
+        , help="collect timings and counters and serve them on /metrics")
+    args = parser.parse_args(argv)
+    if args.metrics:
+        instrument.enable()
+    server = FloorplanServer(args.workers, args.max_inflight, args.max_queue
+        , args.max_body)
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
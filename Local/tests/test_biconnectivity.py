@@ -0,0 +1,71 @@
+import random
+
+import networkx as nx
+import pytest
+
+import biconnectivity as bcn
+
+def _assert_matches(index, nxgraph):
+    assert set(index.cut_vertices) == set(nx.articulation_points(nxgraph))
+    assert index.is_connected() == nx.is_connected(nxgraph)
+    assert index.is_biconnected() == (nxgraph.number_of_nodes() > 1
+        and nx.is_biconnected(nxgraph))
+    block_of = {}
+    for i, block in enumerate(nx.biconnected_components(nxgraph)):
+        for node in block:
+            block_of.setdefault(node, set()).add(i)
+    for u in nxgraph:
+        for v in nxgraph:
+            expected = bool(block_of.get(u, set()) & block_of.get(v, set()))
+            assert index.same_block(u, v) == expected, (u, v)
+
+@pytest.mark.parametrize("seed", range(20))
+def test_incremental_index_follows_insertions(seed):
+    rng = random.Random(seed)
+    nodecnt = rng.randint(2, 16)
+    nxgraph = nx.Graph()
+    nxgraph.add_nodes_from(range(nodecnt))
+    index = bcn.IncrementalBlockCut(nxgraph)
+    for _ in range(2 * nodecnt):
+        u, v = rng.randrange(nodecnt), rng.randrange(nodecnt)
+        index.add_edge(u, v)
+        nxgraph.add_edge(u, v)
+        nxgraph.remove_edges_from(nx.selfloop_edges(nxgraph))
+        _assert_matches(index, nxgraph)
+
+@pytest.mark.parametrize("seed", range(10))
+def test_incremental_index_starts_from_a_graph(seed):
+    rng = random.Random(seed)
+    nxgraph = nx.random_labeled_tree(30, seed=seed)
+    index = bcn.IncrementalBlockCut(nxgraph)
+    _assert_matches(index, nxgraph)
+    for _ in range(15):
+        u, v = rng.sample(range(30), 2)
+        index.add_edge(u, v)
+        nxgraph.add_edge(u, v)
+        _assert_matches(index, nxgraph)
+
+def test_incremental_index_adds_new_vertices():
+    index = bcn.IncrementalBlockCut()
+    nxgraph = nx.Graph()
+    for u, v in [(0, 1), (1, 2), (5, 6), (2, 0), (2, 5), (6, 0)]:
+        index.add_edge(u, v)
+        nxgraph.add_edge(u, v)
+        _assert_matches(index, nxgraph)
+
+@pytest.mark.parametrize("seed", range(20))
+def test_greedy_biconnect(seed):
+    rng = random.Random(seed)
+    nodecnt = rng.randint(3, 40)
+    nxgraph = nx.random_labeled_tree(nodecnt, seed=seed)
+    nxgraph.add_edges_from(rng.sample(list(nx.non_edges(nxgraph))
+        , rng.randint(0, nodecnt // 2)))
+    edges = bcn.biconnect(nxgraph)
+    assert not any(nxgraph.has_edge(u, v) for u, v in edges)
+    augmented = nxgraph.copy()
+    augmented.add_edges_from(edges)
+    assert nx.is_biconnected(augmented)
+
+def test_greedy_biconnect_skips_self_loop_on_cut_vertex():
+    nxgraph = nx.Graph([(1, 1), (0, 1), (1, 2)])
+    assert bcn.biconnect(nxgraph) == {(0, 2)}
@@ -0,0 +1,58 @@
+import random
+
+import networkx as nx
+import pytest
+
+import library
+
+def _random_graph(nodecnt, edgecnt, rng):
+    pairs = [(u, v) for v in range(nodecnt) for u in range(v)]
+    return nodecnt, sorted(rng.sample(pairs, min(edgecnt, len(pairs))))
+
+def _sorted(graph):
+    nodecnt, edges = graph
+    return nodecnt, sorted(edges)
+
+def _graphs():
+    rng = random.Random(0)
+    graphs = [(0, []), (1, []), (2, [(0, 1)]), (5, [])]
+    # 63 and 258048 vertices need the longer size prefixes
+    for nodecnt in (3, 7, 30, 62, 63, 64, 200):
+        for edgecnt in (0, nodecnt // 2, nodecnt, 3 * nodecnt):
+            graphs.append(_random_graph(nodecnt, edgecnt, rng))
+    graphs.append((258048, [(0, 1), (5, 258047)]))
+    return graphs
+
+@pytest.mark.parametrize("fmt", ["graph6", "sparse6"])
+def test_records_round_trip(fmt):
+    encode = {"graph6": library.encode_graph6
+        , "sparse6": library.encode_sparse6}[fmt]
+    for nodecnt, edges in _graphs():
+        if fmt == "graph6" and nodecnt > 1000:
+            continue
+        assert _sorted(library.decode(encode(nodecnt, edges))) \
+            == (nodecnt, edges)
+
+def test_records_match_networkx():
+    for nodecnt, edges in _graphs():
+        if nodecnt > 1000:
+            continue
+        nxgraph = nx.Graph()
+        nxgraph.add_nodes_from(range(nodecnt))
+        nxgraph.add_edges_from(edges)
+        assert library.encode_graph6(nodecnt, edges) \
+            == nx.to_graph6_bytes(nxgraph, header=False).rstrip(b"\n")
+        decoded = nx.from_sparse6_bytes(library.encode_sparse6(nodecnt, edges))
+        assert decoded.number_of_nodes() == nodecnt
+        assert sorted(tuple(sorted(e)) for e in decoded.edges()) == edges
+
+@pytest.mark.parametrize("fmt", ["graph6", "sparse6"])
+def test_library_round_trip(tmp_path, fmt):
+    graphs = [g for g in _graphs() if g[0] <= 1000]
+    path = str(tmp_path / ("graphs." + fmt))
+    assert library.write_library(path, graphs, fmt=fmt) == len(graphs)
+    with library.GraphLibrary(path) as lib:
+        assert len(lib) == len(graphs)
+        assert [_sorted(g) for g in lib] == graphs
+        assert [_sorted(lib[i]) for i in lib.bucket(3, 3)] \
+            == [g for g in graphs if g[0] == 3 and len(g[1]) == 3]
@@ -0,0 +1,16 @@
+import networkx as nx
+
+import pipeline
+
+def test_any_exception_is_recorded(monkeypatch):
+    def broken(nxgraph, mode):
+        raise KeyError(7)
+    monkeypatch.setattr(pipeline.bcn, "biconnect", broken)
+    result = pipeline.run_pipeline(nx.path_graph(4))
+    assert result["error"] == "KeyError: 7"
+    assert result["is_planar"] is None
+
+def test_clean_run_has_no_error():
+    result = pipeline.run_pipeline(nx.path_graph(4))
+    assert result["error"] is None
+    assert result["is_planar"]
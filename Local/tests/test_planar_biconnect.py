@@ -0,0 +1,82 @@
+import itertools
+import random
+
+import networkx as nx
+import pytest
+
+import biconnectivity as bcn
+
+def _augmented(nxgraph):
+    edges = bcn.planar_biconnect(nxgraph)
+    augmented = nxgraph.copy()
+    augmented.add_edges_from(edges)
+    return augmented, edges
+
+def _shuffled(nxgraph, rng):
+    order = list(nxgraph)
+    rng.shuffle(order)
+    shuffled = nx.Graph()
+    shuffled.add_nodes_from(order)
+    shuffled.add_edges_from(nxgraph.edges())
+    return shuffled
+
+@pytest.mark.parametrize("order", list(itertools.permutations(range(3))))
+def test_path_in_every_node_order(order):
+    nxgraph = nx.Graph()
+    nxgraph.add_nodes_from(order)
+    nxgraph.add_edges_from([(0, 1), (1, 2)])
+    augmented, edges = _augmented(nxgraph)
+    assert nx.is_biconnected(augmented)
+    assert len(edges) == 1
+
+@pytest.mark.parametrize("order", list(itertools.permutations(range(3))))
+def test_edge_and_isolated_vertex_in_every_node_order(order):
+    nxgraph = nx.Graph()
+    nxgraph.add_nodes_from(order)
+    nxgraph.add_edge(1, 2)
+    augmented, _ = _augmented(nxgraph)
+    assert nx.is_biconnected(augmented)
+
+@pytest.mark.parametrize("seed", range(40))
+def test_shuffled_trees_meet_the_bound(seed):
+    rng = random.Random(seed)
+    tree = nx.random_labeled_tree(rng.randint(3, 60), seed=seed)
+    nxgraph = _shuffled(tree, rng)
+    augmented, edges = _augmented(nxgraph)
+    assert nx.is_biconnected(augmented)
+    assert nx.check_planarity(augmented)[0]
+    assert len(edges) == bcn.augmentation_bound(nxgraph)
+
+@pytest.mark.parametrize("shape", [(2, 3), (2, 5), (3, 3)])
+def test_balanced_trees_meet_the_bound(shape):
+    nxgraph = nx.balanced_tree(*shape)
+    _, edges = _augmented(nxgraph)
+    assert len(edges) == bcn.augmentation_bound(nxgraph)
+
+@pytest.mark.parametrize("seed", range(20))
+def test_disconnected_planar_graphs(seed):
+    rng = random.Random(seed)
+    parts = [nx.random_labeled_tree(rng.randint(1, 15), seed=seed)
+             , nx.cycle_graph(rng.randint(3, 8)), nx.empty_graph(rng.randint(1, 3))]
+    nxgraph = _shuffled(nx.disjoint_union_all(parts), rng)
+    augmented, _ = _augmented(nxgraph)
+    assert nx.is_biconnected(augmented)
+    assert nx.check_planarity(augmented)[0]
+
+@pytest.mark.parametrize("seed", range(20))
+def test_shuffled_planar_graphs(seed):
+    rng = random.Random(seed)
+    nodecnt = rng.randint(5, 40)
+    nxgraph = nx.random_labeled_tree(nodecnt, seed=seed)
+    for _ in range(nodecnt):
+        u, v = rng.sample(range(nodecnt), 2)
+        nxgraph.add_edge(u, v)
+        if not nx.check_planarity(nxgraph)[0]:
+            nxgraph.remove_edge(u, v)
+    augmented, _ = _augmented(_shuffled(nxgraph, rng))
+    assert nx.is_biconnected(augmented)
+    assert nx.check_planarity(augmented)[0]
+
+def test_non_planar_graph_raises():
+    with pytest.raises(nx.NetworkXException):
+        bcn.planar_biconnect(nx.complete_graph(5))
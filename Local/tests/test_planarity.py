@@ -0,0 +1,66 @@
+import random
+
+import networkx as nx
+import pytest
+
+from Planarity import make_Planar
+
+def _naive(nxgraph, edges):
+    """Spanning forest first, then every edge that keeps it planar."""
+    forest = nx.Graph()
+    forest.add_nodes_from(nxgraph)
+    rest = []
+    for u, v in edges:
+        if u != v and not nx.has_path(forest, u, v):
+            forest.add_edge(u, v)
+        elif u != v:
+            rest.append((u, v))
+    for u, v in rest:
+        forest.add_edge(u, v)
+        if not nx.check_planarity(forest)[0]:
+            forest.remove_edge(u, v)
+    return forest
+
+def _edge_set(edges):
+    return {frozenset(e) for e in edges}
+
+@pytest.mark.parametrize("seed", range(25))
+def test_matches_naive_greedy(seed):
+    rng = random.Random(seed)
+    nodecnt = rng.randint(5, 40)
+    nxgraph = nx.gnm_random_graph(nodecnt, rng.randint(nodecnt, 5 * nodecnt)
+        , seed=seed)
+    planar_graph, dropped = make_Planar(nxgraph)
+    expected = _naive(nxgraph, list(nxgraph.edges()))
+    assert _edge_set(planar_graph.edges()) == _edge_set(expected.edges())
+    assert _edge_set(dropped) == _edge_set(nxgraph.edges()) \
+        - _edge_set(expected.edges())
+
+@pytest.mark.parametrize("seed", range(10))
+def test_weights_set_the_priority(seed):
+    rng = random.Random(seed)
+    nxgraph = nx.gnm_random_graph(20, 80, seed=seed)
+    for u, v in nxgraph.edges():
+        nxgraph.edges[u, v]["w"] = rng.random()
+    planar_graph, _ = make_Planar(nxgraph, weight="w")
+    edges = sorted(nxgraph.edges(), key=lambda e: -nxgraph.edges[e]["w"])
+    expected = _naive(nxgraph, edges)
+    assert _edge_set(planar_graph.edges()) == _edge_set(expected.edges())
+
+@pytest.mark.parametrize("nxgraph", [nx.complete_graph(5)
+    , nx.complete_bipartite_graph(3, 3), nx.petersen_graph()
+    , nx.complete_graph(12)])
+def test_every_dropped_edge_breaks_planarity(nxgraph):
+    planar_graph, dropped = make_Planar(nxgraph)
+    assert nx.check_planarity(planar_graph)[0]
+    assert dropped
+    for u, v in dropped:
+        planar_graph.add_edge(u, v)
+        assert not nx.check_planarity(planar_graph)[0]
+        planar_graph.remove_edge(u, v)
+
+def test_planar_graph_is_kept_whole():
+    nxgraph = nx.convert_node_labels_to_integers(nx.grid_2d_graph(8, 8))
+    planar_graph, dropped = make_Planar(nxgraph)
+    assert dropped == []
+    assert _edge_set(planar_graph.edges()) == _edge_set(nxgraph.edges())
@@ -0,0 +1,18 @@
+import networkx as nx
+
+from rendering import graph_layout
+
+def test_empty_graph_has_empty_layout():
+    nodelist, positions = graph_layout([], layout=nx.circular_layout)
+    assert nodelist == []
+    assert positions.shape == (0, 2)
+
+def test_layout_fits_the_unit_square():
+    _, positions = graph_layout(list(nx.cycle_graph(5).edges())
+        , layout=nx.circular_layout)
+    assert positions.shape == (5, 2)
+    assert positions.min() == 0 and positions.max() == 1
+
+def test_single_vertex_is_centred():
+    _, positions = graph_layout([], nodes=[3], layout=nx.circular_layout)
+    assert positions.tolist() == [[0.5, 0.5]]
@@ -0,0 +1,67 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+# the API computes the duals with GPLAN
+pytest.importorskip("source.inputgraph")
+import server
+
+def _request(body):
+    return b"POST /rfp HTTP/1.1\r\nContent-Length: %d\r\n\r\n%s" % (len(body), body)
+
+def test_closed_connection_cancels_its_computation():
+    started, cancelled = asyncio.Event(), asyncio.Event()
+
+    class Stalled(server.FloorplanServer):
+        async def _run(self, input_data):
+            started.set()
+            try:
+                await asyncio.Event().wait()
+            finally:
+                cancelled.set()
+
+    async def run():
+        floorplans = Stalled(max_inflight=1)
+        listener = await asyncio.start_server(floorplans.handle, "127.0.0.1", 0)
+        async with listener:
+            port = listener.sockets[0].getsockname()[1]
+            _, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(_request(b'{"nodes": []}'))
+            await asyncio.wait_for(started.wait(), 5)
+            writer.close()
+            await asyncio.wait_for(cancelled.wait(), 5)
+            await asyncio.sleep(0)
+            assert not floorplans._jobs
+
+    asyncio.run(run())
+
+def test_cancelled_computation_keeps_its_slot(monkeypatch):
+    started, finish = threading.Event(), threading.Event()
+
+    def blocking(input_data):
+        started.set()
+        finish.wait(5)
+        return []
+    monkeypatch.setattr(server.api, "graph_to_rfp", blocking)
+
+    async def run():
+        floorplans = server.FloorplanServer(max_inflight=1)
+        floorplans._slots = asyncio.Semaphore(1)
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            floorplans._executor = executor
+            task = asyncio.ensure_future(floorplans.compute({"a": 1}))
+            await asyncio.get_running_loop().run_in_executor(None, started.wait, 5)
+            task.cancel()
+            await asyncio.sleep(0.05)
+            # the worker is still busy, so its slot is not free yet
+            assert floorplans._slots.locked()
+            finish.set()
+            for _ in range(100):
+                if not floorplans._slots.locked():
+                    break
+                await asyncio.sleep(0.01)
+            assert not floorplans._slots.locked()
+
+    asyncio.run(run())
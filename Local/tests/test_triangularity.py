@@ -0,0 +1,163 @@
+import random
+
+import networkx as nx
+import pytest
+
+import triangularity as trng
+
+def _separating_triangles(nxgraph):
+    # a maximal planar graph on n > 3 vertices has 2n - 4 faces
+    nodecnt = nxgraph.number_of_nodes()
+    return sum(nx.triangles(nxgraph).values()) // 3 - (2 * nodecnt - 4)
+
+def _triangulated(nxgraph):
+    triangulated = nxgraph.copy()
+    triangulated.add_edges_from(trng.planar_triangulate(nxgraph))
+    return triangulated
+
+def _random_planar(nodecnt, rng):
+    nxgraph = nx.cycle_graph(nodecnt)
+    for _ in range(rng.randint(0, 2 * nodecnt)):
+        u, v = rng.sample(range(nodecnt), 2)
+        nxgraph.add_edge(u, v)
+        if not nx.check_planarity(nxgraph)[0]:
+            nxgraph.remove_edge(u, v)
+    return nxgraph
+
+def _assert_maximal_planar(nxgraph, triangulated):
+    nodecnt = nxgraph.number_of_nodes()
+    assert set(nxgraph.edges()) <= set(triangulated.edges())
+    assert triangulated.number_of_edges() == 3 * nodecnt - 6
+    assert nx.check_planarity(triangulated)[0]
+
+@pytest.mark.parametrize("nodecnt", range(6, 16))
+def test_cycle_gets_no_separating_triangle(nodecnt):
+    nxgraph = nx.cycle_graph(nodecnt)
+    triangulated = _triangulated(nxgraph)
+    _assert_maximal_planar(nxgraph, triangulated)
+    assert _separating_triangles(triangulated) == 0
+
+@pytest.mark.parametrize("rows,cols", [(2, 3), (3, 3), (4, 5), (6, 6)])
+def test_grid_gets_no_separating_triangle(rows, cols):
+    nxgraph = nx.convert_node_labels_to_integers(nx.grid_2d_graph(rows, cols))
+    triangulated = _triangulated(nxgraph)
+    _assert_maximal_planar(nxgraph, triangulated)
+    assert _separating_triangles(triangulated) == 0
+
+def test_wheel_is_triangulated():
+    nxgraph = nx.wheel_graph(50)
+    _assert_maximal_planar(nxgraph, _triangulated(nxgraph))
+
+@pytest.mark.parametrize("seed", range(30))
+def test_random_planar_graphs_are_triangulated(seed):
+    rng = random.Random(seed)
+    nxgraph = _random_planar(rng.randint(4, 40), rng)
+    _assert_maximal_planar(nxgraph, _triangulated(nxgraph))
+
+def test_non_biconnected_graph_raises():
+    with pytest.raises(nx.NetworkXException):
+        trng.planar_triangulate(nx.path_graph(5))
+
+def _has_path_mcs_m(nxgraph):
+    """MCS-M as make_chordal ran it before the bucketed search."""
+    alpha = {}
+    chords = set()
+    weight = {node: 0 for node in nxgraph}
+    unnumbered_nodes = list(nxgraph)
+    for i in range(nxgraph.number_of_nodes(), 0, -1):
+        z = max(unnumbered_nodes, key=lambda node: weight[node])
+        unnumbered_nodes.remove(z)
+        alpha[z] = i
+        update_nodes = []
+        for y in unnumbered_nodes:
+            if nxgraph.has_edge(y, z):
+                update_nodes.append(y)
+            else:
+                lower_nodes = [node for node in unnumbered_nodes
+                               if weight[node] < weight[y]]
+                if nx.has_path(nxgraph.subgraph(lower_nodes + [z, y]), y, z):
+                    update_nodes.append(y)
+                    chords.add((z, y))
+        for node in update_nodes:
+            weight[node] += 1
+    return alpha, chords
+
+@pytest.mark.parametrize("seed", range(40))
+def test_mcs_m_matches_has_path_version(seed):
+    rng = random.Random(seed)
+    nxgraph = nx.gnp_random_graph(rng.randint(1, 14), rng.random(), seed=seed)
+    if seed % 3 == 0:
+        nxgraph = nx.relabel_nodes(nxgraph, {u: -3 * u for u in nxgraph})
+    assert trng.mcs_m(nxgraph) == _has_path_mcs_m(nxgraph)
+    assert trng.make_chordal(nxgraph) == _has_path_mcs_m(nxgraph)[1]
+
+def test_chordal_graph_gets_no_fill():
+    assert not trng.make_chordal(nx.complete_graph(5))
+    assert not trng.make_chordal(nx.balanced_tree(2, 4))
+
+@pytest.mark.parametrize("seed", range(40))
+def test_is_chordal_matches_networkx(seed):
+    rng = random.Random(seed)
+    nxgraph = nx.gnp_random_graph(rng.randint(1, 20), rng.random(), seed=seed)
+    if seed % 2:
+        nxgraph.add_edges_from(trng.make_chordal(nxgraph))
+    assert trng.is_chordal(nxgraph) == nx.is_chordal(nxgraph)
+
+@pytest.mark.parametrize("nxgraph", [nx.complete_graph(4), nx.cycle_graph(3)
+    , nx.cycle_graph(5), nx.wheel_graph(8), nx.path_graph(4)
+    , nx.convert_node_labels_to_integers(nx.grid_2d_graph(3, 3))])
+def test_chk_chordality_keeps_its_answers(nxgraph):
+    triangles = sum(nx.triangles(nxgraph).values()) // 3
+    expected = nx.is_chordal(nxgraph) or triangles \
+        == 1 - nxgraph.number_of_nodes() + nxgraph.number_of_edges()
+    assert trng.chk_chordality(nxgraph) == expected
+
+def _assert_minimal_triangulation(triangulation, nxgraph):
+    fill = {frozenset(e) for e in triangulation.fill}
+    assert not fill & {frozenset(e) for e in nxgraph.edges()}
+    chordal = nxgraph.copy()
+    chordal.add_edges_from(triangulation.fill)
+    assert nx.is_chordal(chordal)
+    # a triangulation is minimal when no single chord can be dropped
+    for u, v in triangulation.fill:
+        chordal.remove_edge(u, v)
+        assert not nx.is_chordal(chordal)
+        chordal.add_edge(u, v)
+    order = triangulation.ordering()
+    for node in chordal:
+        later = [w for w in chordal[node] if order[w] > order[node]]
+        assert all(chordal.has_edge(a, b)
+                   for i, a in enumerate(later) for b in later[i + 1:])
+
+@pytest.mark.parametrize("seed", range(20))
+def test_incremental_triangulation_follows_edits(seed):
+    rng = random.Random(seed)
+    nodecnt = rng.randint(4, 14)
+    nxgraph = nx.cycle_graph(nodecnt)
+    triangulation = trng.IncrementalTriangulation(nxgraph)
+    _assert_minimal_triangulation(triangulation, nxgraph)
+    for _ in range(3 * nodecnt):
+        edges = list(nxgraph.edges())
+        if edges and rng.random() < 0.4:
+            u, v = rng.choice(edges)
+            triangulation.remove_edge(u, v)
+            nxgraph.remove_edge(u, v)
+        else:
+            u, v = rng.sample(range(nodecnt + 2), 2)
+            triangulation.add_edge(u, v)
+            nxgraph.add_edge(u, v)
+        _assert_minimal_triangulation(triangulation, nxgraph)
+
+def test_incremental_triangulation_reports_changes():
+    nxgraph = nx.cycle_graph(5)
+    triangulation = trng.IncrementalTriangulation(nxgraph)
+    before = {frozenset(e) for e in triangulation.fill}
+    added, removed = triangulation.add_edge(0, 2)
+    after = {frozenset(e) for e in triangulation.fill}
+    assert after == (before - {frozenset(e) for e in removed}) \
+        | {frozenset(e) for e in added}
+
+def test_removing_a_missing_edge_raises():
+    triangulation = trng.IncrementalTriangulation(nx.path_graph(3))
+    with pytest.raises(nx.NetworkXError):
+        triangulation.remove_edge(0, 2)
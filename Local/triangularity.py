@@ -5,14 +5,100 @@ planar graph.
 
 This module contains the following functions:
 
+    * mcs_m - computes an elimination ordering and its
+              fill edges with the MCS-M algorithm.
     * make_chordal - finds edges to be added to
                      make graph triangulated.
+    * count_triangles - counts the triangles in the graph.
+    * is_chordal - checks chordality in linear time.
     * chk_chordality - checks if the graph is chordal.
+    * planar_triangulate - finds edges to be added to make a
+                           biconnected planar graph maximal planar.
+    * IncrementalTriangulation - keeps a minimal triangulation up
+                                 to date under edge edits.
     * triangulate - triangulates a given graph.
 """
 
+import heapq
 import networkx as nx
 
+import instrument
+from csr import CSRGraph, adjacency_rows
+
+@instrument.timed
+def mcs_m(nxgraph):
+    """Computes an elimination ordering and fill edges using MCS-M.
+
+    Every numbering step runs a single search from the chosen vertex
+    through the unnumbered vertices, visiting them in increasing order
+    of the largest weight seen along the path (one bucket per weight).
+    Unnumbered vertices are kept in a bucket queue keyed on weight, ties
+    being broken by node order, so the result is identical to the
+    has_path formulation while running in O(n*m).
+
+    Args:
+        nxgraph: An instance of NetworkX Graph object, or a CSRGraph.
+
+    Returns:
+        alpha: A dictionary mapping each node to its elimination number.
+        chords: A set of edges (z, y) to be added to the graph.
+    """
+    nodes, adj = adjacency_rows(nxgraph)
+    if isinstance(nxgraph, CSRGraph):
+        # every numbering step rescans the adjacency: lists are faster
+        adj = [row.tolist() for row in adj]
+    nodecnt = len(nodes)
+    weight = [0] * nodecnt
+    numbered = [False] * nodecnt
+    reached = [0] * nodecnt
+    # queue[w] is a heap of vertex indices whose weight was w when pushed
+    queue = [[] for _ in range(nodecnt + 1)]
+    queue[0] = list(range(nodecnt))
+    reach = [[] for _ in range(nodecnt + 1)]
+    top = 0
+    alpha = {}
+    chords = set()
+    for i in range(nodecnt, 0, -1):
+        while True:
+            while not queue[top]:
+                top -= 1
+            z = heapq.heappop(queue[top])
+            if not numbered[z] and weight[z] == top:
+                break
+        numbered[z] = True
+        alpha[nodes[z]] = i
+        reached[z] = i
+        update_nodes = []
+        for y in adj[z]:
+            if not numbered[y]:
+                reached[y] = i
+                update_nodes.append(y)
+                reach[weight[y]].append(y)
+        for j in range(top + 1):
+            bucket = reach[j]
+            while bucket:
+                y = bucket.pop()
+                for x in adj[y]:
+                    if numbered[x] or reached[x] == i:
+                        continue
+                    reached[x] = i
+                    if weight[x] > j:
+                        update_nodes.append(x)
+                        chords.add((nodes[z], nodes[x]))
+                        reach[weight[x]].append(x)
+                    else:
+                        bucket.append(x)
+        # during the search the weights should not be updated
+        for y in update_nodes:
+            weight[y] += 1
+            heapq.heappush(queue[weight[y]], y)
+            if weight[y] > top:
+                top = weight[y]
+    instrument.count("mcs_m.searches", len(nodes))
+    instrument.count("mcs_m.fill_edges", len(chords))
+    return alpha, chords
+
+@instrument.timed
 def make_chordal(nxgraph):
     """Finds edges to be added to make graph triangulated.
 
@@ -22,34 +108,107 @@ def make_chordal(nxgraph):
     Returns:
         edges: A list representing edges to be added.
     """
-    nxgraphcopy = nxgraph.copy()
-    alpha = {node: 0 for node in nxgraphcopy}
-    if nx.is_chordal(nxgraphcopy):
-        return []
-    chords = set()
-    weight = {node: 0 for node in nxgraphcopy.nodes()}
-    unnumbered_nodes = list(nxgraphcopy.nodes())
-    for i in range(len(nxgraphcopy.nodes()), 0, -1):
-        z = max(unnumbered_nodes, key=lambda node: weight[node])
-        unnumbered_nodes.remove(z)
-        alpha[z] = i
-        update_nodes = []
-        for y in unnumbered_nodes:
-            if nxgraph.has_edge(y, z):
-                update_nodes.append(y)
-            else:
-                y_weight = weight[y]
-                lower_nodes = [
-                    node for node in unnumbered_nodes if weight[node] < y_weight
-                ]
-                if nx.has_path(nxgraphcopy.subgraph(lower_nodes + [z, y]), y, z):
-                    update_nodes.append(y)
-                    chords.add((z, y))
-        for node in update_nodes:
-            weight[node] += 1
-    edges = chords
+    alpha, edges = mcs_m(nxgraph)
     return edges
 
+@instrument.timed
+def count_triangles(nxgraph, limit=None):
+    """Counts the triangles of a graph in O(m*sqrt(m)).
+
+    Every edge is oriented from the endpoint of lower degree to the
+    endpoint of higher degree, so each vertex has O(sqrt(m)) out
+    neighbours and every triangle is found exactly once.
+
+    Args:
+        nxgraph: An instance of NetworkX Graph object.
+        limit: Optional integer. Counting stops as soon as the number
+               of triangles found exceeds it.
+
+    Returns:
+        count: An integer representing the number of triangles
+               (limit + 1 if counting was stopped early).
+    """
+    nodes = list(nxgraph.nodes())
+    index = {node: i for i, node in enumerate(nodes)}
+    rank = sorted(range(len(nodes)), key=lambda i: nxgraph.degree(nodes[i]))
+    order = [0] * len(nodes)
+    for pos, i in enumerate(rank):
+        order[i] = pos
+    out = [[] for _ in nodes]
+    for u, v in nxgraph.edges():
+        i, j = index[u], index[v]
+        if i == j:
+            continue
+        if order[i] < order[j]:
+            out[i].append(j)
+        else:
+            out[j].append(i)
+    mark = [-1] * len(nodes)
+    count = 0
+    for u in range(len(nodes)):
+        for v in out[u]:
+            mark[v] = u
+        for v in out[u]:
+            for w in out[v]:
+                if mark[w] == u:
+                    count += 1
+        if limit is not None and count > limit:
+            count = limit + 1
+            break
+    instrument.count("count_triangles.triangles", count)
+    return count
+
+@instrument.timed
+def is_chordal(nxgraph):
+    """Checks if a graph is chordal in O(n+m).
+
+    Maximum cardinality search numbers the vertices from n down to 1,
+    each time taking an unnumbered vertex with the most numbered
+    neighbours from a bucket queue. The graph is chordal exactly when
+    this numbering is a perfect elimination ordering: for every vertex,
+    its higher numbered neighbours other than the lowest one, f, are
+    all neighbours of f (Tarjan and Yannakakis).
+
+    Args:
+        nxgraph: An instance of NetworkX Graph object, or a CSRGraph.
+
+    Returns:
+        boolean: A boolean representing if graph is chordal.
+    """
+    nodes, adj = adjacency_rows(nxgraph)
+    if isinstance(nxgraph, CSRGraph):
+        adj = [row.tolist() for row in adj]
+    nodecnt = len(nodes)
+    weight = [0] * nodecnt
+    number = [0] * nodecnt
+    buckets = [set() for _ in range(nodecnt + 1)]
+    buckets[0].update(range(nodecnt))
+    top = 0
+    for i in range(nodecnt, 0, -1):
+        while not buckets[top]:
+            top -= 1
+        z = buckets[top].pop()
+        number[z] = i
+        for y in adj[z]:
+            if not number[y]:
+                buckets[weight[y]].discard(y)
+                weight[y] += 1
+                buckets[weight[y]].add(y)
+                if weight[y] > top:
+                    top = weight[y]
+    neighbours = {}
+    for v in range(nodecnt):
+        higher = [w for w in adj[v] if number[w] > number[v]]
+        if len(higher) < 2:
+            continue
+        f = min(higher, key=number.__getitem__)
+        if f not in neighbours:
+            neighbours[f] = set(adj[f])
+        if not all(w == f or w in neighbours[f] for w in higher):
+            return False
+    return True
+
+@instrument.timed
 def chk_chordality(nxgraph):
     """Checks chordality of a given graph.
 
@@ -60,25 +219,313 @@ def chk_chordality(nxgraph):
         boolean: A boolean representing if graph
                  requires triangulation.
     """
-    if nx.is_chordal(nxgraph):
+    target = 1 - nxgraph.number_of_nodes() + nxgraph.number_of_edges()
+    if target >= 0 and count_triangles(nxgraph, limit=target) == target:
         return True
-    else:
-        triad_cliques = [x for x in nx.enumerate_all_cliques(nxgraph) if len(x) == 3]
-        if len(triad_cliques) + len(nxgraph.nodes()) - len(nxgraph.edges()) == 1:
-            return True
-        return False
+    return is_chordal(nxgraph)
+
+def _closes_separating(x, y, adj, inner):
+    """Checks if the chord (x, y) would close a separating triangle.
+
+    A common neighbour c of x and y closes the triangle x-y-c. When
+    both x-c and y-c are edges of the face being split or chords drawn
+    inside it, that triangle lies in the triangulated face and bounds a
+    face; otherwise it separates the graph.
+    """
+    return any(frozenset((x, c)) not in inner
+               or frozenset((y, c)) not in inner
+               for c in adj[x] & adj[y])
+
+def _split_face(face, adj, add_chord):
+    """Triangulates a face by clipping ears in rounds.
+
+    Each round walks the face and clips every other ear, so chords
+    zig-zag across it and the face halves. An ear is clipped only when
+    its chord is not an edge yet and closes no separating triangle. If
+    a round clips nothing, one ear closing a separating triangle is
+    clipped; if that happens twice in a row, every valid ear of the
+    round is clipped so that such faces still halve.
+    """
+    inner = {frozenset(e) for e in zip(face, face[1:] + face[:1])}
+    strict = True
+    relaxed = 0
+    while len(face) > 3:
+        size = len(face)
+        clipped = [False] * size
+        count = 0
+        for i in range(size):
+            if count == size - 3 or (not strict and relaxed == 1 and count):
+                break
+            if clipped[i - 1] or (i == size - 1 and clipped[0]):
+                continue
+            x, y = face[i - 1], face[(i + 1) % size]
+            if y in adj[x] or (strict and _closes_separating(x, y, adj,
+                                                             inner)):
+                continue
+            add_chord(x, y)
+            inner.add(frozenset((x, y)))
+            clipped[i] = True
+            count += 1
+        if count:
+            face = [v for v, cut in zip(face, clipped) if not cut]
+            if strict:
+                relaxed = 0
+            strict = True
+        else:
+            strict = False
+            relaxed += 1
+
+@instrument.timed
+def planar_triangulate(nxgraph):
+    """Finds edges to be added to make a biconnected planar graph
+        maximal planar.
+
+    Each face of the planar embedding is walked once and split into
+    triangles by chords drawn inside it, so the result stays planar and
+    no chord is added twice. Chords that would close a separating
+    triangle are avoided whenever the face leaves another choice.
+
+    Args:
+        nxgraph: An instance of NetworkX Graph object.
+
+    Returns:
+        edges: A list representing edges to be added.
+
+    Raises:
+        NetworkXException: If the graph is not planar or not biconnected.
+    """
+    if nxgraph.number_of_nodes() < 3:
+        return []
+    is_planar, embedding = nx.check_planarity(nxgraph)
+    if not is_planar:
+        raise nx.NetworkXException("Graph is not planar.")
+    if not nx.is_biconnected(nxgraph):
+        raise nx.NetworkXException("Graph is not biconnected.")
+    adj = {node: set(nxgraph.neighbors(node)) - {node} for node in nxgraph}
+    edges = []
+
+    def add_chord(u, v):
+        adj[u].add(v)
+        adj[v].add(u)
+        edges.append((u, v))
+
+    visited = set()
+    for v, w in embedding.edges():
+        if (v, w) in visited:
+            continue
+        face = embedding.traverse_face(v, w, mark_half_edges=visited)
+        if len(face) > 3:
+            _split_face(face, adj, add_chord)
+    instrument.count("planar_triangulate.edges_added", len(edges))
+    return edges
+
+class IncrementalTriangulation:
+    """Keeps a minimal triangulation of a graph up to date as single
+    edges are added and removed.
+
+    The triangulation H starts as the MCS-M fill of the graph G, and a
+    perfect elimination ordering of H is kept with it. Adding an edge
+    that is already a chord only moves it from the fill to G. Any other
+    edge is added to H and the elimination game is replayed upwards
+    from its lower endpoint, which only touches higher neighbourhoods
+    along the way. Removing an edge leaves it in H as a chord. Either
+    way, minimality is then restored by dropping chords whose two
+    endpoints have a clique as common neighbourhood (so H stays
+    chordal), rechecking only chords next to the edges that changed.
+
+    The result is a minimal triangulation at every step, though not
+    necessarily the one MCS-M would give from scratch. Dropping a chord
+    can invalidate the elimination ordering; it is then recomputed by
+    maximum cardinality search in O(n+m) at the next insertion.
+    """
+
+    def __init__(self, nxgraph):
+        self._adj = {node: set(nxgraph.neighbors(node)) - {node}
+                     for node in nxgraph}
+        self._fill = set()
+        # node -> its neighbours along chords
+        self._chords = {node: set() for node in self._adj}
+        alpha, chords = mcs_m(nxgraph)
+        for u, v in chords:
+            self._link(u, v)
+            self._add_chord(u, v)
+        # MCS-M numbers from n down to 1: lower numbers go first
+        self._order = alpha
+
+    @property
+    def fill(self):
+        """A list of the chords currently added to the graph."""
+        return [tuple(edge) for edge in self._fill]
+
+    def _link(self, u, v):
+        self._adj[u].add(v)
+        self._adj[v].add(u)
+
+    def _unlink(self, u, v):
+        self._adj[u].discard(v)
+        self._adj[v].discard(u)
+
+    def _add_chord(self, u, v):
+        self._fill.add(frozenset((u, v)))
+        self._chords[u].add(v)
+        self._chords[v].add(u)
+
+    def _drop_chord(self, u, v):
+        self._fill.discard(frozenset((u, v)))
+        self._chords[u].discard(v)
+        self._chords[v].discard(u)
+
+    def _add_node(self, node):
+        if node not in self._adj:
+            self._adj[node] = set()
+            self._chords[node] = set()
+            if self._order is not None:
+                # an isolated vertex can be eliminated first
+                self._order[node] = min(self._order.values(), default=1) - 1
+
+    def ordering(self):
+        """Returns a perfect elimination ordering of the triangulation.
+
+        Returns:
+            order: A dictionary mapping each node to its position;
+                   nodes are eliminated in increasing order.
+        """
+        if self._order is None:
+            self._order = self._mcs()
+            instrument.count("incremental_triangulation.searches")
+        return self._order
+
+    def _mcs(self):
+        """Maximum cardinality search on H, numbering from n down to 1."""
+        weight = dict.fromkeys(self._adj, 0)
+        buckets = [set(self._adj)]
+        order = {}
+        top = 0
+        for i in range(len(self._adj), 0, -1):
+            while not buckets[top]:
+                top -= 1
+            z = buckets[top].pop()
+            order[z] = i
+            del weight[z]
+            for y in self._adj[z]:
+                if y in weight:
+                    buckets[weight[y]].discard(y)
+                    weight[y] += 1
+                    if weight[y] == len(buckets):
+                        buckets.append(set())
+                    buckets[weight[y]].add(y)
+                    top = max(top, weight[y])
+        return order
+
+    def _removable(self, u, v):
+        """Checks whether H stays chordal without the edge (u, v)."""
+        common = self._adj[u] & self._adj[v]
+        # x itself is the only vertex of common it may miss
+        return all(len(common - self._adj[x]) == 1 for x in common)
+
+    def _minimalize(self, candidates):
+        """Drops redundant chords, starting from the given ones.
+
+        Returns:
+            removed: A list of the chords dropped.
+        """
+        removed = []
+        work = set(candidates)
+        while work:
+            edge = work.pop()
+            if edge not in self._fill:
+                continue
+            u, v = tuple(edge)
+            if not self._removable(u, v):
+                continue
+            self._unlink(u, v)
+            self._drop_chord(u, v)
+            self._order = None
+            removed.append((u, v))
+            # only chords at u or v can have lost common neighbours
+            for x in (u, v):
+                work.update(frozenset((x, y)) for y in self._chords[x])
+        return removed
+
+    def add_edge(self, u, v):
+        """Adds the edge (u, v) to the graph and updates the fill.
+
+        Returns:
+            added: A list of the chords added.
+            removed: A list of the chords dropped.
+        """
+        self._add_node(u)
+        self._add_node(v)
+        if u == v:
+            return [], []
+        if v in self._adj[u]:
+            self._drop_chord(u, v)
+            return [], []
+        order = self.ordering()
+        self._link(u, v)
+        new = [(u, v)]
+        # replay the elimination game: the lower endpoint's higher
+        # neighbours must stay a clique
+        stack = [(u, v)]
+        while stack:
+            x, y = stack.pop()
+            lo, hi = (x, y) if order[x] < order[y] else (y, x)
+            for w in self._adj[lo]:
+                if order[w] > order[lo] and w != hi and w not in self._adj[hi]:
+                    self._link(hi, w)
+                    self._add_chord(hi, w)
+                    new.append((hi, w))
+                    stack.append((hi, w))
+        # chords whose common neighbourhood gained an edge
+        candidates = {frozenset(e) for e in new[1:]}
+        for a, b in new:
+            common = self._adj[a] & self._adj[b]
+            for x in common:
+                candidates.update(frozenset((x, y)) for y in self._chords[x] & common)
+        removed = self._minimalize(candidates)
+        # chords added and dropped within this edit cancel out
+        new_fill = {frozenset(e) for e in new[1:]}
+        gone = {frozenset(e) for e in removed}
+        return ([e for e in new[1:] if frozenset(e) not in gone]
+            , [e for e in removed if frozenset(e) not in new_fill])
+
+    def remove_edge(self, u, v):
+        """Removes the edge (u, v) from the graph and updates the fill.
+
+        Returns:
+            added: A list of the chords added (the edge itself if the
+                   triangulation still needs it).
+            removed: A list of the chords dropped.
+
+        Raises:
+            NetworkXError: If (u, v) is not an edge of the graph.
+        """
+        edge = frozenset((u, v))
+        if u not in self._adj or v not in self._adj[u] or edge in self._fill:
+            raise nx.NetworkXError("The edge %s-%s is not in the graph." % (u, v))
+        self._add_chord(u, v)
+        removed = self._minimalize([edge])
+        if (u, v) in removed or (v, u) in removed:
+            return [], [e for e in removed if frozenset(e) != edge]
+        return [(u, v)], removed
 
-def triangulate(nxgraph):
+@instrument.timed
+def triangulate(nxgraph, mode="chordal"):
     """Checks if a graph needs to be triangulated and returns
         edges to be added to make it triangulated.
 
     Args:
         # matrix: A matrix representing the adjacency matrix of the graph.
         nxgraph(for testing): an instance of networkx graph object
+        mode: "chordal" for a minimal chordal completion (MCS-M) or
+              "planar" for a maximal planar completion of a biconnected
+              planar graph.
     Returns:
          trng_edges: Edges to be added to make the graph triangulated.
     """
     # nxgraph = nx.from_numpy_matrix(matrix)
+    if mode == "planar":
+        return planar_triangulate(nxgraph)
     trng_edges = []
     if not chk_chordality(nxgraph):
         trng_edges = make_chordal(nxgraph)